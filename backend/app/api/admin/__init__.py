@@ -2,7 +2,15 @@ from .router import router
 from .accounts import router as accounts_router
 from .campaigns import router as campaigns_router
 from .logs import router as logs_router
+from .plans import router as plans_router
+from .profiles import router as profiles_router
+from .scheduler import router as scheduler_router
+from .workers import router as workers_router
 
 router.include_router(accounts_router)
 router.include_router(campaigns_router)
 router.include_router(logs_router)
+router.include_router(plans_router)
+router.include_router(profiles_router)
+router.include_router(scheduler_router)
+router.include_router(workers_router)
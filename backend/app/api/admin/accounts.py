@@ -2,16 +2,44 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
 from app.core.db import get_db
+from app.core.redis import redis_client
 from app.models.models import TelegramAccount
+from app.services.telegram.account_lane import lane_depth, lane_stats
+from app.services.telegram.health import AccountHealthMonitor
 
 router = APIRouter(prefix="/accounts")
 
+health_monitor = AccountHealthMonitor(redis_client)
+
 
 @router.get("/")
 def list_accounts(db: Session = Depends(get_db)):
     return db.query(TelegramAccount).all()
 
 
+@router.get("/health")
+def accounts_health(db: Session = Depends(get_db)):
+    account_ids = [str(row.id) for row in db.query(TelegramAccount.id)]
+    return {
+        account_id: {
+            "status": report.status,
+            "reason": report.reason,
+            "retry_after": report.retry_after,
+        }
+        for account_id, report in health_monitor.bulk_check(account_ids).items()
+    }
+
+
+@router.get("/lanes")
+def account_lanes():
+    return lane_stats()
+
+
+@router.get("/{account_id}/lane")
+def account_lane(account_id: str):
+    return {"account_id": account_id, "depth": lane_depth(account_id)}
+
+
 @router.post("/{account_id}/pause")
 def pause_account(account_id: str, db: Session = Depends(get_db)):
     account = db.get(TelegramAccount, account_id)
@@ -1,8 +1,18 @@
-from fastapi import APIRouter, Depends
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from app.core.db import get_db
 from app.models.models import Campaign
+from app.services.campaigns.campaign_lock import (
+    acquire_campaign_lock,
+    release_campaign_lock,
+)
+from app.services.campaigns.campaign_rotation import join_rotation, service_share
+from app.services.campaigns.events import publish_campaign_event
+from app.services.campaigns.group_rotation import coverage_stats
+from app.services.campaigns.spreading import resume_next_run
 
 router = APIRouter(prefix="/campaigns")
 
@@ -12,11 +22,22 @@ def list_campaigns(db: Session = Depends(get_db)):
     return db.query(Campaign).all()
 
 
+@router.get("/share/{customer_id}")
+def campaign_service_share(customer_id: str):
+    return service_share(customer_id)
+
+
+@router.get("/{campaign_id}/coverage")
+def campaign_coverage(campaign_id: str):
+    return coverage_stats(campaign_id)
+
+
 @router.post("/{campaign_id}/pause")
 def pause_campaign(campaign_id: str, db: Session = Depends(get_db)):
     campaign = db.get(Campaign, campaign_id)
     campaign.status = "paused"
     db.commit()
+    publish_campaign_event(campaign.id, "paused")
     return {"status": "paused"}
 
 
@@ -24,12 +45,32 @@ def pause_campaign(campaign_id: str, db: Session = Depends(get_db)):
 def resume_campaign(campaign_id: str, db: Session = Depends(get_db)):
     campaign = db.get(Campaign, campaign_id)
     campaign.status = "active"
+    campaign.next_run_at = resume_next_run(
+        campaign.next_run_at,
+        datetime.now(timezone.utc),
+    )
     db.commit()
+    join_rotation(campaign.customer_id, [campaign.id])
+    publish_campaign_event(campaign.id, "resumed")
     return {"status": "active"}
 
 
 @router.post("/{campaign_id}/run")
-async def run_campaign(campaign_id: str):
-    from app.workers.telegram_worker import run_campaign_once
-    await run_campaign_once(campaign_id)
+def run_campaign(campaign_id: str):
+    from app.workers.tasks import run_campaign_tick
+
+    # Same lock as scheduled ticks, so a manual run never overlaps one
+    lock_token = acquire_campaign_lock(campaign_id)
+    if lock_token is None:
+        raise HTTPException(status_code=409, detail="Campaign tick already running")
+
+    try:
+        run_campaign_tick.apply_async(
+            args=[campaign_id],
+            kwargs={"lock_token": lock_token},
+        )
+    except Exception:
+        release_campaign_lock(campaign_id, lock_token)
+        raise
+
     return {"status": "triggered"}
@@ -0,0 +1,47 @@
+from dataclasses import asdict
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.core.db import get_db
+from app.models.models import SubscriptionPlan
+from app.services.pricing.plans import current_plans, publish_plans_changed
+
+router = APIRouter(prefix="/plans")
+
+PLAN_FIELDS = (
+    "max_accounts",
+    "min_interval_seconds",
+    "daily_account_limit",
+    "group_cooldown_minutes",
+    "scheduling_weight",
+    "max_in_flight",
+)
+
+
+@router.get("/")
+def list_plans():
+    return {name: asdict(plan) for name, plan in current_plans().items()}
+
+
+@router.put("/{name}")
+def update_plan(name: str, payload: dict, db: Session = Depends(get_db)):
+    plan = db.query(SubscriptionPlan).filter(SubscriptionPlan.name == name).first()
+    if plan is None:
+        plan = SubscriptionPlan(name=name)
+        db.add(plan)
+
+    for field in PLAN_FIELDS:
+        if field in payload:
+            setattr(plan, field, payload[field])
+
+    db.commit()
+    publish_plans_changed()
+
+    return {field: getattr(plan, field) for field in ("name",) + PLAN_FIELDS}
+
+
+@router.post("/reload")
+def reload_plans():
+    publish_plans_changed()
+    return {"status": "reloading"}
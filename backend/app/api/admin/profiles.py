@@ -0,0 +1,30 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+
+from app.core.profiling import (
+    arm_campaign_profile,
+    armed_campaigns,
+    list_profiles,
+    profile_path,
+)
+
+router = APIRouter(prefix="/profiles")
+
+
+@router.get("/")
+def profiles():
+    return {"profiles": list_profiles(), "armed_campaigns": armed_campaigns()}
+
+
+@router.post("/campaigns/{campaign_id}")
+def profile_next_tick(campaign_id: str):
+    arm_campaign_profile(campaign_id)
+    return {"status": "armed", "campaign_id": campaign_id}
+
+
+@router.get("/{filename}")
+def download_profile(filename: str):
+    path = profile_path(filename)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, filename=filename)
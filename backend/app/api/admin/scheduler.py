@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+
+from app.services.campaigns.fair_queue import queue_delay_stats
+from app.services.pricing.plans import current_plans
+
+router = APIRouter(prefix="/scheduler")
+
+
+@router.get("/queue-delay")
+def queue_delay():
+    return queue_delay_stats(list(current_plans()))
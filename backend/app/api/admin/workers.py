@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+
+from app.workers.sharding import shard_stats
+
+router = APIRouter(prefix="/workers")
+
+
+@router.get("/shards")
+def shards():
+    return shard_stats()
@@ -1,9 +1,12 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from datetime import datetime
+from datetime import datetime, timezone
 
 from app.core.db import get_db
 from app.models.models import Campaign, CampaignGroup
+from app.services.campaigns.campaign_rotation import join_rotation
+from app.services.campaigns.events import publish_campaign_event
+from app.services.campaigns.spreading import resume_next_run
 from .router import customer_auth
 
 router = APIRouter(prefix="/campaigns")
@@ -83,6 +86,7 @@ def update_campaign(
     )
 
     db.commit()
+    publish_campaign_event(campaign.id, "updated")
     return {"status": "updated"}
 
 
@@ -102,7 +106,13 @@ def start_campaign(
         .first()
     )
     campaign.status = "active"
+    campaign.next_run_at = resume_next_run(
+        campaign.next_run_at,
+        datetime.now(timezone.utc),
+    )
     db.commit()
+    join_rotation(customer.id, [campaign.id])
+    publish_campaign_event(campaign.id, "started")
     return {"status": "active"}
 
 
@@ -122,5 +132,6 @@ def pause_campaign(
     )
     campaign.status = "paused"
     db.commit()
+    publish_campaign_event(campaign.id, "paused")
     return {"status": "paused"}
 
@@ -0,0 +1,137 @@
+import os
+
+from celery import Celery
+from celery.signals import (
+    before_task_publish,
+    task_postrun,
+    task_prerun,
+    worker_init,
+    worker_process_init,
+    worker_process_shutdown,
+)
+from kombu import Queue
+
+
+CELERY_BROKER_URL = os.getenv(
+    "CELERY_BROKER_URL",
+    os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+)
+
+# Queues
+# - scheduling: campaign ticks (DB reads, picks accounts/groups, fans out)
+# - sending.<shard>: one Telegram send per task (long network I/O), on
+#   the shard owning the account; always routed by tasks.dispatch_send,
+#   the bare "sending" name is only the prefix
+# - logs:       MessageLog persistence
+SCHEDULING_QUEUE = "scheduling"
+SENDING_QUEUE = "sending"
+LOGS_QUEUE = "logs"
+
+# /metrics of this worker; 0 disables the exporter
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "9102"))
+
+
+celery_app = Celery(
+    "teleads",
+    broker=CELERY_BROKER_URL,
+    include=["app.workers.tasks"],
+)
+
+celery_app.conf.update(
+    task_queues=(
+        Queue(SCHEDULING_QUEUE),
+        Queue(LOGS_QUEUE),
+    ),
+    task_default_queue=SCHEDULING_QUEUE,
+    task_routes={
+        "app.workers.tasks.run_campaign_tick": {"queue": SCHEDULING_QUEUE},
+        "app.workers.tasks.route_send": {"queue": SCHEDULING_QUEUE},
+        "app.workers.tasks.persist_message_log": {"queue": LOGS_QUEUE},
+    },
+    task_serializer="json",
+    accept_content=["json"],
+    task_ignore_result=True,
+    timezone="UTC",
+    enable_utc=True,
+    # Long I/O tasks: take one at a time, ack only once finished so a
+    # crashed worker's task is redelivered instead of lost
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    # Must exceed the longest countdown/eta, or Redis redelivers early
+    broker_transport_options={"visibility_timeout": 60 * 60 * 2},
+    worker_max_tasks_per_child=500,
+)
+
+
+@worker_init.connect
+def start_worker_exporter(**_):
+    from app.core.logging import setup_logging
+    from app.core.metrics import start_exporter
+    from app.core.tracing import setup_tracing
+
+    from app.services.pricing.plans import start_plan_registry
+
+    setup_logging("worker")
+    start_exporter(WORKER_METRICS_PORT)
+    setup_tracing("worker")
+    start_plan_registry()
+
+
+@worker_process_init.connect
+def init_worker_process(**_):
+    # Forked pool children must not reuse the parent's sockets
+    from app.core.db import dispose_engine, get_engine
+    from app.core.redis import close_redis
+    from app.services.pricing.plans import start_plan_registry
+
+    dispose_engine()
+    close_redis()
+    get_engine()
+    start_plan_registry()
+
+
+@worker_process_shutdown.connect
+def shutdown_worker_process(pid=None, **_):
+    from app.core.db import dispose_engine
+    from app.core.metrics import release_process_metrics
+
+    dispose_engine()
+    release_process_metrics(pid or os.getpid())
+
+
+# --------------------------------------------------
+# Trace context across the broker
+# --------------------------------------------------
+
+_TRACE_HEADERS = ("traceparent", "tracestate")
+_task_spans = {}
+
+
+@before_task_publish.connect
+def inject_trace_context(headers=None, **_):
+    from app.core.tracing import inject_headers
+
+    if headers is not None:
+        inject_headers(headers)
+
+
+@task_prerun.connect
+def start_task_span(task_id=None, task=None, **_):
+    from app.core.tracing import attach_from_headers
+
+    carrier = {
+        key: getattr(task.request, key)
+        for key in _TRACE_HEADERS
+        if getattr(task.request, key, None)
+    }
+    handle = attach_from_headers(carrier, f"celery.{task.name}", task_id=task_id)
+    if handle:
+        _task_spans[task_id] = handle
+
+
+@task_postrun.connect
+def end_task_span(task_id=None, **_):
+    from app.core.tracing import detach_span
+
+    detach_span(_task_spans.pop(task_id, None))
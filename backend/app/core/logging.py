@@ -0,0 +1,125 @@
+"""
+Central loguru setup.
+
+    LOG_LEVEL         default level                        (INFO)
+    LOG_LEVELS        per-module overrides, e.g.
+                      "app.workers=DEBUG,app.services.telegram.client=WARNING"
+    LOG_JSON          1 for one JSON object per line        (1, 0 for api)
+    LOG_SAMPLE_RATE   share of sampled hot-path lines kept  (0.01)
+
+Records are handed to a background writer (enqueue=True), so the event
+loop never blocks on the sink. Hot paths log with loguru's deferred
+formatting (`logger.debug("... {}", value)`) and gate per-message lines
+with sampled()/throttled() so their volume stays flat as sends grow.
+"""
+import os
+import random
+import sys
+import threading
+import time
+from typing import Dict, Optional
+
+from loguru import logger
+
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_JSON = os.getenv("LOG_JSON")
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.01"))
+
+# Background services log at send volume into an aggregator, so they
+# default to JSON; the API keeps readable lines unless LOG_JSON says so
+_TEXT_BY_DEFAULT = {"api"}
+
+_configured = False
+
+
+def _module_levels() -> Dict[str, str]:
+    levels = {"": LOG_LEVEL}
+    for item in filter(None, (part.strip() for part in LOG_LEVELS.split(","))):
+        module, _, level = item.partition("=")
+        levels[module.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(service: str):
+    """
+    Replaces loguru's default stderr handler. Safe to call twice.
+    """
+    global _configured
+
+    if _configured:
+        return
+
+    levels = _module_levels()
+    json_lines = (
+        LOG_JSON == "1" if LOG_JSON is not None
+        else service not in _TEXT_BY_DEFAULT
+    )
+
+    logger.remove()
+    logger.configure(extra={"service": service})
+    logger.add(
+        sys.stderr,
+        # The filter applies per-module levels; the handler lets all through
+        level=min(logger.level(level).no for level in levels.values()),
+        filter=levels,
+        serialize=json_lines,
+        enqueue=True,
+        backtrace=False,
+        diagnose=False,
+    )
+
+    _configured = True
+
+
+# --------------------------------------------------
+# Hot-path volume control
+# --------------------------------------------------
+
+def sampled(rate: Optional[float] = None) -> bool:
+    """
+    True for a random ``rate`` share of calls (LOG_SAMPLE_RATE by default).
+    """
+    return random.random() < (LOG_SAMPLE_RATE if rate is None else rate)
+
+
+# Keys may carry ids (account, group), so expired windows are swept once
+# the table reaches this size, then the oldest entries if still over
+THROTTLE_MAX_KEYS = 10_000
+
+_throttle_lock = threading.Lock()
+_throttle: Dict[str, list] = {}
+
+
+def _evict_throttle(now: float):
+    for key in [k for k, (at, _, window) in _throttle.items() if now - at >= window]:
+        del _throttle[key]
+
+    overflow = len(_throttle) - THROTTLE_MAX_KEYS // 2
+    if overflow > 0:
+        oldest = sorted(_throttle, key=lambda k: _throttle[k][0])[:overflow]
+        for key in oldest:
+            del _throttle[key]
+
+
+def throttled(key: str, seconds: float) -> Optional[int]:
+    """
+    Lets one line per ``key`` through every ``seconds``.
+
+    Returns None while suppressed, otherwise how many lines were dropped
+    since the last one let through.
+    """
+    now = time.monotonic()
+
+    with _throttle_lock:
+        state = _throttle.get(key)
+        if state is None or now - state[0] >= seconds:
+            skipped = state[1] if state else 0
+            if state is None and len(_throttle) >= THROTTLE_MAX_KEYS:
+                _evict_throttle(now)
+            _throttle[key] = [now, 0, seconds]
+            return skipped
+
+        state[1] += 1
+        return None
@@ -0,0 +1,217 @@
+import hashlib
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    start_http_server,
+)
+from prometheus_client.core import REGISTRY
+from prometheus_client.multiprocess import MultiProcessCollector, mark_process_dead
+
+
+# Accounts are folded into this many buckets so per-account series stay
+# bounded at tens of thousands of accounts
+ACCOUNT_BUCKETS = 64
+
+# Set for prefork Celery pools, the sending supervisor and multi-worker
+# uvicorn (prometheus_client multiprocess mode); each process then writes
+# its samples to this dir, which must be empty when the service starts
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+
+def account_bucket(account_id) -> str:
+    digest = hashlib.blake2b(str(account_id).encode(), digest_size=4).digest()
+    return str(int.from_bytes(digest, "big") % ACCOUNT_BUCKETS)
+
+
+# --------------------------------------------------
+# Scheduler
+# --------------------------------------------------
+
+SCHEDULER_PASS_SECONDS = Histogram(
+    "scheduler_pass_seconds",
+    "Duration of one scheduler pass",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+SCHEDULER_CAMPAIGNS_DUE = Counter(
+    "scheduler_campaigns_due_total",
+    "Campaigns found due by the scheduler",
+)
+SCHEDULER_CAMPAIGNS_ENQUEUED = Counter(
+    "scheduler_campaigns_enqueued_total",
+    "Campaign ticks enqueued",
+    ["tier"],
+)
+SCHEDULER_LAG_SECONDS = Histogram(
+    "scheduler_lag_seconds",
+    "Time between a campaign's next_run_at and its dispatch",
+    ["tier"],
+    buckets=(0.5, 1, 5, 15, 30, 60, 120, 300, 900, 3600),
+)
+
+
+# --------------------------------------------------
+# Worker
+# --------------------------------------------------
+
+SEND_SECONDS = Histogram(
+    "telegram_send_seconds",
+    "Telegram send latency, connect included",
+    ["outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+)
+FLOODWAIT_SECONDS = Counter(
+    "telegram_floodwait_seconds_total",
+    "FloodWait seconds imposed, by account bucket",
+    ["account_bucket"],
+)
+FLOODWAIT_EVENTS = Histogram(
+    "telegram_floodwait_duration_seconds",
+    "Length of individual FloodWaits",
+    buckets=(5, 15, 30, 60, 300, 900, 3600, 86400),
+)
+LIMITER_DENIALS = Counter(
+    "limiter_denials_total",
+    "Sends or accounts held back by a limiter",
+    ["reason"],
+)
+SEND_JOURNAL_LOOKUPS = Counter(
+    "send_journal_lookups_total",
+    "Send journal reservations; duplicate and in_progress are hits",
+    ["result"],
+)
+
+
+# --------------------------------------------------
+# Infrastructure
+# --------------------------------------------------
+
+REDIS_COMMAND_SECONDS = Histogram(
+    "redis_command_seconds",
+    "Redis round trip by command",
+    ["command"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5),
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_seconds",
+    "API latency by route template",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+
+# Set from pool events in every process; livesum adds up the live ones
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out",
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Connections open beyond pool_size",
+    multiprocess_mode="livesum",
+)
+
+
+def instrument_pool(engine):
+    """
+    Keeps the db_pool_* gauges current from the pool's checkout and
+    checkin events. app.core.db calls it for every engine it builds.
+    """
+    from sqlalchemy import event
+    from sqlalchemy.pool import QueuePool
+
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return
+
+    @event.listens_for(pool, "checkout")
+    def _checkout(dbapi_connection, record, proxy):
+        DB_POOL_CHECKED_OUT.inc()
+        DB_POOL_OVERFLOW.set(max(pool.overflow(), 0))
+
+    @event.listens_for(pool, "checkin")
+    def _checkin(dbapi_connection, record):
+        DB_POOL_CHECKED_OUT.dec()
+        # Fires before the connection is returned; with no free slot the
+        # pool closes it and gives back one overflow
+        overflow = pool.overflow()
+        if pool.checkedin() >= pool.size():
+            overflow -= 1
+        DB_POOL_OVERFLOW.set(max(overflow, 0))
+
+
+def instrument_redis(client):
+    """
+    Times every command (scripts show up as EVALSHA) and pipeline.
+    """
+    execute_command = client.execute_command
+    pipeline = client.pipeline
+
+    def timed_command(*args, **options):
+        started = time.perf_counter()
+        try:
+            return execute_command(*args, **options)
+        finally:
+            name = args[0].decode() if isinstance(args[0], bytes) else str(args[0])
+            REDIS_COMMAND_SECONDS.labels(name.split(" ")[0].upper()).observe(
+                time.perf_counter() - started
+            )
+
+    def timed_pipeline(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        def timed_execute(*a, **kw):
+            started = time.perf_counter()
+            try:
+                return execute(*a, **kw)
+            finally:
+                REDIS_COMMAND_SECONDS.labels("PIPELINE").observe(
+                    time.perf_counter() - started
+                )
+
+        pipe.execute = timed_execute
+        return pipe
+
+    client.execute_command = timed_command
+    client.pipeline = timed_pipeline
+    return client
+
+
+# --------------------------------------------------
+# Exposition
+# --------------------------------------------------
+
+def _registry():
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def render_latest():
+    return generate_latest(_registry()), CONTENT_TYPE_LATEST
+
+
+def release_process_metrics(pid: int):
+    """
+    Drops the live gauge files of an exited process (multiprocess mode).
+    """
+    if PROMETHEUS_MULTIPROC_DIR:
+        mark_process_dead(pid)
+
+
+def start_exporter(port: int):
+    """
+    Serves /metrics for a non-HTTP process (scheduler, Celery worker).
+    """
+    if port:
+        start_http_server(port, registry=_registry())
@@ -0,0 +1,200 @@
+"""
+On-demand profiling of API requests and campaign ticks (pyinstrument).
+
+A request is profiled when it carries `X-Profile: <admin api key>` or is
+picked by PROFILE_SAMPLE_RATE. A campaign tick is profiled once after
+its id is armed with arm_campaign_profile (admin endpoint). Profiles are
+written to PROFILE_DIR as speedscope JSON (flamegraph) plus an HTML view.
+
+Without pyinstrument installed nothing is profiled.
+"""
+import functools
+import inspect
+import os
+import random
+import re
+import time
+from contextvars import ContextVar
+from typing import Coroutine, Dict, List, Optional
+
+from loguru import logger
+
+from app.core.redis import redis_client
+
+try:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import HTMLRenderer, SpeedscopeRenderer
+except ImportError:  # pragma: no cover - optional dependency
+    Profiler = None
+
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_HEADER = "x-profile"
+ARMED_CAMPAIGNS_KEY = "profiling:campaigns"
+
+_request_profile: ContextVar[Optional[dict]] = ContextVar(
+    "request_profile", default=None
+)
+
+
+def enabled() -> bool:
+    return Profiler is not None
+
+
+def _slug(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]+", "_", value).strip("_")[:80]
+
+
+def save_session(session, kind: str, label: str) -> str:
+    """
+    Writes a profile session; returns the file stem.
+    """
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stem = f"{time.strftime('%Y%m%dT%H%M%S')}-{kind}-{_slug(label)}"
+
+    with open(os.path.join(PROFILE_DIR, f"{stem}.speedscope.json"), "w") as f:
+        f.write(SpeedscopeRenderer().render(session))
+    with open(os.path.join(PROFILE_DIR, f"{stem}.html"), "w") as f:
+        f.write(HTMLRenderer().render(session))
+
+    logger.info(f"Saved profile {stem} ({session.duration:.3f}s)")
+    return stem
+
+
+# --------------------------------------------------
+# API requests
+# --------------------------------------------------
+
+def should_profile_request(headers, admin_key: str) -> bool:
+    if not enabled():
+        return False
+    if headers.get(PROFILE_HEADER) == admin_key:
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def start_request_profile():
+    """
+    Marks the current request for profiling; returns a reset token.
+    """
+    return _request_profile.set({"session": None})
+
+
+def finish_request_profile(token, label: str):
+    holder = _request_profile.get()
+    _request_profile.reset(token)
+
+    if holder and holder["session"] is not None:
+        save_session(holder["session"], "request", label)
+
+
+def _profiled_endpoint(call):
+    """
+    Profiles the endpoint body when the request was marked.
+
+    Sync endpoints run in Starlette's threadpool and pyinstrument only
+    samples its own thread, so the profiler has to start in there; the
+    request mark reaches the thread through the copied context.
+    """
+    if inspect.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def wrapper(*args, **kwargs):
+            holder = _request_profile.get()
+            if holder is None:
+                return await call(*args, **kwargs)
+
+            profiler = Profiler(async_mode="enabled")
+            profiler.start()
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                holder["session"] = profiler.stop()
+
+        return wrapper
+
+    @functools.wraps(call)
+    def wrapper(*args, **kwargs):
+        holder = _request_profile.get()
+        if holder is None:
+            return call(*args, **kwargs)
+
+        profiler = Profiler(async_mode="disabled")
+        profiler.start()
+        try:
+            return call(*args, **kwargs)
+        finally:
+            holder["session"] = profiler.stop()
+
+    return wrapper
+
+
+def instrument_routes(app):
+    from fastapi.routing import APIRoute
+
+    if not enabled():
+        return
+
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            route.dependant.call = _profiled_endpoint(route.dependant.call)
+
+
+# --------------------------------------------------
+# Campaign ticks
+# --------------------------------------------------
+
+def arm_campaign_profile(campaign_id: str):
+    redis_client.sadd(ARMED_CAMPAIGNS_KEY, str(campaign_id))
+
+
+def take_campaign_profile(campaign_id: str) -> bool:
+    """
+    True once per arming: the next tick of the campaign is profiled.
+    """
+    return enabled() and bool(redis_client.srem(ARMED_CAMPAIGNS_KEY, str(campaign_id)))
+
+
+def armed_campaigns() -> List[str]:
+    return sorted(c.decode() for c in redis_client.smembers(ARMED_CAMPAIGNS_KEY))
+
+
+async def profile_coroutine(coro: Coroutine, kind: str, label: str):
+    """
+    Awaits ``coro`` under the profiler, on whatever loop runs it.
+    """
+    profiler = Profiler(async_mode="enabled")
+    profiler.start()
+    try:
+        return await coro
+    finally:
+        save_session(profiler.stop(), kind, label)
+
+
+# --------------------------------------------------
+# Listing
+# --------------------------------------------------
+
+def list_profiles() -> List[Dict]:
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+
+    profiles = {}
+    for name in os.listdir(PROFILE_DIR):
+        stem = name.split(".", 1)[0]
+        entry = profiles.setdefault(stem, {"name": stem, "files": []})
+        entry["files"].append(name)
+        entry["created_at"] = os.path.getmtime(os.path.join(PROFILE_DIR, name))
+
+    return sorted(profiles.values(), key=lambda p: p["created_at"], reverse=True)
+
+
+def profile_path(filename: str) -> Optional[str]:
+    """
+    Absolute path of a profile file, or None for unknown/unsafe names.
+    """
+    if os.path.basename(filename) != filename:
+        return None
+
+    path = os.path.join(PROFILE_DIR, filename)
+    return path if os.path.isfile(path) else None
@@ -0,0 +1,132 @@
+"""
+Per-request / per-tick SQL accounting.
+
+Every statement run while a track_queries() block is active is counted
+and timed. On exit the block logs statements repeated more than
+N_PLUS_ONE_THRESHOLD times (the same SQL with different parameters is
+the usual lazy-load N+1). Statements slower than SLOW_QUERY_MS are
+logged with parameter values redacted, tracked or not.
+
+    SLOW_QUERY_MS          (200)
+    N_PLUS_ONE_THRESHOLD   (5)
+    SQL_DEBUG              1 adds X-DB-* headers to API responses
+"""
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+SQL_DEBUG = os.getenv("SQL_DEBUG", "0") == "1"
+
+
+class QueryStats:
+    def __init__(self, label: str):
+        self.label = label
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        self.statements[statement] += 1
+
+    def repeated(self):
+        return [
+            (statement, n)
+            for statement, n in self.statements.most_common()
+            if n > N_PLUS_ONE_THRESHOLD
+        ]
+
+    def headers(self) -> dict:
+        return {
+            "X-DB-Queries": str(self.count),
+            "X-DB-Time-Ms": f"{self.seconds * 1000:.1f}",
+            "X-DB-Repeated": str(len(self.repeated())),
+        }
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries(label: str):
+    """
+    Collects statements run in this block, including on threads and
+    tasks that inherit the context.
+    """
+    stats = QueryStats(label)
+    token = _current.set(stats)
+
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+        for statement, n in stats.repeated():
+            logger.warning(
+                "Possible N+1 in {}: {}x {}",
+                label,
+                n,
+                _shorten(statement),
+            )
+
+
+def _shorten(statement: str, limit: int = 300) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= limit else statement[:limit] + "…"
+
+
+def _redact(parameters) -> object:
+    """
+    Keeps the shape of bound parameters, never their values.
+    """
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return f"[{len(parameters)} rows]"
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info["query_started"].pop()
+
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, seconds)
+
+    if seconds * 1000 >= SLOW_QUERY_MS:
+        logger.warning(
+            "Slow query ({:.0f} ms){}: {} params={}",
+            seconds * 1000,
+            f" in {stats.label}" if stats else "",
+            _shorten(statement),
+            _redact(parameters),
+        )
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute; drop its
+    # start time so the next query on this connection is timed correctly
+    if context.connection is None or context.execution_context is None:
+        return
+    started = context.connection.info.get("query_started")
+    if started:
+        started.pop()
@@ -3,22 +3,29 @@ import os
 import redis
 from loguru import logger
 
+from app.core.metrics import instrument_redis
+
 
 REDIS_URL = os.getenv(
     "REDIS_URL",
     "redis://localhost:6379/0",
 )
 
-try:
-    redis_client = redis.Redis.from_url(
-        REDIS_URL,
-        decode_responses=False,
-    )
+# Connections are opened by the pool on first command, so importing this
+# module never touches the network; readiness is checked by ping_redis()
+redis_client = instrument_redis(redis.Redis.from_url(
+    REDIS_URL,
+    decode_responses=False,
+))
+
+
+def ping_redis() -> bool:
+    try:
+        return bool(redis_client.ping())
+    except Exception:
+        logger.exception("Redis is not reachable")
+        return False
 
-    # Test connection
-    redis_client.ping()
-    logger.success("Connected to Redis")
 
-except Exception as e:
-    logger.exception("Failed to connect to Redis")
-    raise
+def close_redis():
+    redis_client.connection_pool.disconnect()
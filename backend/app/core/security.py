@@ -0,0 +1,5 @@
+import secrets
+
+
+def generate_api_key() -> str:
+    return secrets.token_urlsafe(32)
@@ -0,0 +1,180 @@
+"""
+Distributed tracing (OpenTelemetry), off unless configured.
+
+    TRACING_SAMPLE_RATE   share of new traces to keep, 0 disables (0)
+    TRACING_EXPORTER      file | otlp                            (file)
+    TRACING_FILE          JSON-lines output for the file exporter
+                          (traces/spans.jsonl)
+
+OTLP uses the standard OTEL_EXPORTER_OTLP_* variables. Child spans follow
+their parent's sampling decision, so a sampled scheduler tick is traced
+through Celery, the worker, Telethon and the DB.
+
+Without the opentelemetry packages every helper here is a no-op.
+"""
+import os
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from loguru import logger
+
+try:
+    from opentelemetry import context, propagate, trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import (
+        BatchSpanProcessor,
+        ConsoleSpanExporter,
+    )
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+except ImportError:  # pragma: no cover - optional dependency
+    trace = None
+
+
+TRACING_SAMPLE_RATE = float(os.getenv("TRACING_SAMPLE_RATE", "0"))
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "file")
+TRACING_FILE = os.getenv("TRACING_FILE", "traces/spans.jsonl")
+
+_enabled = False
+
+
+def _exporter():
+    if TRACING_EXPORTER == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+        return OTLPSpanExporter()
+
+    os.makedirs(os.path.dirname(TRACING_FILE) or ".", exist_ok=True)
+    return ConsoleSpanExporter(
+        out=open(TRACING_FILE, "a", buffering=1),
+        formatter=lambda span: span.to_json(indent=None) + "\n",
+    )
+
+
+def instrument_engine(engine):
+    """
+    Traces the statements of ``engine``. app.core.db calls it for every
+    engine it builds, so forked workers that rebuild theirs stay traced.
+    """
+    if not _enabled:
+        return
+
+    try:
+        from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+    except ImportError:
+        logger.debug("SQLAlchemy instrumentation not installed")
+        return
+
+    instrumentor = SQLAlchemyInstrumentor()
+    # The instrumentor is a singleton; after a fork it still points at
+    # the parent's engine
+    if instrumentor.is_instrumented_by_opentelemetry:
+        instrumentor.uninstrument()
+    instrumentor.instrument(engine=engine)
+
+
+def _instrument_libraries(app=None):
+    """
+    Hooks SQLAlchemy, Redis and FastAPI when their instrumentations exist.
+    """
+    from app.core.db import initialized_engine
+
+    # Otherwise get_engine() instruments it when it is built
+    engine = initialized_engine()
+    if engine is not None:
+        instrument_engine(engine)
+
+    try:
+        from opentelemetry.instrumentation.redis import RedisInstrumentor
+        RedisInstrumentor().instrument()
+    except ImportError:
+        logger.debug("Redis instrumentation not installed")
+
+    if app is not None:
+        try:
+            from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+            FastAPIInstrumentor.instrument_app(app, excluded_urls="metrics,health")
+        except ImportError:
+            logger.debug("FastAPI instrumentation not installed")
+
+
+def setup_tracing(service_name: str, app=None):
+    """
+    Installs the tracer provider for this process. Safe to call twice.
+    """
+    global _enabled
+
+    if _enabled or trace is None or TRACING_SAMPLE_RATE <= 0:
+        return
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": service_name}),
+        sampler=ParentBased(TraceIdRatioBased(TRACING_SAMPLE_RATE)),
+    )
+    provider.add_span_processor(BatchSpanProcessor(_exporter()))
+    trace.set_tracer_provider(provider)
+
+    _enabled = True
+    _instrument_libraries(app)
+
+    logger.info(
+        f"Tracing {service_name} at {TRACING_SAMPLE_RATE:.0%} "
+        f"via {TRACING_EXPORTER}"
+    )
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Wraps a block in a child span of whatever span is current.
+    """
+    if not _enabled:
+        yield None
+        return
+
+    tracer = trace.get_tracer("teleads")
+    with tracer.start_as_current_span(name) as current:
+        for key, value in attributes.items():
+            if value is not None:
+                current.set_attribute(key, str(value))
+        yield current
+
+
+# --------------------------------------------------
+# Propagation across Celery messages
+# --------------------------------------------------
+
+def inject_headers(headers: Dict):
+    if _enabled:
+        propagate.inject(headers)
+
+
+def attach_from_headers(carrier: Dict, name: str, **attributes):
+    """
+    Starts a span continuing the trace in ``carrier``; returns a token
+    for detach_span.
+    """
+    if not _enabled:
+        return None
+
+    ctx = propagate.extract(carrier)
+    current = trace.get_tracer("teleads").start_span(name, context=ctx)
+    for key, value in attributes.items():
+        if value is not None:
+            current.set_attribute(key, str(value))
+
+    token = context.attach(trace.set_span_in_context(current, ctx))
+    return current, token
+
+
+def detach_span(handle: Optional[tuple], error: Optional[BaseException] = None):
+    if not handle:
+        return
+
+    current, token = handle
+    if error is not None:
+        current.record_exception(error)
+        current.set_status(trace.Status(trace.StatusCode.ERROR))
+    current.end()
+    context.detach(token)
@@ -1,14 +1,45 @@
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.admin import router as admin_router
 from app.api.customer import router as customer_router
+from app.api.admin.router import ADMIN_API_KEY
+from app.core.db import dispose_engine, get_engine, ping_db
+from app.core.logging import setup_logging
+from app.core.metrics import HTTP_REQUEST_SECONDS, render_latest
+from app.core.profiling import (
+    finish_request_profile,
+    instrument_routes,
+    should_profile_request,
+    start_request_profile,
+)
+from app.core.query_stats import SQL_DEBUG, track_queries
+from app.core.redis import close_redis, ping_redis
+from app.services.pricing.plans import start_plan_registry
+from app.core.tracing import setup_tracing
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pools are built here, per worker process, not at import
+    get_engine()
+    start_plan_registry()
+    yield
+    dispose_engine()
+    close_redis()
 
 
 def create_app() -> FastAPI:
+    setup_logging("api")
+
     app = FastAPI(
         title="Telegram Ads Platform",
         version="0.1.0",
+        lifespan=lifespan,
     )
 
     # --------------------------------------------------
@@ -22,12 +53,73 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # --------------------------------------------------
+    # Metrics (labelled by route template, not raw path)
+    # --------------------------------------------------
+    @app.middleware("http")
+    async def record_request_latency(request: Request, call_next):
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = request.scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                request.method,
+                route.path if route else "unmatched",
+                f"{status // 100}xx",
+            ).observe(time.perf_counter() - started)
+
+    # --------------------------------------------------
+    # Profiling (X-Profile header or PROFILE_SAMPLE_RATE)
+    # --------------------------------------------------
+    @app.middleware("http")
+    async def profile_request(request: Request, call_next):
+        if not should_profile_request(request.headers, ADMIN_API_KEY):
+            return await call_next(request)
+
+        token = start_request_profile()
+        try:
+            return await call_next(request)
+        finally:
+            route = request.scope.get("route")
+            finish_request_profile(
+                token,
+                f"{request.method}-{route.path if route else request.url.path}",
+            )
+
+    # --------------------------------------------------
+    # SQL accounting (N+1 warnings; X-DB-* headers with SQL_DEBUG=1)
+    # --------------------------------------------------
+    @app.middleware("http")
+    async def account_queries(request: Request, call_next):
+        with track_queries(f"{request.method} {request.url.path}") as stats:
+            response = await call_next(request)
+
+            route = request.scope.get("route")
+            if route:
+                stats.label = f"{request.method} {route.path}"
+
+        if SQL_DEBUG:
+            response.headers.update(stats.headers())
+        return response
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        body, content_type = render_latest()
+        return Response(body, media_type=content_type)
+
     # --------------------------------------------------
     # Routers
     # --------------------------------------------------
     app.include_router(admin_router)
     app.include_router(customer_router)
 
+    setup_tracing("api", app)
+    instrument_routes(app)
+
     # --------------------------------------------------
     # Health check
     # --------------------------------------------------
@@ -35,6 +127,15 @@ def create_app() -> FastAPI:
     def health():
         return {"status": "ok"}
 
+    # Readiness: dependencies reachable (liveness stays /health)
+    @app.get("/ready")
+    def ready():
+        checks = {"database": ping_db(), "redis": ping_redis()}
+        return JSONResponse(
+            {"status": "ready" if all(checks.values()) else "unavailable", **checks},
+            status_code=200 if all(checks.values()) else 503,
+        )
+
     return app
 
 
@@ -14,10 +14,12 @@ from sqlalchemy import (
     BigInteger,
     Index,
     UniqueConstraint,
+    text,
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
+from app.core.security import generate_api_key
 from app.models.base import Base
 
 
@@ -50,6 +52,9 @@ class Customer(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, nullable=False)
     email = Column(String, unique=True)
+    subscription_tier = Column(String, nullable=False, default="solo")
+    # X-API-Key of the customer API (app.api.customer.router)
+    api_key = Column(String, unique=True, index=True, default=generate_api_key)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
 
@@ -84,6 +89,10 @@ class TelegramAccount(Base):
     )
 
     status = Column(String, default="warming")
+    # Set while status is 'restricted' (FloodWait pause); lifted afterwards
+    restricted_until = Column(DateTime(timezone=True))
+    # Status the account returns to when the restriction ends
+    pre_restriction_status = Column(String)
     daily_message_limit = Column(Integer, default=40)
 
     last_used_at = Column(DateTime(timezone=True))
@@ -102,6 +111,11 @@ class TelegramAccount(Base):
             "status IN ('warming', 'active', 'paused', 'restricted', 'banned')"
         ),
         Index("idx_telegram_accounts_status", "status"),
+        Index(
+            "idx_telegram_accounts_restricted_until",
+            "restricted_until",
+            postgresql_where=text("status = 'restricted'"),
+        ),
     )
 
 
@@ -167,6 +181,7 @@ class Campaign(Base):
     interval_minutes = Column(Integer, nullable=False)
     start_at = Column(DateTime(timezone=True))
     end_at = Column(DateTime(timezone=True))
+    next_run_at = Column(DateTime(timezone=True))
 
     status = Column(String, default="draft")
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
@@ -196,6 +211,7 @@ class Campaign(Base):
             "status IN ('draft', 'active', 'paused', 'completed')"
         ),
         Index("idx_campaigns_status", "status"),
+        Index("idx_campaigns_status_next_run_at", "status", "next_run_at"),
     )
 
 
@@ -368,7 +384,7 @@ class DailyCounter(Base):
 class SubscriptionPlan(Base):
     __tablename__ = "subscription_plans"
 
-    id = Column(UUID(as_uuid=True), primary_key=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, unique=True)
 
     max_accounts = Column(Integer)
@@ -377,6 +393,10 @@ class SubscriptionPlan(Base):
     daily_account_limit = Column(Integer)
     group_cooldown_minutes = Column(Integer)
 
+    # Scheduler share and concurrent ticks per customer
+    scheduling_weight = Column(Integer)
+    max_in_flight = Column(Integer)
+
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
@@ -396,10 +416,12 @@ class MarketList(Base):
 
     customer = relationship("Customer", back_populates="market_lists")
 
+    # Dynamic: membership checks and appends must not load every group
     groups = relationship(
         "TelegramGroup",
         secondary="market_list_groups",
         back_populates="market_lists",
+        lazy="dynamic",
     )
 
     campaigns = relationship(
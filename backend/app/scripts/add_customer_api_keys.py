@@ -0,0 +1,54 @@
+"""
+Adds customers.api_key to an existing database and gives every customer
+without one a key.
+
+    python -m app.scripts.add_customer_api_keys
+    python -m app.scripts.add_customer_api_keys --keys-file customer_keys.txt
+
+Safe to run more than once. With --keys-file the keys issued by this run
+are written one per line, as app.scripts.load_test reads them.
+"""
+import argparse
+
+from sqlalchemy import text
+
+from app.core.db import SessionLocal
+from app.core.security import generate_api_key
+from app.models.models import Customer
+
+
+MIGRATION = [
+    "ALTER TABLE customers ADD COLUMN IF NOT EXISTS api_key varchar",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_customers_api_key ON customers (api_key)",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--keys-file", help="write the issued keys here")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        for statement in MIGRATION:
+            db.execute(text(statement))
+        db.commit()
+
+        customers = db.query(Customer).filter(Customer.api_key.is_(None)).all()
+        for customer in customers:
+            customer.api_key = generate_api_key()
+        db.commit()
+
+        keys = [customer.api_key for customer in customers]
+    finally:
+        db.close()
+
+    print(f"Issued API keys to {len(keys)} customers")
+
+    if args.keys_file:
+        with open(args.keys_file, "w") as f:
+            f.writelines(f"{key}\n" for key in keys)
+
+
+if __name__ == "__main__":
+    main()
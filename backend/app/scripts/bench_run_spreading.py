@@ -0,0 +1,111 @@
+"""
+Simulates scheduler passes to compare dispatch load with and without
+per-campaign phase offsets.
+
+    python -m app.scripts.bench_run_spreading --campaigns 1000 --interval 30
+"""
+import argparse
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from app.services.campaigns.spreading import (
+    advance_next_run,
+    aligned_run_after,
+)
+
+
+def simulate_legacy(campaign_ids, period, start, passes, poll_seconds):
+    """
+    Old behaviour: due as soon as the interval since the last run passed.
+    """
+    last_run = {cid: None for cid in campaign_ids}
+    load = []
+
+    for i in range(passes):
+        now = start + timedelta(seconds=i * poll_seconds)
+        dispatched = 0
+        for cid in campaign_ids:
+            last = last_run[cid]
+            if last is None or (now - last).total_seconds() >= period:
+                last_run[cid] = now
+                dispatched += 1
+        load.append(dispatched)
+
+    return load
+
+
+def simulate_spread(campaign_ids, period, start, passes, poll_seconds):
+    """
+    New behaviour: next_run_at placed on each campaign's phase.
+    """
+    next_run = {cid: None for cid in campaign_ids}
+    load = []
+
+    for i in range(passes):
+        now = start + timedelta(seconds=i * poll_seconds)
+        dispatched = 0
+        for cid in campaign_ids:
+            scheduled = next_run[cid]
+            if scheduled is None:
+                next_run[cid] = aligned_run_after(cid, period, now)
+                continue
+            if scheduled <= now:
+                next_run[cid] = advance_next_run(
+                    cid, period, scheduled=scheduled, now=now
+                )
+                dispatched += 1
+        load.append(dispatched)
+
+    return load
+
+
+def summarize(load):
+    mean = sum(load) / len(load)
+    peak = max(load)
+    return {
+        "dispatched": sum(load),
+        "mean_per_pass": round(mean, 3),
+        "peak_per_pass": peak,
+        "peak_to_mean": round(peak / mean, 2) if mean else None,
+        "idle_passes": sum(1 for x in load if x == 0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--campaigns", type=int, default=1000)
+    parser.add_argument("--interval", type=int, default=30, help="minutes")
+    parser.add_argument("--hours", type=int, default=24)
+    parser.add_argument("--poll-seconds", type=int, default=30)
+    args = parser.parse_args()
+
+    campaign_ids = [str(uuid.uuid4()) for _ in range(args.campaigns)]
+    period = args.interval * 60
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    passes = args.hours * 3600 // args.poll_seconds
+
+    results = {
+        "before": summarize(
+            simulate_legacy(campaign_ids, period, start, passes, args.poll_seconds)
+        ),
+        "after": summarize(
+            simulate_spread(campaign_ids, period, start, passes, args.poll_seconds)
+        ),
+    }
+
+    print(
+        f"{args.campaigns} campaigns, {args.interval} min interval, "
+        f"{passes} passes every {args.poll_seconds}s"
+    )
+    for name, stats in results.items():
+        print(
+            f"{name:>6}: peak/mean={stats['peak_to_mean']:>6} "
+            f"peak={stats['peak_per_pass']:>5} "
+            f"mean={stats['mean_per_pass']:>8} "
+            f"idle passes={stats['idle_passes']} "
+            f"dispatched={stats['dispatched']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
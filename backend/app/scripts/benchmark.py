@@ -0,0 +1,487 @@
+"""
+Benchmarks for the scheduler, limiters, log writes and API hot paths.
+
+    python -m app.scripts.benchmark --scales 1000,10000 --output bench/HEAD.json
+    python -m app.scripts.benchmark --compare bench/main.json --output bench/HEAD.json
+
+Runs against DATABASE_URL (tables from create_tables) and an in-memory
+fakeredis. The schedule pass clears scheduler and campaign lock keys
+between samples, so a real Redis is only used when given explicitly with
+--redis-url, and that URL must not be the application's REDIS_URL (use a
+spare database, e.g. redis://localhost:6379/15). Fixture rows are tagged
+with the run id and removed afterwards. Celery publishes go to an
+in-memory broker so nothing is executed.
+
+Results are written as JSON; --compare prints the change against an
+earlier run and exits non-zero when a metric regresses beyond
+--threshold percent.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List
+
+
+os.environ.setdefault("CELERY_BROKER_URL", "memory://")
+
+
+def _use_fakeredis():
+    import fakeredis
+    import redis
+
+    server = fakeredis.FakeServer()
+    redis.Redis.from_url = classmethod(
+        lambda cls, url, **kwargs: fakeredis.FakeRedis(server=server, **kwargs)
+    )
+
+
+# --------------------------------------------------
+# Measurement helpers
+# --------------------------------------------------
+
+def percentiles(samples: List[float]) -> Dict:
+    ordered = sorted(samples)
+
+    def pct(p: float) -> float:
+        return ordered[min(int(len(ordered) * p), len(ordered) - 1)]
+
+    return {
+        "n": len(ordered),
+        "p50_ms": round(pct(0.50) * 1000, 3),
+        "p99_ms": round(pct(0.99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+    }
+
+
+def time_calls(fn: Callable, n: int) -> List[float]:
+    samples = []
+    for _ in range(n):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def ops_per_sec(fn: Callable, n: int) -> float:
+    started = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return round(n / (time.perf_counter() - started), 1)
+
+
+# --------------------------------------------------
+# Fixtures
+# --------------------------------------------------
+
+class Fixtures:
+    """
+    Bulk-inserts benchmark rows and removes them when done.
+    """
+
+    def __init__(self, db, run_id: str):
+        self.db = db
+        self.run_id = run_id
+        self.customer_ids: List[uuid.UUID] = []
+        self.account_ids: List[uuid.UUID] = []
+        self.group_ids: List[uuid.UUID] = []
+
+    def customers(self, n: int, tier: str = "growth") -> List[uuid.UUID]:
+        from app.models.models import Customer
+
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "name": f"bench-{self.run_id}-{i}",
+                "subscription_tier": tier,
+                "is_active": True,
+            }
+            for i in range(n)
+        ]
+        self.db.bulk_insert_mappings(Customer, rows)
+        self.db.commit()
+
+        ids = [row["id"] for row in rows]
+        self.customer_ids.extend(ids)
+        return ids
+
+    def campaigns(self, customer_ids, n: int, *, due: bool = True) -> List[uuid.UUID]:
+        from app.models.models import Campaign
+
+        now = datetime.now(timezone.utc)
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "customer_id": customer_ids[i % len(customer_ids)],
+                "name": f"bench-{i}",
+                "campaign_type": "shared",
+                "message_template": "benchmark",
+                "interval_minutes": 30,
+                "status": "active",
+                "next_run_at": now - timedelta(seconds=1) if due else None,
+            }
+            for i in range(n)
+        ]
+        self.db.bulk_insert_mappings(Campaign, rows)
+        self.db.commit()
+        return [row["id"] for row in rows]
+
+    def groups(self, n: int) -> List[uuid.UUID]:
+        from app.models.models import TelegramGroup
+
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "telegram_id": -1000000000000 - i,
+                "username": f"bench_{self.run_id}_{i}",
+                "title": f"bench group {i}",
+                "group_type": "supergroup",
+            }
+            for i in range(n)
+        ]
+        self.db.bulk_insert_mappings(TelegramGroup, rows)
+        self.db.commit()
+
+        ids = [row["id"] for row in rows]
+        self.group_ids.extend(ids)
+        return ids
+
+    def link_groups(self, campaign_ids, group_ids):
+        from app.models.models import CampaignGroup
+
+        self.db.bulk_insert_mappings(CampaignGroup, [
+            {"campaign_id": c, "group_id": g}
+            for c in campaign_ids
+            for g in group_ids
+        ])
+        self.db.commit()
+
+    def account(self, customer_id):
+        from app.models.models import TelegramAccount
+
+        account = TelegramAccount(
+            phone_number=f"+bench{self.run_id}{len(self.account_ids)}",
+            session_name=f"bench_{self.run_id}_{len(self.account_ids)}",
+            api_id=0,
+            api_hash="bench",
+            account_type="dedicated",
+            owner_customer_id=customer_id,
+            status="active",
+        )
+        self.db.add(account)
+        self.db.commit()
+
+        self.account_ids.append(account.id)
+        return account
+
+    def cleanup(self):
+        from app.models.models import (
+            Customer,
+            MessageLog,
+            TelegramAccount,
+            TelegramGroup,
+        )
+
+        self.db.rollback()
+        self.db.query(MessageLog).filter(
+            MessageLog.target.like(f"bench-{self.run_id}%")
+        ).delete(synchronize_session=False)
+        for model, ids in (
+            (TelegramAccount, self.account_ids),
+            (TelegramGroup, self.group_ids),
+            (Customer, self.customer_ids),
+        ):
+            if ids:
+                self.db.query(model).filter(model.id.in_(ids)).delete(
+                    synchronize_session=False
+                )
+        self.db.commit()
+
+
+# --------------------------------------------------
+# Benchmarks
+# --------------------------------------------------
+
+def bench_schedule_pass(db, fixtures: Fixtures, scales: List[int]) -> Dict:
+    from app.core.redis import redis_client
+    from app.models.models import Campaign
+    from app.services.campaigns.fair_queue import WeightedFairQueue
+    from app.services.campaigns.scheduler import schedule_pass
+
+    results = {}
+    customers = fixtures.customers(1000)
+    created: List[uuid.UUID] = []
+
+    for scale in sorted(scales):
+        created += fixtures.campaigns(customers, scale - len(created))
+
+        samples = []
+        for _ in range(3):
+            db.query(Campaign).filter(Campaign.id.in_(created)).update(
+                {Campaign.next_run_at: datetime.now(timezone.utc) - timedelta(seconds=1)},
+                synchronize_session=False,
+            )
+            db.commit()
+            redis_client.delete("scheduler:in_flight")
+            for pattern in ("campaign:lock:*", "customer:*:in_flight"):
+                for key in redis_client.scan_iter(match=pattern, count=1000):
+                    redis_client.delete(key)
+
+            queue = WeightedFairQueue()
+            started = time.perf_counter()
+            schedule_pass(db, queue)
+            samples.append(time.perf_counter() - started)
+            queue.clear()
+
+        results[str(scale)] = {
+            "best_ms": round(min(samples) * 1000, 2),
+            "median_ms": round(statistics.median(samples) * 1000, 2),
+        }
+
+    return results
+
+
+def bench_next_target(db, fixtures: Fixtures, n: int) -> Dict:
+    from app.services.campaigns.executor import get_next_campaign_target
+
+    customer_id = fixtures.customers(1)[0]
+    campaigns = fixtures.campaigns([customer_id], 20)
+    fixtures.link_groups(campaigns, fixtures.groups(50))
+    account = fixtures.account(customer_id)
+
+    return percentiles(time_calls(lambda: get_next_campaign_target(db, account), n))
+
+
+def bench_limiters(n: int) -> Dict:
+    from app.services.rate_limit.account_limiter import (
+        can_send_message,
+        record_message_sent,
+    )
+    from app.services.rate_limit.account_pacing import reserve_send_slot
+    from app.services.rate_limit.campaign_limiter import (
+        campaign_interval_passed,
+        record_campaign_send,
+    )
+    from app.services.telegram.account_lane import lane_depth
+    from app.workers.telegram_worker import health_monitor
+
+    account_id = f"bench-{uuid.uuid4().hex}"
+    campaign_id = f"bench-{uuid.uuid4().hex}"
+    fleet = [f"bench-{uuid.uuid4().hex}" for _ in range(100)]
+
+    return {
+        "can_send_message": ops_per_sec(
+            lambda: can_send_message(account_id=account_id, daily_limit=40), n
+        ),
+        "record_message_sent": ops_per_sec(
+            lambda: record_message_sent(account_id=account_id), n
+        ),
+        "reserve_send_slot": ops_per_sec(
+            lambda: reserve_send_slot(account_id, min_gap=0, max_gap=0), n
+        ),
+        "campaign_interval_passed": ops_per_sec(
+            lambda: campaign_interval_passed(
+                campaign_id=campaign_id, interval_minutes=30
+            ),
+            n,
+        ),
+        "record_campaign_send": ops_per_sec(
+            lambda: record_campaign_send(campaign_id), n
+        ),
+        "health_is_available": ops_per_sec(
+            lambda: health_monitor.is_available(account_id), n
+        ),
+        "health_bulk_check_100": ops_per_sec(
+            lambda: health_monitor.bulk_check(fleet), max(n // 100, 1)
+        ),
+        "lane_depth": ops_per_sec(lambda: lane_depth(account_id), n),
+    }
+
+
+def bench_message_log_inserts(fixtures: Fixtures, n: int) -> Dict:
+    from app.workers.tasks import persist_message_log
+
+    def payload(i: int) -> Dict:
+        return {
+            "target": f"bench-{fixtures.run_id}-{i}",
+            "message_text": "benchmark",
+            "status": "sent",
+            "sent_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    counter = iter(range(n))
+    return {
+        "rows_per_sec": ops_per_sec(lambda: persist_message_log(payload(next(counter))), n),
+    }
+
+
+def bench_api(db, fixtures: Fixtures, n: int) -> Dict:
+    from fastapi.testclient import TestClient
+
+    from app.api.admin.router import ADMIN_API_KEY
+    from app.api.customer.router import customer_auth
+    from app.main import app
+    from app.models.models import Customer, MessageLog
+
+    customer_id = fixtures.customers(1)[0]
+    campaign_id = fixtures.campaigns([customer_id], 1)[0]
+    db.bulk_insert_mappings(MessageLog, [
+        {
+            "id": uuid.uuid4(),
+            "campaign_id": campaign_id,
+            "target": f"bench-{fixtures.run_id}-api-{i}",
+            "status": "sent",
+            "sent_at": datetime.now(timezone.utc) - timedelta(minutes=i),
+        }
+        for i in range(1000)
+    ])
+    db.commit()
+
+    customer = db.get(Customer, customer_id)
+    app.dependency_overrides[customer_auth] = lambda: customer
+    client = TestClient(app)
+
+    try:
+        return {
+            "customer_logs": percentiles(time_calls(
+                lambda: client.get(
+                    "/customer/logs/", params={"campaign_id": str(campaign_id)}
+                ),
+                n,
+            )),
+            "admin_accounts": percentiles(time_calls(
+                lambda: client.get(
+                    "/admin/accounts/", headers={"x-api-key": ADMIN_API_KEY}
+                ),
+                n,
+            )),
+        }
+    finally:
+        app.dependency_overrides.pop(customer_auth, None)
+
+
+# --------------------------------------------------
+# Comparison
+# --------------------------------------------------
+
+# Metrics where a larger number is better
+_HIGHER_IS_BETTER = ("per_sec",)
+
+
+def _flatten(results: Dict, prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name))
+        elif isinstance(value, (int, float)) and key != "n":
+            flat[name] = value
+    return flat
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> bool:
+    before = _flatten(baseline["results"])
+    after = _flatten(current["results"])
+    regressed = False
+
+    for name in sorted(before.keys() & after.keys()):
+        if not before[name]:
+            continue
+
+        change = (after[name] - before[name]) / before[name] * 100
+        higher_better = name.startswith("limiters") or name.endswith(_HIGHER_IS_BETTER)
+        worse = -change if higher_better else change
+        flag = "REGRESSION" if worse > threshold else ""
+        regressed = regressed or bool(flag)
+
+        print(f"{name:<48} {before[name]:>12} -> {after[name]:>12} {change:+7.1f}% {flag}")
+
+    return regressed
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", default="1000,10000,100000")
+    parser.add_argument("--samples", type=int, default=500)
+    parser.add_argument("--only", help="comma-separated benchmark names")
+    parser.add_argument("--redis-url", help="dedicated Redis instead of fakeredis")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--compare", help="earlier results JSON")
+    parser.add_argument("--threshold", type=float, default=10.0)
+    args = parser.parse_args()
+
+    if args.redis_url:
+        app_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        if args.redis_url.rstrip("/") == app_url.rstrip("/"):
+            parser.error("--redis-url must not be the application's REDIS_URL")
+        os.environ["REDIS_URL"] = args.redis_url
+    else:
+        _use_fakeredis()
+
+    from app.core.db import SessionLocal
+
+    scales = [int(s) for s in args.scales.split(",")]
+    selected = set(args.only.split(",")) if args.only else None
+
+    db = SessionLocal()
+    fixtures = Fixtures(db, uuid.uuid4().hex[:8])
+
+    benchmarks = {
+        "schedule_pass": lambda: bench_schedule_pass(db, fixtures, scales),
+        "next_campaign_target": lambda: bench_next_target(db, fixtures, args.samples),
+        "limiters": lambda: bench_limiters(args.samples * 10),
+        "message_log_inserts": lambda: bench_message_log_inserts(fixtures, args.samples),
+        "api": lambda: bench_api(db, fixtures, args.samples),
+    }
+
+    results = {}
+    try:
+        for name, run in benchmarks.items():
+            if selected and name not in selected:
+                continue
+            print(f"Running {name}...", file=sys.stderr)
+            results[name] = run()
+    finally:
+        fixtures.cleanup()
+        db.close()
+
+    report = {
+        "meta": {
+            "revision": _git_revision(),
+            "at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "fakeredis": not args.redis_url,
+        },
+        "results": results,
+    }
+
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            if compare(json.load(f), report, args.threshold):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Import-time budget for the API and worker entry points.
+
+    python -m app.scripts.import_budget
+    python -m app.scripts.import_budget --api-budget-ms 900 --top 15
+
+Each entry point is imported in a fresh interpreter under
+``python -X importtime``; nothing is connected, so Redis and Postgres
+need not be running. Prints the slowest modules by cumulative time and
+exits non-zero when an entry point exceeds its budget.
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+
+ENTRY_POINTS = {
+    "api": "app.main",
+    "worker": "app.workers.tasks",
+}
+
+DEFAULT_BUDGETS_MS = {
+    "api": 1500,
+    "worker": 1500,
+}
+
+
+def measure(module: str) -> List[Tuple[str, float, float]]:
+    """
+    Returns (module, self_ms, cumulative_ms) for every import.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if result.returncode != 0:
+        raise RuntimeError(
+            f"import {module} failed:\n"
+            + result.stderr.strip().splitlines()[-1]
+        )
+
+    rows = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((
+            name.strip(),
+            int(self_us) / 1000,
+            int(cumulative_us) / 1000,
+        ))
+    return rows
+
+
+def report(name: str, module: str, budget_ms: float, top: int) -> bool:
+    rows = measure(module)
+    total_ms = next(
+        (cumulative for mod, _, cumulative in rows if mod == module),
+        sum(self_ms for _, self_ms, _ in rows),
+    )
+
+    ok = total_ms <= budget_ms
+    print(
+        f"{name:<8} {module:<24} {total_ms:8.1f} ms  "
+        f"budget {budget_ms:.0f} ms  {'ok' if ok else 'OVER'}"
+    )
+    for mod, self_ms, cumulative_ms in sorted(
+        rows, key=lambda row: row[2], reverse=True
+    )[:top]:
+        print(f"    {cumulative_ms:8.1f} ms  (self {self_ms:6.1f})  {mod}")
+    print()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    for name in ENTRY_POINTS:
+        parser.add_argument(
+            f"--{name}-budget-ms",
+            type=float,
+            default=DEFAULT_BUDGETS_MS[name],
+        )
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    budgets: Dict[str, float] = {
+        name: getattr(args, f"{name}_budget_ms") for name in ENTRY_POINTS
+    }
+
+    ok = True
+    for name, module in ENTRY_POINTS.items():
+        ok = report(name, module, budgets[name], args.top) and ok
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Redis memory per account, old key-per-counter layout vs. per-account
+hashes and sorted sets.
+
+    python -m app.scripts.keyspace_memory --accounts 2000 --groups 200
+
+Writes the per-account limiter and health state of synthetic accounts
+in both layouts, one after the other, and reports the used_memory delta
+of each. Run it against an otherwise idle Redis (REDIS_URL); the keys
+it writes are removed afterwards.
+"""
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+
+def _used_memory(client) -> int:
+    return int(client.info("memory")["used_memory"])
+
+
+def write_legacy(pipe, account_id: str, groups: List[str], now: float):
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    iso = datetime.utcnow().isoformat()
+
+    pipe.set(f"acct:{account_id}:sent:{today}", 17, ex=86400)
+    pipe.set(f"acct:{account_id}:count:{today}", 17, ex=86400)
+    pipe.set(f"acct:{account_id}:next_send_at", now + 60, ex=3600)
+    pipe.set(f"acct:{account_id}:flood", 1, ex=3600)
+    pipe.set(f"acct:{account_id}:parked_until", iso, ex=60)
+    pipe.set(f"acct:{account_id}:paused_until", iso)
+    for group_id in groups:
+        pipe.set(f"acct:{account_id}:group:{group_id}:last_post", iso, ex=86400)
+
+
+def write_compact(pipe, account_id: str, groups: List[str], now: float):
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+    pipe.hset(f"acct:{account_id}:limits", mapping={
+        f"sent:{today}": 17,
+        "next_send_at": now + 60,
+    })
+    pipe.expire(f"acct:{account_id}:limits", 172800)
+    pipe.hset(f"acct:{account_id}:health", mapping={
+        "flood": 1,
+        "flood_until": now + 3600,
+        "parked_until": now + 60,
+        "paused_until": now,
+    })
+    pipe.expire(f"acct:{account_id}:health", 3660)
+    pipe.zadd(
+        f"acct:{account_id}:group_posts",
+        {group_id: now + 86400 for group_id in groups},
+    )
+    pipe.expire(f"acct:{account_id}:group_posts", 86460)
+
+
+def measure(client, write: Callable, accounts: int, groups: int) -> Dict:
+    prefix = f"memtest-{uuid.uuid4().hex[:8]}"
+    group_ids = [str(uuid.uuid4()) for _ in range(groups)]
+    now = time.time()
+
+    before = _used_memory(client)
+    pipe = client.pipeline(transaction=False)
+    for i in range(accounts):
+        write(pipe, f"{prefix}-{i}", group_ids, now)
+        if len(pipe) >= 10_000:
+            pipe.execute()
+    pipe.execute()
+    used = _used_memory(client) - before
+
+    keys = 0
+    for batch in _batches(client.scan_iter(match=f"acct:{prefix}-*", count=1000)):
+        keys += client.unlink(*batch)
+
+    return {
+        "keys": keys,
+        "bytes": used,
+        "keys_per_account": round(keys / accounts, 1),
+        "bytes_per_account": round(used / accounts),
+    }
+
+
+def _batches(iterable, size: int = 1000):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--accounts", type=int, default=2000)
+    parser.add_argument("--groups", type=int, default=200,
+                        help="Groups on cooldown per account")
+    args = parser.parse_args()
+
+    from app.core.redis import redis_client
+
+    legacy = measure(redis_client, write_legacy, args.accounts, args.groups)
+    compact = measure(redis_client, write_compact, args.accounts, args.groups)
+
+    print(json.dumps({
+        "accounts": args.accounts,
+        "groups_per_account": args.groups,
+        "legacy": legacy,
+        "compact": compact,
+        "saved": f"{1 - compact['bytes'] / max(legacy['bytes'], 1):.0%}",
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
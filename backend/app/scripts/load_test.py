@@ -0,0 +1,232 @@
+"""
+Load test for the customer and admin APIs.
+
+    uvicorn app.main:app --workers 4 &
+    python -m app.scripts.load_test --customer-keys-file customer_keys.txt --users 50
+
+Customer keys come from --customer-key (repeatable) and/or a file with
+one key per line, as written by app.scripts.seed_dataset.
+
+Each virtual user loops over SCENARIO, picking steps by weight, for
+`--duration` seconds. Reports throughput, error counts and latency
+percentiles per step, and writes them as JSON with --output.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+from app.api.admin.router import ADMIN_API_KEY
+
+
+# (name, weight): what a mixed customer/admin workload looks like
+SCENARIO = [
+    ("customer.list_campaigns", 30),
+    ("customer.logs", 25),
+    ("customer.create_campaign", 5),
+    ("customer.start_pause", 10),
+    ("customer.bad_auth", 2),
+    ("admin.list_accounts", 10),
+    ("admin.list_campaigns", 8),
+    ("admin.logs", 10),
+]
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, customer_key: str, rng: random.Random):
+        self.client = client
+        self.customer = {"x-api-key": customer_key}
+        self.admin = {"x-api-key": ADMIN_API_KEY}
+        self.rng = rng
+        self.campaign_ids: List[str] = []
+
+    async def step(self, name: str) -> httpx.Response:
+        if name == "customer.list_campaigns":
+            response = await self.client.get("/customer/campaigns/", headers=self.customer)
+            if response.status_code == 200 and not self.campaign_ids:
+                self.campaign_ids = [c["id"] for c in response.json()][:20]
+            return response
+
+        if name == "customer.logs":
+            if not self.campaign_ids:
+                return await self.step("customer.list_campaigns")
+            return await self.client.get(
+                "/customer/logs/",
+                params={"campaign_id": self.rng.choice(self.campaign_ids)},
+                headers=self.customer,
+            )
+
+        if name == "customer.create_campaign":
+            response = await self.client.post(
+                "/customer/campaigns/",
+                json={
+                    "name": f"load-{self.rng.getrandbits(32):x}",
+                    "campaign_type": "dedicated",
+                    "message": "Load test message",
+                    "interval_minutes": 60,
+                },
+                headers=self.customer,
+            )
+            if response.status_code == 200:
+                self.campaign_ids.append(response.json()["id"])
+            return response
+
+        if name == "customer.start_pause":
+            if not self.campaign_ids:
+                return await self.step("customer.list_campaigns")
+            action = self.rng.choice(["start", "pause"])
+            return await self.client.post(
+                f"/customer/campaigns/{self.rng.choice(self.campaign_ids)}/{action}",
+                headers=self.customer,
+            )
+
+        if name == "customer.bad_auth":
+            return await self.client.get(
+                "/customer/campaigns/", headers={"x-api-key": "invalid"}
+            )
+
+        if name == "admin.list_accounts":
+            return await self.client.get("/admin/accounts/", headers=self.admin)
+
+        if name == "admin.list_campaigns":
+            return await self.client.get("/admin/campaigns/", headers=self.admin)
+
+        if name == "admin.logs":
+            return await self.client.get(
+                "/admin/logs/", params={"limit": 100}, headers=self.admin
+            )
+
+        raise ValueError(f"Unknown step {name}")
+
+
+async def run_user(
+    user: VirtualUser,
+    deadline: float,
+    samples: Dict[str, List[float]],
+    errors: Dict[str, int],
+):
+    names = [name for name, _ in SCENARIO]
+    weights = [weight for _, weight in SCENARIO]
+
+    while time.monotonic() < deadline:
+        name = user.rng.choices(names, weights)[0]
+        started = time.perf_counter()
+        try:
+            response = await user.step(name)
+            # bad_auth is expected to be rejected
+            if response.status_code >= 500 or (
+                response.status_code >= 400 and name != "customer.bad_auth"
+            ):
+                errors[name] += 1
+        except httpx.HTTPError:
+            errors[name] += 1
+        samples[name].append(time.perf_counter() - started)
+
+
+def summarize(samples: List[float], duration: float) -> Dict:
+    ordered = sorted(samples)
+
+    def pct(p: float) -> Optional[float]:
+        if not ordered:
+            return None
+        return round(ordered[min(int(len(ordered) * p), len(ordered) - 1)] * 1000, 2)
+
+    return {
+        "requests": len(ordered),
+        "rps": round(len(ordered) / duration, 1),
+        "p50_ms": pct(0.50),
+        "p90_ms": pct(0.90),
+        "p99_ms": pct(0.99),
+        "max_ms": pct(1.0),
+    }
+
+
+async def main_async(args) -> Dict:
+    samples: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+
+    limits = httpx.Limits(max_connections=args.users)
+    async with httpx.AsyncClient(
+        base_url=args.base_url, limits=limits, timeout=30
+    ) as client:
+        started = time.monotonic()
+        deadline = started + args.duration
+
+        await asyncio.gather(*(
+            run_user(
+                VirtualUser(
+                    client,
+                    args.customer_keys[i % len(args.customer_keys)],
+                    random.Random(args.seed + i),
+                ),
+                deadline,
+                samples,
+                errors,
+            )
+            for i in range(args.users)
+        ))
+        elapsed = time.monotonic() - started
+
+    steps = {
+        name: {**summarize(samples[name], elapsed), "errors": errors[name]}
+        for name, _ in SCENARIO
+        if samples[name]
+    }
+    everything = [s for values in samples.values() for s in values]
+
+    return {
+        "users": args.users,
+        "duration_seconds": round(elapsed, 1),
+        "total": {**summarize(everything, elapsed), "errors": sum(errors.values())},
+        "steps": steps,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument(
+        "--customer-key",
+        action="append",
+        default=[],
+        help="customer API key; repeat to spread load over customers",
+    )
+    parser.add_argument(
+        "--customer-keys-file",
+        help="file with one customer API key per line (seed_dataset output)",
+    )
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--duration", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    args.customer_keys = list(args.customer_key)
+    if args.customer_keys_file:
+        with open(args.customer_keys_file) as f:
+            args.customer_keys.extend(line.strip() for line in f if line.strip())
+    if not args.customer_keys:
+        parser.error("give --customer-key or --customer-keys-file")
+
+    report = asyncio.run(main_async(args))
+
+    print(f"{'step':<28} {'req':>7} {'rps':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'err':>5}")
+    for name, stats in {**report["steps"], "TOTAL": report["total"]}.items():
+        print(
+            f"{name:<28} {stats['requests']:>7} {stats['rps']:>8} "
+            f"{stats['p50_ms']:>8} {stats['p90_ms']:>8} {stats['p99_ms']:>8} "
+            f"{stats['errors']:>5}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
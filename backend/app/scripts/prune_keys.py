@@ -0,0 +1,201 @@
+"""
+Prunes the per-account Redis keyspace.
+
+    python -m app.scripts.prune_keys
+    python -m app.scripts.prune_keys --every 3600
+
+Drops sent:{date} fields older than yesterday from acct:{id}:limits,
+expired members from acct:{id}:group_posts, and gives campaign
+last_sent markers without a TTL a default one.
+
+Keys from the old one-key-per-counter layout are folded into the
+hashes where they still matter (today's count, pacing, group cooldowns,
+pauses and bans) and deleted.
+"""
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict
+
+from loguru import logger
+
+from app.core.redis import redis_client
+from app.services.rate_limit.account_limiter import (
+    LIMITS_TTL_SECONDS,
+    daily_field,
+    limits_key,
+)
+from app.services.rate_limit.campaign_limiter import DEFAULT_LAST_SENT_TTL_SECONDS
+from app.services.rate_limit.group_cooldown import group_posts_key
+
+
+SCAN_COUNT = 1000
+
+
+def _scan(pattern: str):
+    for key in redis_client.scan_iter(match=pattern, count=SCAN_COUNT):
+        yield key.decode()
+
+
+def _account_id(key: str) -> str:
+    return key.split(":")[1]
+
+
+# --------------------------------------------------
+# Current layout
+# --------------------------------------------------
+
+def prune_limits() -> int:
+    keep = {
+        daily_field(),
+        daily_field(datetime.now(timezone.utc).date() - timedelta(days=1)),
+    }
+    removed = 0
+
+    for key in _scan("acct:*:limits"):
+        stale = [
+            field
+            for field in redis_client.hkeys(key)
+            if field.startswith(b"sent:") and field.decode() not in keep
+        ]
+        if stale:
+            removed += redis_client.hdel(key, *stale)
+
+    return removed
+
+
+def prune_group_posts() -> int:
+    now = time.time()
+    removed = 0
+
+    for key in _scan("acct:*:group_posts"):
+        removed += redis_client.zremrangebyscore(key, "-inf", now)
+
+    return removed
+
+
+def expire_campaign_markers() -> int:
+    fixed = 0
+
+    for key in _scan("campaign:*:last_sent"):
+        if redis_client.ttl(key) == -1:
+            redis_client.expire(key, DEFAULT_LAST_SENT_TTL_SECONDS)
+            fixed += 1
+
+    return fixed
+
+
+# --------------------------------------------------
+# Old layout
+# --------------------------------------------------
+
+def _fold_sent(pipe, key: str):
+    # Only today's count still limits anything
+    field = "sent:" + key.rsplit(":", 1)[1]
+    value = redis_client.get(key) if field == daily_field() else None
+    if value is not None:
+        account_id = _account_id(key)
+        pipe.hsetnx(limits_key(account_id), field, int(value))
+        pipe.expire(limits_key(account_id), LIMITS_TTL_SECONDS)
+
+
+def _fold_next_send(pipe, key: str):
+    value = redis_client.get(key)
+    if value is not None:
+        account_id = _account_id(key)
+        pipe.hsetnx(limits_key(account_id), "next_send_at", value)
+        pipe.expire(limits_key(account_id), LIMITS_TTL_SECONDS)
+
+
+def _fold_group_post(pipe, key: str):
+    # acct:{id}:group:{gid}:last_post, expiring when the cooldown ends
+    ttl = redis_client.ttl(key)
+    if ttl > 0:
+        account_id, group_id = key.split(":")[1], key.split(":")[3]
+        # No TTL here: the set disappears once prune_group_posts empties it
+        pipe.zadd(group_posts_key(account_id), {group_id: time.time() + ttl})
+
+
+def _fold_paused(pipe, key: str):
+    value = redis_client.get(key)
+    if value is None:
+        return
+    until = datetime.fromisoformat(value.decode()).replace(tzinfo=timezone.utc)
+    if until.timestamp() > time.time():
+        health = f"acct:{_account_id(key)}:health"
+        pipe.hset(health, "paused_until", until.timestamp())
+        pipe.expireat(health, int(until.timestamp()) + 60)
+
+
+def _fold_banned(pipe, key: str):
+    health = f"acct:{_account_id(key)}:health"
+    pipe.hset(health, "banned", "1")
+    pipe.persist(health)
+
+
+LEGACY: Dict[str, Callable] = {
+    "acct:*:sent:*": _fold_sent,
+    "acct:*:next_send_at": _fold_next_send,
+    "acct:*:group:*:last_post": _fold_group_post,
+    "acct:*:paused_until": _fold_paused,
+    "acct:*:banned": _fold_banned,
+    # Short-lived or unused: dropped
+    "acct:*:count:*": None,
+    "acct:*:flood": None,
+    "acct:*:parked_until": None,
+}
+
+
+def migrate_legacy() -> int:
+    deleted = 0
+
+    for pattern, fold in LEGACY.items():
+        pipe = redis_client.pipeline(transaction=False)
+
+        for key in _scan(pattern):
+            if fold is not None:
+                fold(pipe, key)
+            pipe.delete(key)
+            deleted += 1
+
+            if len(pipe) >= SCAN_COUNT:
+                pipe.execute()
+
+        pipe.execute()
+
+    return deleted
+
+
+def prune() -> Dict[str, int]:
+    started = time.perf_counter()
+    stats = {
+        "legacy_keys": migrate_legacy(),
+        "sent_fields": prune_limits(),
+        "group_posts": prune_group_posts(),
+        "campaign_markers": expire_campaign_markers(),
+    }
+    logger.info(
+        "Keyspace pruned in {:.1f}s: {}", time.perf_counter() - started, stats
+    )
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--every",
+        type=int,
+        default=0,
+        help="Repeat every N seconds instead of running once",
+    )
+    args = parser.parse_args()
+
+    while True:
+        prune()
+        if not args.every:
+            break
+        time.sleep(args.every)
+
+
+if __name__ == "__main__":
+    main()
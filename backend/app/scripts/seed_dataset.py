@@ -0,0 +1,286 @@
+"""
+Generates a synthetic dataset for sizing and load tests.
+
+    python -m app.scripts.seed_dataset --customers 2000 --groups 20000 --days 90
+
+Customers are spread across every plan in PLANS, each with the plan's
+number of accounts (in every account status), campaigns linked to
+groups, market lists and `--days` of message_logs. Rows are streamed to
+Postgres with COPY in chunks, so millions of log rows take minutes.
+
+Every customer gets an API key; the keys are written one per line to
+`--keys-file` for app.scripts.load_test.
+"""
+import argparse
+import csv
+import io
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Iterator, List, Sequence
+
+from sqlalchemy import inspect
+
+from app.core.db import engine
+from app.core.security import generate_api_key
+from app.services.pricing.plans import PLANS
+
+
+ACCOUNT_STATUSES = ["active"] * 6 + ["warming", "paused", "restricted", "banned"]
+CAMPAIGN_STATUSES = ["active"] * 6 + ["draft", "paused", "completed"]
+GROUP_TYPES = ["group", "supergroup", "channel"]
+LOG_STATUSES = ["sent"] * 17 + ["failed", "failed", "skipped"]
+LOG_ERRORS = ["FLOOD_WAIT", "WRITE_FORBIDDEN", "UNKNOWN_ERROR"]
+
+CHUNK_ROWS = 50_000
+
+
+def copy_rows(cursor, table: str, columns: Sequence[str], rows: Iterable[Sequence]) -> int:
+    """
+    Streams rows into ``table`` with COPY, CHUNK_ROWS at a time.
+    """
+    statement = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    total = 0
+
+    def flush(buffer: io.StringIO):
+        buffer.seek(0)
+        cursor.copy_expert(statement, buffer)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    pending = 0
+
+    for row in rows:
+        writer.writerow(["" if v is None else v for v in row])
+        pending += 1
+        if pending == CHUNK_ROWS:
+            flush(buffer)
+            total += pending
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            pending = 0
+
+    if pending:
+        flush(buffer)
+        total += pending
+
+    return total
+
+
+class Dataset:
+    def __init__(self, args, rng: random.Random):
+        self.args = args
+        self.rng = rng
+        self.now = datetime.now(timezone.utc)
+        self.run_id = uuid.uuid4().hex[:6]
+
+        self.customers: List[tuple] = []   # (id, tier)
+        self.api_keys: List[str] = []
+        self.accounts: List[tuple] = []    # (id, customer_id)
+        self.groups: List[uuid.UUID] = []
+        self.campaigns: List[tuple] = []   # (id, customer_id)
+        self.campaign_groups: List[tuple] = []
+
+    def customer_rows(self) -> Iterator[tuple]:
+        tiers = list(PLANS)
+        for i in range(self.args.customers):
+            customer_id = uuid.uuid4()
+            tier = tiers[i % len(tiers)]
+            api_key = generate_api_key()
+            self.customers.append((customer_id, tier))
+            self.api_keys.append(api_key)
+            yield (
+                customer_id,
+                f"Customer {self.run_id}-{i}",
+                f"customer-{self.run_id}-{i}@example.com",
+                tier,
+                api_key,
+                True,
+                self.now - timedelta(days=self.rng.randint(1, 365)),
+            )
+
+    def account_rows(self) -> Iterator[tuple]:
+        n = 0
+        for customer_id, tier in self.customers:
+            for _ in range(PLANS[tier].accounts):
+                account_id = uuid.uuid4()
+                self.accounts.append((account_id, customer_id))
+                n += 1
+                yield (
+                    account_id,
+                    f"+999{self.run_id}{n:07d}",
+                    f"seed_{self.run_id}_{n}",
+                    0,
+                    "seed",
+                    "dedicated",
+                    customer_id,
+                    self.rng.choice(ACCOUNT_STATUSES),
+                    PLANS[tier].daily_messages_per_account,
+                    self.now - timedelta(days=self.rng.randint(1, 180)),
+                )
+
+    def group_rows(self) -> Iterator[tuple]:
+        for i in range(self.args.groups):
+            group_id = uuid.uuid4()
+            self.groups.append(group_id)
+            yield (
+                group_id,
+                -1001000000000 - i,
+                f"seed_{self.run_id}_group_{i}",
+                f"Group {i}",
+                self.rng.choice(GROUP_TYPES),
+                self.rng.random() > 0.1,
+                1440,
+                True,
+            )
+
+    def campaign_rows(self) -> Iterator[tuple]:
+        for customer_id, tier in self.customers:
+            for i in range(self.args.campaigns_per_customer):
+                campaign_id = uuid.uuid4()
+                self.campaigns.append((campaign_id, customer_id))
+                yield (
+                    campaign_id,
+                    customer_id,
+                    f"Campaign {i}",
+                    "dedicated",
+                    "Seeded campaign message",
+                    PLANS[tier].min_interval_minutes,
+                    self.rng.choice(CAMPAIGN_STATUSES),
+                    self.now + timedelta(seconds=self.rng.randint(0, 3600)),
+                    self.now - timedelta(days=self.args.days),
+                )
+
+    def campaign_group_rows(self) -> Iterator[tuple]:
+        for campaign_id, _ in self.campaigns:
+            for group_id in self.rng.sample(self.groups, self.args.groups_per_campaign):
+                self.campaign_groups.append((campaign_id, group_id))
+                yield (campaign_id, group_id)
+
+    def market_list_rows(self, links: List[uuid.UUID]) -> Iterator[tuple]:
+        for customer_id, _ in self.customers:
+            list_id = uuid.uuid4()
+            links.append(list_id)
+            yield (list_id, customer_id, "Seeded market list", self.now)
+
+    def message_log_rows(self) -> Iterator[tuple]:
+        accounts_by_customer = {}
+        for account_id, customer_id in self.accounts:
+            accounts_by_customer.setdefault(customer_id, []).append(account_id)
+
+        groups_by_campaign = {}
+        for campaign_id, group_id in self.campaign_groups:
+            groups_by_campaign.setdefault(campaign_id, []).append(group_id)
+
+        start = self.now - timedelta(days=self.args.days)
+        span = self.args.days * 86400
+
+        for campaign_id, customer_id in self.campaigns:
+            accounts = accounts_by_customer[customer_id]
+            groups = groups_by_campaign.get(campaign_id)
+            if not groups:
+                continue
+
+            for _ in range(self.args.logs_per_campaign_day * self.args.days):
+                status = self.rng.choice(LOG_STATUSES)
+                error = self.rng.choice(LOG_ERRORS) if status == "failed" else None
+                group_id = self.rng.choice(groups)
+                yield (
+                    uuid.uuid4(),
+                    campaign_id,
+                    self.rng.choice(accounts),
+                    group_id,
+                    str(group_id),
+                    "Seeded campaign message",
+                    status,
+                    error,
+                    self.rng.randint(5, 600) if error == "FLOOD_WAIT" else None,
+                    start + timedelta(seconds=self.rng.uniform(0, span)),
+                )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--groups", type=int, default=10000)
+    parser.add_argument("--campaigns-per-customer", type=int, default=3)
+    parser.add_argument("--groups-per-campaign", type=int, default=25)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--logs-per-campaign-day", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--keys-file", default="customer_keys.txt")
+    args = parser.parse_args()
+
+    dataset = Dataset(args, random.Random(args.seed))
+    tables = set(inspect(engine).get_table_names())
+    market_lists: List[uuid.UUID] = []
+
+    steps: List[tuple] = [
+        ("customers",
+         ["id", "name", "email", "subscription_tier", "api_key", "is_active",
+          "created_at"],
+         dataset.customer_rows),
+        ("telegram_accounts",
+         ["id", "phone_number", "session_name", "api_id", "api_hash",
+          "account_type", "owner_customer_id", "status",
+          "daily_message_limit", "created_at"],
+         dataset.account_rows),
+        ("telegram_groups",
+         ["id", "telegram_id", "username", "title", "group_type",
+          "allow_ads", "cooldown_minutes", "is_active"],
+         dataset.group_rows),
+        ("campaigns",
+         ["id", "customer_id", "name", "campaign_type", "message_template",
+          "interval_minutes", "status", "next_run_at", "created_at"],
+         dataset.campaign_rows),
+        ("campaign_groups", ["campaign_id", "group_id"], dataset.campaign_group_rows),
+        ("market_lists",
+         ["id", "customer_id", "name", "created_at"],
+         lambda: dataset.market_list_rows(market_lists)),
+        ("message_logs",
+         ["id", "campaign_id", "account_id", "group_id", "target",
+          "message_text", "status", "error_code", "flood_wait_seconds", "sent_at"],
+         dataset.message_log_rows),
+    ]
+
+    # Association tables only exist in databases created by migrations
+    if "market_list_groups" in tables:
+        steps.append((
+            "market_list_groups",
+            ["market_list_id", "group_id"],
+            lambda: (
+                (list_id, group_id)
+                for list_id in market_lists
+                for group_id in dataset.rng.sample(dataset.groups, 50)
+            ),
+        ))
+
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        started = time.perf_counter()
+
+        for table, columns, rows in steps:
+            step_started = time.perf_counter()
+            count = copy_rows(cursor, table, columns, rows())
+            connection.commit()
+            print(
+                f"{table:<20} {count:>12,} rows "
+                f"in {time.perf_counter() - step_started:7.1f}s"
+            )
+
+        cursor.execute("ANALYZE")
+        connection.commit()
+        print(f"Done in {time.perf_counter() - started:.1f}s")
+
+        with open(args.keys_file, "w") as f:
+            f.writelines(f"{key}\n" for key in dataset.api_keys)
+        print(f"Customer API keys written to {args.keys_file}")
+
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
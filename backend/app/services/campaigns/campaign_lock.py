@@ -0,0 +1,44 @@
+import uuid
+from typing import Optional
+
+from app.core.redis import redis_client
+
+
+# Upper bound on how long a tick can keep its campaign lock; ticks hold
+# it until their last (possibly deferred) send has finished
+CAMPAIGN_LOCK_TTL_SECONDS = 60 * 60 * 6
+
+
+def _lock_key(campaign_id: str) -> str:
+    return f"campaign:lock:{campaign_id}"
+
+
+# KEYS: lock   ARGV: token
+_RELEASE = redis_client.register_script("""
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+""")
+
+
+def acquire_campaign_lock(campaign_id: str) -> Optional[str]:
+    """
+    Token of the lock, or None while another tick holds it.
+    """
+    token = uuid.uuid4().hex
+    if redis_client.set(
+        _lock_key(campaign_id),
+        token,
+        nx=True,
+        ex=CAMPAIGN_LOCK_TTL_SECONDS,
+    ):
+        return token
+    return None
+
+
+def release_campaign_lock(campaign_id: str, token: str) -> bool:
+    """
+    Releases the lock only if ``token`` still owns it.
+    """
+    return bool(_RELEASE(keys=[_lock_key(campaign_id)], args=[token]))
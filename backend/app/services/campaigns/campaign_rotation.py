@@ -0,0 +1,119 @@
+import time
+from typing import Callable, Dict, Iterable, Iterator, List
+
+from app.core.redis import redis_client
+
+
+ROTATION_TTL_SECONDS = 60 * 60 * 24 * 30
+
+# Campaigns read from the head of the rotation per round trip
+ROTATION_PAGE_SIZE = 8
+
+
+# --------------------------------------------------
+# Redis key helpers
+# --------------------------------------------------
+
+def _rotation_key(customer_id: str) -> str:
+    return f"customer:{customer_id}:campaign_rotation"
+
+
+def _served_key(customer_id: str) -> str:
+    return f"customer:{customer_id}:campaign_served"
+
+
+# --------------------------------------------------
+# Least-recently-served rotation
+# --------------------------------------------------
+
+def join_rotation(customer_id: str, campaign_ids: Iterable[str]):
+    """
+    Puts activated campaigns at the front of the customer's rotation;
+    campaigns already in it keep their place.
+    """
+    campaign_ids = [str(cid) for cid in campaign_ids]
+    if not campaign_ids:
+        return
+
+    key = _rotation_key(str(customer_id))
+
+    pipe = redis_client.pipeline()
+    pipe.zadd(key, {cid: 0 for cid in campaign_ids}, nx=True)
+    pipe.expire(key, ROTATION_TTL_SECONDS)
+    pipe.execute()
+
+
+def leave_rotation(customer_id: str, campaign_ids: Iterable[str]):
+    campaign_ids = [str(cid) for cid in campaign_ids]
+    if not campaign_ids:
+        return
+
+    customer_id = str(customer_id)
+
+    pipe = redis_client.pipeline()
+    pipe.zrem(_rotation_key(customer_id), *campaign_ids)
+    pipe.hdel(_served_key(customer_id), *campaign_ids)
+    pipe.execute()
+
+
+def rotation_pages(
+    customer_id: str,
+    load_active: Callable[[], Iterable[str]],
+) -> Iterator[List[str]]:
+    """
+    Yields the customer's campaigns least-recently-served first, one
+    page of ROTATION_PAGE_SIZE at a time, so a pick near the head costs
+    one ZRANGE of a few members instead of the whole rotation.
+
+    A missing rotation (new customer, expired key) is rebuilt from
+    ``load_active()``. Callers drop campaigns that are no longer active
+    with leave_rotation() once they are done paging.
+    """
+    key = _rotation_key(str(customer_id))
+
+    if not redis_client.exists(key):
+        join_rotation(customer_id, load_active())
+
+    start = 0
+    while True:
+        page = redis_client.zrange(key, start, start + ROTATION_PAGE_SIZE - 1)
+        if not page:
+            return
+
+        yield [cid.decode() for cid in page]
+
+        if len(page) < ROTATION_PAGE_SIZE:
+            return
+        start += ROTATION_PAGE_SIZE
+
+
+def mark_served(customer_id: str, campaign_id: str):
+    """
+    Moves the campaign to the back of the customer's rotation.
+    """
+    customer_id = str(customer_id)
+    campaign_id = str(campaign_id)
+
+    pipe = redis_client.pipeline()
+    pipe.zadd(_rotation_key(customer_id), {campaign_id: time.time()})
+    pipe.hincrby(_served_key(customer_id), campaign_id, 1)
+    pipe.expire(_rotation_key(customer_id), ROTATION_TTL_SECONDS)
+    pipe.expire(_served_key(customer_id), ROTATION_TTL_SECONDS)
+    pipe.execute()
+
+
+def service_share(customer_id: str) -> Dict[str, Dict]:
+    """
+    Returns how often each campaign was served and its share of the total.
+    """
+    served = redis_client.hgetall(_served_key(str(customer_id)))
+    counts = {cid.decode(): int(count) for cid, count in served.items()}
+    total = sum(counts.values())
+
+    return {
+        cid: {
+            "served": count,
+            "share": round(count / total, 4) if total else 0.0,
+        }
+        for cid, count in counts.items()
+    }
@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 
 from app.models.models import Campaign, Customer, MarketList
+from app.services.campaigns.campaign_rotation import join_rotation
 from app.services.pricing.enforcement import validate_campaign_against_plan
 
 
@@ -28,6 +29,7 @@ def create_campaign(
     db.add(campaign)
     db.commit()
     db.refresh(campaign)
+    join_rotation(customer.id, [campaign.id])
 
     return campaign
 
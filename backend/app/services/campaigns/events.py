@@ -0,0 +1,24 @@
+import json
+
+from loguru import logger
+
+from app.core.redis import redis_client
+
+
+CAMPAIGN_EVENTS_CHANNEL = "campaign:events"
+
+
+def publish_campaign_event(campaign_id: str, event: str):
+    """
+    Tells schedulers to re-evaluate one campaign right away.
+
+    Delivery is best effort: the periodic scheduler pass still picks the
+    campaign up if the event is lost.
+    """
+    try:
+        redis_client.publish(
+            CAMPAIGN_EVENTS_CHANNEL,
+            json.dumps({"campaign_id": str(campaign_id), "event": event}),
+        )
+    except Exception:
+        logger.exception(f"Failed to publish {event} for campaign {campaign_id}")
@@ -1,4 +1,4 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
 
 from sqlalchemy.orm import Session
 from loguru import logger
@@ -9,7 +9,18 @@ from app.models.models import (
     TelegramGroup,
     TelegramAccount,
 )
+from app.core.metrics import LIMITER_DENIALS
 from app.core.redis import redis_client
+from app.services.campaigns.campaign_rotation import (
+    leave_rotation,
+    mark_served,
+    rotation_pages,
+)
+from app.services.rate_limit.group_cooldown import cooling_groups
+from app.services.telegram.health import AccountHealthMonitor
+
+
+health_monitor = AccountHealthMonitor(redis_client)
 
 
 # -------------------------
@@ -17,7 +28,7 @@ from app.core.redis import redis_client
 # -------------------------
 
 def campaign_is_due(campaign: Campaign) -> bool:
-    now = datetime.utcnow()
+    now = datetime.now(timezone.utc)
 
     if campaign.status != "active":
         return False
@@ -28,17 +39,12 @@ def campaign_is_due(campaign: Campaign) -> bool:
     if campaign.end_at and now > campaign.end_at:
         return False
 
-    if campaign.last_run_at:
-        delta = now - campaign.last_run_at
-        return delta.total_seconds() >= campaign.interval_minutes * 60
+    if campaign.next_run_at:
+        return now >= campaign.next_run_at
 
     return True
 
 
-def group_cooldown_key(account_id: str, group_id: str) -> str:
-    return f"acct:{account_id}:group:{group_id}:last_post"
-
-
 # -------------------------
 # Main selector
 # -------------------------
@@ -52,65 +58,96 @@ def get_next_campaign_target(
     or None if nothing is safe to send.
     """
 
-    # 1️⃣ Load campaigns for this customer
-    campaigns = (
-        db.query(Campaign)
-        .filter(
-            Campaign.customer_id == account.owner_customer_id,
-            Campaign.status == "active",
-        )
-        .order_by(Campaign.created_at.asc())
-        .all()
-    )
-
-    if not campaigns:
+    # 0️⃣ Parked (FloodWait), paused or banned accounts get nothing
+    if not health_monitor.is_available(str(account.id)):
+        LIMITER_DENIALS.labels("account_unavailable").inc()
         return None
 
-    now = datetime.utcnow()
-
-    # 2️⃣ Iterate campaigns fairly
-    for campaign in campaigns:
-        if not campaign_is_due(campaign):
-            continue
+    customer_id = str(account.owner_customer_id)
 
-        # 3️⃣ Load campaign groups
-        groups = (
-            db.query(TelegramGroup)
-            .join(
-                CampaignGroup,
-                CampaignGroup.group_id == TelegramGroup.id,
+    def active_campaign_ids():
+        return [
+            campaign_id
+            for campaign_id, in db.query(Campaign.id).filter(
+                Campaign.customer_id == account.owner_customer_id,
+                Campaign.status == "active",
             )
-            .filter(
-                CampaignGroup.campaign_id == campaign.id,
-            )
-            .all()
-        )
-
-        if not groups:
-            continue
-
-        # 4️⃣ Find first group not on cooldown
-        for group in groups:
-            cooldown_key = group_cooldown_key(
-                str(account.id),
-                str(group.id),
-            )
-
-            if redis_client.exists(cooldown_key):
-                continue
-
-            # ✅ Eligible target found
-            logger.debug(
-                f"Selected campaign={campaign.id} "
-                f"group={group.telegram_id} "
-                f"account={account.phone_number}"
-            )
-
-            return {
-                "campaign": campaign,
-                "group": group,
-                "message": campaign.message,  # or template
+        ]
+
+    # Fetched once, on the first campaign that reaches the group check
+    cooling = None
+    # Paused, finished or deleted campaigns met at the head
+    stale = []
+
+    try:
+        # 1️⃣ Walk campaigns least-recently-served first, a page at a time
+        for page in rotation_pages(customer_id, active_campaign_ids):
+            campaigns = {
+                str(campaign.id): campaign
+                for campaign in (
+                    db.query(Campaign)
+                    .filter(
+                        Campaign.id.in_(page),
+                        Campaign.customer_id == account.owner_customer_id,
+                    )
+                    .all()
+                )
             }
 
+            for campaign_id in page:
+                campaign = campaigns.get(campaign_id)
+
+                if campaign is None or campaign.status != "active":
+                    stale.append(campaign_id)
+                    continue
+
+                if not campaign_is_due(campaign):
+                    continue
+
+                # 2️⃣ Load campaign groups
+                groups = (
+                    db.query(TelegramGroup)
+                    .join(
+                        CampaignGroup,
+                        CampaignGroup.group_id == TelegramGroup.id,
+                    )
+                    .filter(
+                        CampaignGroup.campaign_id == campaign.id,
+                    )
+                    .all()
+                )
+
+                if not groups:
+                    continue
+
+                # 3️⃣ Find first group not on cooldown
+                if cooling is None:
+                    cooling = cooling_groups(str(account.id))
+
+                for group in groups:
+                    if str(group.id) in cooling:
+                        LIMITER_DENIALS.labels("group_cooldown").inc()
+                        continue
+
+                    # ✅ Eligible target found
+                    mark_served(customer_id, campaign_id)
+
+                    logger.debug(
+                        "Selected campaign={} group={} account={}",
+                        campaign.id,
+                        group.telegram_id,
+                        account.phone_number,
+                    )
+
+                    return {
+                        "campaign": campaign,
+                        "group": group,
+                        "message": campaign.message,  # or template
+                    }
+
+    finally:
+        # Only after paging, so the offsets above stay valid
+        leave_rotation(customer_id, stale)
+
     # ❌ Nothing eligible
     return None
@@ -0,0 +1,171 @@
+import heapq
+import itertools
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Hashable, Optional, Tuple
+
+from app.core.redis import redis_client
+
+
+# Safety net in case a tick dies without releasing its slot
+IN_FLIGHT_TTL_SECONDS = 60 * 60
+
+
+class WeightedFairQueue:
+    """
+    Weighted fair queue over per-customer FIFO queues.
+
+    Each customer is served in proportion to its weight (start-time fair
+    queueing). Virtual finish tags survive ``clear()``, so a customer that
+    was served heavily in one scheduler pass keeps its place in the next.
+    """
+
+    def __init__(self):
+        self._queues: Dict[Hashable, Deque[Tuple[Any, float, float]]] = {}
+        self._finish: Dict[Hashable, float] = {}
+        self._served: Dict[Hashable, float] = {}
+        self._virtual_time = 0.0
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    def push(self, key: Hashable, item: Any, weight: float):
+        start = max(self._virtual_time, self._finish.get(key, 0.0))
+        finish = start + 1.0 / weight
+        self._finish[key] = finish
+        self._queues.setdefault(key, deque()).append((item, start, finish))
+
+    def pop(
+        self,
+        eligible: Callable[[Hashable], bool] = lambda key: True,
+    ) -> Optional[Tuple[Hashable, Any]]:
+        """
+        Returns the next (key, item) from an eligible key, or None.
+        """
+        heap = [
+            (queue[0][2], next(self._seq), key)
+            for key, queue in self._queues.items()
+        ]
+        heapq.heapify(heap)
+
+        while heap:
+            _, _, key = heapq.heappop(heap)
+            if not eligible(key):
+                continue
+
+            item, start, finish = self._queues[key].popleft()
+            if not self._queues[key]:
+                del self._queues[key]
+
+            self._virtual_time = max(self._virtual_time, start)
+            self._served[key] = finish
+            return key, item
+
+        return None
+
+    def clear(self):
+        """
+        Drops queued items but keeps fairness history.
+        """
+        self._queues.clear()
+        self._served = {
+            key: tag
+            for key, tag in self._served.items()
+            if tag > self._virtual_time
+        }
+        self._finish = dict(self._served)
+
+
+# --------------------------------------------------
+# Per-customer in-flight caps (REDIS)
+# --------------------------------------------------
+
+GLOBAL_IN_FLIGHT_KEY = "scheduler:in_flight"
+
+
+def _in_flight_key(customer_id: str) -> str:
+    return f"customer:{customer_id}:in_flight"
+
+
+def _acquire(key: str, cap: int) -> bool:
+    pipe = redis_client.pipeline()
+    pipe.incr(key, 1)
+    pipe.expire(key, IN_FLIGHT_TTL_SECONDS)
+    count, _ = pipe.execute()
+
+    if count > cap:
+        redis_client.decr(key, 1)
+        return False
+
+    return True
+
+
+def _release(key: str):
+    if redis_client.decr(key, 1) <= 0:
+        redis_client.delete(key)
+
+
+def in_flight(customer_id: str) -> int:
+    value = redis_client.get(_in_flight_key(customer_id))
+    return int(value) if value else 0
+
+
+def global_in_flight() -> int:
+    value = redis_client.get(GLOBAL_IN_FLIGHT_KEY)
+    return int(value) if value else 0
+
+
+def acquire_in_flight(customer_id: str, cap: int, global_cap: int) -> bool:
+    """
+    Takes a tick slot for the customer and one of the cluster-wide slots.
+    """
+    if not _acquire(GLOBAL_IN_FLIGHT_KEY, global_cap):
+        return False
+
+    if not _acquire(_in_flight_key(customer_id), cap):
+        _release(GLOBAL_IN_FLIGHT_KEY)
+        return False
+
+    return True
+
+
+def release_in_flight(customer_id: str):
+    _release(_in_flight_key(customer_id))
+    _release(GLOBAL_IN_FLIGHT_KEY)
+
+
+# --------------------------------------------------
+# Queueing delay per plan tier (REDIS)
+# --------------------------------------------------
+
+def _queue_delay_key(tier: str) -> str:
+    return f"scheduler:queue_delay:{tier}"
+
+
+def record_queue_delay(tier: str, seconds: float):
+    key = _queue_delay_key(tier)
+    seconds = max(seconds, 0.0)
+
+    pipe = redis_client.pipeline()
+    pipe.hincrby(key, "count", 1)
+    pipe.hincrbyfloat(key, "total_seconds", seconds)
+    pipe.hset(key, "last_seconds", round(seconds, 3))
+    pipe.execute()
+
+
+def queue_delay_stats(tiers) -> Dict[str, Dict]:
+    pipe = redis_client.pipeline()
+    for tier in tiers:
+        pipe.hgetall(_queue_delay_key(tier))
+
+    stats = {}
+    for tier, raw in zip(tiers, pipe.execute()):
+        count = int(raw.get(b"count", 0))
+        total = float(raw.get(b"total_seconds", 0))
+        stats[tier] = {
+            "dispatched": count,
+            "avg_delay_seconds": round(total / count, 3) if count else None,
+            "last_delay_seconds": float(raw[b"last_seconds"]) if b"last_seconds" in raw else None,
+        }
+
+    return stats
@@ -0,0 +1,150 @@
+import random
+import time
+from typing import Callable, Dict, Iterable, List
+
+from loguru import logger
+
+from app.core.redis import redis_client
+
+
+# Rotation state is refreshed on every tick; abandoned campaigns age out.
+ROTATION_TTL_SECONDS = 60 * 60 * 24 * 30
+
+
+# --------------------------------------------------
+# Redis key helpers
+# --------------------------------------------------
+
+def _cycle_key(campaign_id: str) -> str:
+    return f"campaign:{campaign_id}:groups:cycle"
+
+
+def _stats_key(campaign_id: str) -> str:
+    return f"campaign:{campaign_id}:groups:stats"
+
+
+# --------------------------------------------------
+# Cycle management
+# --------------------------------------------------
+
+def _start_cycle(
+    campaign_id: str,
+    group_ids: List[str],
+    *,
+    defer: Iterable[str] = (),
+):
+    """
+    Persists a fresh shuffle of the campaign's groups as the new cycle.
+
+    Groups in ``defer`` were just handed out at the end of the previous
+    cycle, so they go to the back of the new one.
+    """
+    deferred = set(defer)
+    head = [gid for gid in group_ids if gid not in deferred]
+    tail = [gid for gid in group_ids if gid in deferred]
+    random.shuffle(head)
+    random.shuffle(tail)
+
+    stats = redis_client.hgetall(_stats_key(campaign_id))
+    now = time.time()
+
+    mapping = {
+        "cycle": int(stats.get(b"cycle", 0)) + 1,
+        "cycle_size": len(group_ids),
+        "cycle_started_at": now,
+        "handed_out": 0,
+    }
+    started_at = stats.get(b"cycle_started_at")
+    if started_at:
+        mapping["last_cycle_seconds"] = round(now - float(started_at), 3)
+
+    pipe = redis_client.pipeline()
+    pipe.delete(_cycle_key(campaign_id))
+    if head or tail:
+        pipe.rpush(_cycle_key(campaign_id), *(head + tail))
+    pipe.hset(_stats_key(campaign_id), mapping=mapping)
+    pipe.expire(_cycle_key(campaign_id), ROTATION_TTL_SECONDS)
+    pipe.expire(_stats_key(campaign_id), ROTATION_TTL_SECONDS)
+    pipe.execute()
+
+    logger.debug(
+        f"Campaign {campaign_id} started coverage cycle "
+        f"{mapping['cycle']} ({len(group_ids)} groups)"
+    )
+
+
+def _pop(campaign_id: str, count: int) -> List[str]:
+    if count <= 0:
+        return []
+
+    pipe = redis_client.pipeline()
+    pipe.lpop(_cycle_key(campaign_id), count)
+    pipe.expire(_cycle_key(campaign_id), ROTATION_TTL_SECONDS)
+    popped, _ = pipe.execute()
+
+    return [gid.decode() for gid in popped or []]
+
+
+# --------------------------------------------------
+# Public API
+# --------------------------------------------------
+
+def next_groups(
+    campaign_id: str,
+    count: int,
+    load_group_ids: Callable[[], List[str]],
+) -> List[str]:
+    """
+    Hands out the next ``count`` group ids for a campaign.
+
+    Every group is visited once per cycle. ``load_group_ids`` is only
+    called when a new cycle has to be started, so a regular tick costs
+    O(count) instead of loading and shuffling every group. Groups
+    attached during a cycle join the next one; detached ones are
+    dropped by the caller when they come up.
+    """
+    campaign_id = str(campaign_id)
+
+    selected = _pop(campaign_id, count)
+
+    if len(selected) < count:
+        group_ids = [str(gid) for gid in load_group_ids()]
+        if not group_ids:
+            return selected
+
+        _start_cycle(campaign_id, group_ids, defer=selected)
+
+        # Never hand out the same group twice in one call
+        missing = min(count, len(group_ids)) - len(selected)
+        selected += _pop(campaign_id, missing)
+
+    if selected:
+        redis_client.hincrby(_stats_key(campaign_id), "handed_out", len(selected))
+
+    return selected
+
+
+def coverage_stats(campaign_id: str) -> Dict:
+    """
+    Returns coverage progress for the campaign's current cycle.
+    """
+    campaign_id = str(campaign_id)
+
+    pipe = redis_client.pipeline()
+    pipe.hgetall(_stats_key(campaign_id))
+    pipe.llen(_cycle_key(campaign_id))
+    stats, remaining = pipe.execute()
+
+    stats = {k.decode(): v.decode() for k, v in stats.items()}
+    started_at = float(stats["cycle_started_at"]) if stats.get("cycle_started_at") else None
+    last_cycle = stats.get("last_cycle_seconds")
+
+    return {
+        "campaign_id": campaign_id,
+        "cycle": int(stats.get("cycle", 0)),
+        "cycle_size": int(stats.get("cycle_size", 0)),
+        "remaining": remaining,
+        "handed_out": int(stats.get("handed_out", 0)),
+        "cycle_age_seconds": round(time.time() - started_at, 3) if started_at else None,
+        "last_cycle_seconds": float(last_cycle) if last_cycle else None,
+    }
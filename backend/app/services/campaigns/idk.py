@@ -6,7 +6,7 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from loguru import logger
 
-from app.workers.telegram_worker import run_send_job
+from app.workers.tasks import dispatch_send, send_job
 
 
 class CampaignScheduler:
@@ -83,8 +83,7 @@ class CampaignScheduler:
                 f"Dispatching job | acct={job['account_id']} | tgt={job['target']}"
             )
 
-            # In production this would be Celery.delay(...)
-            run_send_job(job)
+            dispatch_send(send_job, [job], {}, str(job["account_id"]))
 
     # ------------------------------------------------------------------
     # Job builder
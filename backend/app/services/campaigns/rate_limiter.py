@@ -4,6 +4,17 @@ from typing import Optional
 import redis
 from loguru import logger
 
+from app.services.rate_limit.account_limiter import (
+    LIMITS_TTL_SECONDS,
+    USAGE_DIRTY_KEY,
+    daily_field,
+    limits_key,
+)
+from app.services.rate_limit.group_cooldown import (
+    group_cooldown_remaining,
+    mark_group_posted,
+)
+
 
 class RateLimitResult:
     def __init__(
@@ -39,24 +50,12 @@ class RateLimiter:
         self.account_daily_limit = account_daily_limit
         self.group_cooldown_minutes = group_cooldown_minutes
 
-    # --------------------------------------------------
-    # Redis key helpers
-    # --------------------------------------------------
-
-    def _account_day_key(self, account_id: str) -> str:
-        date = datetime.utcnow().strftime("%Y-%m-%d")
-        return f"acct:{account_id}:count:{date}"
-
-    def _group_last_post_key(self, account_id: str, group_id: str) -> str:
-        return f"acct:{account_id}:group:{group_id}:last_post"
-
     # --------------------------------------------------
     # Account-level daily limit
     # --------------------------------------------------
 
     def check_account_limit(self, account_id: str) -> RateLimitResult:
-        key = self._account_day_key(account_id)
-        count = self.redis.get(key)
+        count = self.redis.hget(limits_key(account_id), daily_field())
 
         if count is not None and int(count) >= self.account_daily_limit:
             logger.warning(
@@ -72,13 +71,14 @@ class RateLimiter:
 
     def increment_account(self, account_id: str):
         """
-        Increments daily counter and ensures it expires at midnight UTC.
+        Increments today's counter; a new UTC day starts a new field.
         """
-        key = self._account_day_key(account_id)
+        key = limits_key(account_id)
 
         pipe = self.redis.pipeline()
-        pipe.incr(key, 1)
-        pipe.expireat(key, self._midnight_timestamp())
+        pipe.hincrby(key, daily_field(), 1)
+        pipe.expire(key, LIMITS_TTL_SECONDS)
+        pipe.sadd(USAGE_DIRTY_KEY, account_id)
         pipe.execute()
 
     # --------------------------------------------------
@@ -90,43 +90,32 @@ class RateLimiter:
         account_id: str,
         group_id: str,
     ) -> RateLimitResult:
-        key = self._group_last_post_key(account_id, group_id)
-        last_post = self.redis.get(key)
+        retry_after = group_cooldown_remaining(
+            account_id, group_id, client=self.redis
+        )
 
-        if last_post:
-            last_post_time = datetime.fromisoformat(
-                last_post.decode()
+        if retry_after > 0:
+            logger.warning(
+                f"Group cooldown active "
+                f"[group={group_id}] [account={account_id}]"
             )
-            next_allowed = last_post_time + timedelta(
-                minutes=self.group_cooldown_minutes
+            return RateLimitResult(
+                allowed=False,
+                reason="GROUP_COOLDOWN",
+                retry_after=retry_after,
             )
 
-            if datetime.utcnow() < next_allowed:
-                retry_after = int(
-                    (next_allowed - datetime.utcnow()).total_seconds()
-                )
-                logger.warning(
-                    f"Group cooldown active "
-                    f"[group={group_id}] [account={account_id}]"
-                )
-                return RateLimitResult(
-                    allowed=False,
-                    reason="GROUP_COOLDOWN",
-                    retry_after=retry_after,
-                )
-
         return RateLimitResult(allowed=True)
 
     def mark_group_posted(self, account_id: str, group_id: str):
         """
         Marks a group as posted to and automatically clears after cooldown.
         """
-        key = self._group_last_post_key(account_id, group_id)
-
-        self.redis.set(
-            key,
-            datetime.utcnow().isoformat(),
-            ex=self.group_cooldown_minutes * 60,
+        mark_group_posted(
+            account_id,
+            group_id,
+            self.group_cooldown_minutes * 60,
+            client=self.redis,
         )
 
     # --------------------------------------------------
@@ -155,16 +144,6 @@ class RateLimiter:
     # Helpers
     # --------------------------------------------------
 
-    @staticmethod
-    def _midnight_timestamp() -> int:
-        tomorrow = datetime.utcnow().date() + timedelta(days=1)
-        return int(
-            datetime.combine(
-                tomorrow,
-                datetime.min.time(),
-            ).timestamp()
-        )
-
     @staticmethod
     def _seconds_until_midnight() -> int:
         midnight = datetime.combine(
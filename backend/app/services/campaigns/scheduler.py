@@ -1,12 +1,61 @@
 import asyncio
-from datetime import datetime, timezone
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 
+import redis.asyncio as aioredis
+from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
 from loguru import logger
 
 from app.core.db import SessionLocal
-from app.models.models import Campaign, MessageLog
-from app.core.redis import redis_client
+from app.core.logging import setup_logging
+from app.core.metrics import (
+    SCHEDULER_CAMPAIGNS_DUE,
+    SCHEDULER_CAMPAIGNS_ENQUEUED,
+    SCHEDULER_LAG_SECONDS,
+    SCHEDULER_PASS_SECONDS,
+    start_exporter,
+)
+from app.core.tracing import setup_tracing, span
+from app.models.models import Campaign, Customer
+from app.core.redis import REDIS_URL
+from app.services.campaigns.campaign_lock import acquire_campaign_lock
+from app.services.campaigns.events import CAMPAIGN_EVENTS_CHANNEL
+from app.services.campaigns.fair_queue import (
+    WeightedFairQueue,
+    acquire_in_flight,
+    global_in_flight,
+    in_flight,
+    record_queue_delay,
+    release_in_flight,
+)
+from app.services.campaigns.spreading import (
+    advance_next_run,
+    aligned_run_after,
+    run_period_seconds,
+)
+from app.services.pricing.plans import get_plan, start_plan_registry
+from app.services.rate_limit.campaign_limiter import last_campaign_send
+from app.workers.tasks import run_campaign_tick
+
+
+# Campaign ticks in flight at once, across all customers and workers
+SCHEDULER_MAX_IN_FLIGHT = int(os.getenv("SCHEDULER_MAX_IN_FLIGHT", "20"))
+
+# Safety-net full pass; campaign events and next_run_at wake it earlier
+SCHEDULER_POLL_SECONDS = int(os.getenv("SCHEDULER_POLL_SECONDS", "30"))
+
+SCHEDULER_METRICS_PORT = int(os.getenv("SCHEDULER_METRICS_PORT", "9101"))
+
+# First retry of due campaigns held back by in-flight caps or locks;
+# doubles on every blocked pass up to SCHEDULER_POLL_SECONDS
+SCHEDULER_BLOCKED_RETRY_SECONDS = float(
+    os.getenv("SCHEDULER_BLOCKED_RETRY_SECONDS", "1")
+)
+
+_blocked_retry = SCHEDULER_BLOCKED_RETRY_SECONDS
 
 
 # --------------------------------------------------
@@ -28,87 +77,316 @@ def campaign_is_due(campaign: Campaign) -> bool:
     return True
 
 
-def campaign_interval_passed(
-    db: Session,
-    campaign: Campaign,
-) -> bool:
+def campaign_period_seconds(campaign: Campaign, tier: str) -> int:
     """
-    Checks if enough time has passed since last message.
+    Run period of the campaign, never shorter than its plan allows.
     """
-    last_message = (
-        db.query(MessageLog)
-        .filter(MessageLog.campaign_id == campaign.id)
-        .order_by(MessageLog.sent_at.desc())
-        .first()
+    return run_period_seconds(
+        campaign.interval_minutes,
+        get_plan(tier).min_interval_minutes,
     )
 
-    if not last_message:
-        return True
-
-    delta = datetime.now(timezone.utc) - last_message.sent_at
-    return delta.total_seconds() >= campaign.interval_minutes * 60
-
 
 # --------------------------------------------------
-# Redis lock (prevents duplicates)
+# Scheduler loop
 # --------------------------------------------------
 
-def acquire_campaign_lock(campaign_id: str) -> bool:
-    key = f"campaign:lock:{campaign_id}"
-    return redis_client.set(key, "1", nx=True, ex=120)
+def dispatch_fair(queue: WeightedFairQueue, tiers: dict, db: Session) -> int:
+    """
+    Starts queued campaign ticks in weighted fair order.
 
+    Stops at the scheduler-wide in-flight limit; customers at their plan's
+    in-flight cap are skipped and keep their campaigns for the next pass.
 
-def release_campaign_lock(campaign_id: str):
-    redis_client.delete(f"campaign:lock:{campaign_id}")
+    Returns how many due campaigns were held back (caps or a held lock).
+    """
+    now = datetime.now(timezone.utc)
+    counts = {}
+    dispatched = []
+    locked = 0
+    available = SCHEDULER_MAX_IN_FLIGHT - global_in_flight()
+
+    def eligible(customer_id) -> bool:
+        if customer_id not in counts:
+            counts[customer_id] = in_flight(str(customer_id))
+        return counts[customer_id] < get_plan(tiers[customer_id]).max_in_flight
+
+    while available > 0:
+        entry = queue.pop(eligible)
+        if entry is None:
+            break
+
+        customer_id, (campaign, tier) = entry
+        campaign_id = campaign.id
+        plan = get_plan(tier)
+
+        if not acquire_in_flight(
+            str(customer_id),
+            plan.max_in_flight,
+            SCHEDULER_MAX_IN_FLIGHT,
+        ):
+            counts[customer_id] = plan.max_in_flight
+            continue
+
+        lock_token = acquire_campaign_lock(str(campaign_id))
+        if lock_token is None:
+            release_in_flight(str(customer_id))
+            locked += 1
+            continue
+
+        counts[customer_id] += 1
+        available -= 1
+        scheduled_for = campaign.next_run_at
+        lag = (now - scheduled_for).total_seconds()
+        record_queue_delay(tier, lag)
+        SCHEDULER_LAG_SECONDS.labels(tier).observe(max(lag, 0))
+        SCHEDULER_CAMPAIGNS_ENQUEUED.labels(tier).inc()
+
+        campaign.next_run_at = advance_next_run(
+            str(campaign_id),
+            campaign_period_seconds(campaign, tier),
+            scheduled=scheduled_for,
+            now=now,
+        )
+
+        logger.info(f"Enqueuing campaign {campaign_id} ({tier})")
+        dispatched.append((campaign_id, customer_id, scheduled_for, lock_token))
+
+    # Publish only once next_run_at is committed
+    db.commit()
+
+    for campaign_id, customer_id, scheduled_for, lock_token in dispatched:
+        with span(
+            "scheduler.enqueue",
+            campaign_id=campaign_id,
+            customer_id=customer_id,
+            scheduled_for=scheduled_for.isoformat(),
+        ):
+            run_campaign_tick.apply_async(
+                args=[str(campaign_id)],
+                kwargs={
+                    "customer_id": str(customer_id),
+                    "scheduled_for": scheduled_for.isoformat(),
+                    "lock_token": lock_token,
+                },
+            )
 
+    return len(queue) + locked
 
-# --------------------------------------------------
-# Scheduler loop
-# --------------------------------------------------
 
-async def scheduler_loop():
-    logger.info("Campaign scheduler started")
+def next_wakeup(db: Session, blocked: int) -> float:
+    """
+    Seconds until the scheduler should look again.
+
+    Only campaigns that can still run count: past their end_at they stay
+    overdue forever, and before start_at they are due at start_at, not at
+    next_run_at. Due campaigns held back by caps or locks are retried with
+    a backoff instead of on every loop turn.
+    """
+    global _blocked_retry
+
+    now = datetime.now(timezone.utc)
+    due_at = func.greatest(
+        func.coalesce(Campaign.next_run_at, Campaign.start_at),
+        func.coalesce(Campaign.start_at, Campaign.next_run_at),
+    )
+
+    next_due = (
+        db.query(func.min(due_at))
+        .filter(
+            Campaign.status == "active",
+            due_at > now,
+            or_(Campaign.end_at.is_(None), Campaign.end_at > due_at),
+        )
+        .scalar()
+    )
+
+    wait = SCHEDULER_POLL_SECONDS
+    if next_due is not None:
+        wait = min(max((next_due - now).total_seconds(), 0.5), wait)
+
+    if not blocked:
+        _blocked_retry = SCHEDULER_BLOCKED_RETRY_SECONDS
+        return wait
+
+    retry = _blocked_retry
+    _blocked_retry = min(_blocked_retry * 2, SCHEDULER_POLL_SECONDS)
+    return min(retry, wait)
+
+
+@SCHEDULER_PASS_SECONDS.time()
+def schedule_pass(
+    db: Session,
+    queue: WeightedFairQueue,
+    campaign_id: Optional[str] = None,
+) -> float:
+    """
+    Dispatches due campaigns, or only ``campaign_id`` when given.
+
+    Returns the seconds to wait before the next pass (next_wakeup).
+    """
+    now = datetime.now(timezone.utc)
+
+    query = (
+        db.query(Campaign, Customer.subscription_tier)
+        .join(Customer, Customer.id == Campaign.customer_id)
+        .filter(
+            Campaign.status == "active",
+            or_(
+                Campaign.next_run_at.is_(None),
+                Campaign.next_run_at <= now,
+            ),
+        )
+    )
+    if campaign_id is not None:
+        query = query.filter(Campaign.id == campaign_id)
 
+    tiers = {}
+
+    for campaign, tier in query.all():
+        if not campaign_is_due(campaign):
+            continue
+
+        # Never run yet: run now; advance_next_run then puts the
+        # following runs on the campaign's phase
+        if campaign.next_run_at is None:
+            campaign.next_run_at = now
+
+        SCHEDULER_CAMPAIGNS_DUE.inc()
+        tiers[campaign.customer_id] = tier
+        queue.push(
+            campaign.customer_id,
+            (campaign, tier),
+            get_plan(tier).scheduling_weight,
+        )
+
+    db.commit()
+    blocked = dispatch_fair(queue, tiers, db)
+
+    return next_wakeup(db, blocked)
+
+
+def reschedule_campaign(db: Session, campaign_id: str):
+    """
+    Moves a pending next_run_at onto the campaign's current period after
+    its interval changed: a full period after the last send, on the
+    period's phase, and never in the past.
+    """
+    row = (
+        db.query(Campaign, Customer.subscription_tier)
+        .join(Customer, Customer.id == Campaign.customer_id)
+        .filter(Campaign.id == campaign_id, Campaign.status == "active")
+        .first()
+    )
+    if row is None:
+        return
+
+    campaign, tier = row
+    now = datetime.now(timezone.utc)
+    if campaign.next_run_at is None or campaign.next_run_at <= now:
+        # Due anyway; dispatch advances it with the new period
+        return
+
+    period = campaign_period_seconds(campaign, tier)
+    after = now
+    last_sent = last_campaign_send(str(campaign_id))
+    if last_sent is not None:
+        after = max(after, last_sent + timedelta(seconds=period))
+
+    next_run_at = aligned_run_after(str(campaign_id), period, after)
+    if next_run_at != campaign.next_run_at:
+        logger.info(
+            "Campaign {} rescheduled from {} to {}",
+            campaign_id,
+            campaign.next_run_at,
+            next_run_at,
+        )
+        campaign.next_run_at = next_run_at
+        db.commit()
+
+
+async def listen_campaign_events(wakeups: asyncio.Queue):
+    """
+    Forwards (campaign id, event) pairs published by the API to the
+    scheduler loop.
+    """
     while True:
-        db = SessionLocal()
+        client = aioredis.Redis.from_url(REDIS_URL)
+        pubsub = client.pubsub()
 
         try:
-            campaigns = (
-                db.query(Campaign)
-                .filter(Campaign.status == "active")
-                .all()
-            )
+            await pubsub.subscribe(CAMPAIGN_EVENTS_CHANNEL)
+            logger.info("Listening for campaign events")
 
-            for campaign in campaigns:
-                if not campaign_is_due(campaign):
+            async for message in pubsub.listen():
+                if message["type"] != "message":
                     continue
 
-                if not campaign_interval_passed(db, campaign):
-                    continue
+                event = json.loads(message["data"])
+                await wakeups.put((event["campaign_id"], event.get("event")))
 
-                if not acquire_campaign_lock(str(campaign.id)):
-                    continue
-
-                logger.info(f"Enqueuing campaign {campaign.id}")
-                asyncio.create_task(run_campaign(campaign.id))
+        except asyncio.CancelledError:
+            raise
 
         except Exception:
-            logger.exception("Scheduler error")
+            logger.exception("Campaign event listener error")
+            await asyncio.sleep(1)
 
         finally:
-            db.close()
+            await pubsub.close()
+            await client.close()
 
-        await asyncio.sleep(30)
 
+async def scheduler_loop():
+    setup_logging("scheduler")
+    logger.info("Campaign scheduler started")
+    start_exporter(SCHEDULER_METRICS_PORT)
+    setup_tracing("scheduler")
+    start_plan_registry()
 
-# --------------------------------------------------
-# Worker delegation
-# --------------------------------------------------
+    queue = WeightedFairQueue()
+    wakeups: asyncio.Queue = asyncio.Queue()
+    listener = asyncio.create_task(listen_campaign_events(wakeups))
 
-async def run_campaign(campaign_id):
-    from app.workers.telegram_worker import run_campaign_once
+    campaign_id, event = None, None
+    loop = asyncio.get_running_loop()
+    last_full_pass = 0.0
 
     try:
-        await run_campaign_once(campaign_id)
+        while True:
+            wait = SCHEDULER_POLL_SECONDS
+            db = SessionLocal()
+
+            try:
+                # Interval changes move a pending next_run_at
+                if event == "updated":
+                    reschedule_campaign(db, campaign_id)
+
+                # Event storms must not starve the safety-net pass
+                if loop.time() - last_full_pass >= SCHEDULER_POLL_SECONDS:
+                    campaign_id = None
+
+                if campaign_id is None:
+                    last_full_pass = loop.time()
+
+                with span("scheduler.pass", campaign_id=campaign_id):
+                    wait = schedule_pass(db, queue, campaign_id)
+
+            except Exception:
+                logger.exception("Scheduler error")
+
+            finally:
+                queue.clear()
+                db.close()
+
+            try:
+                campaign_id, event = await asyncio.wait_for(wakeups.get(), wait)
+            except asyncio.TimeoutError:
+                campaign_id, event = None, None
+
     finally:
-        release_campaign_lock(str(campaign_id))
+        listener.cancel()
+
+
+if __name__ == "__main__":
+    asyncio.run(scheduler_loop())
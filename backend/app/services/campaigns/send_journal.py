@@ -0,0 +1,179 @@
+"""
+Idempotency journal for campaign sends.
+
+Each (campaign, group, schedule window) is reserved in Redis before the
+Telegram call and confirmed right after it, so a redelivered or retried
+send job for the same window is skipped instead of posting twice:
+
+    journal:{campaign}:{group}:{window}   pending | sent   (TTL)
+    journal:pending                       key -> reserved at (ZSET)
+
+A send that Telegram rejected releases its key; one that ended in an
+unknown state keeps it, trading a missed post for a duplicate.
+reconcile() settles pending keys left behind against message_logs.
+"""
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from app.core.metrics import SEND_JOURNAL_LOOKUPS
+from app.core.redis import redis_client
+
+
+JOURNAL_PENDING_KEY = "journal:pending"
+# Keys outlive their window by this much
+JOURNAL_TTL_MARGIN_SECONDS = 60 * 60
+# Pending keys younger than this may still belong to a running send
+JOURNAL_RECONCILE_AFTER_SECONDS = 10 * 60
+JOURNAL_RECONCILE_BATCH = 500
+
+# error_code of a send that may or may not have been posted; logged as
+# failed, but its key must keep blocking the window
+UNKNOWN_OUTCOME = "UNKNOWN_ERROR"
+
+
+def journal_key(campaign_id: str, group_id: str, window: int) -> str:
+    return f"journal:{campaign_id}:{group_id}:{window}"
+
+
+def schedule_window(timestamp: float, period_seconds: int) -> int:
+    return int(timestamp // max(period_seconds, 1))
+
+
+def reserve(key: str, period_seconds: int) -> bool:
+    """
+    True if this caller may send; False if the window was already sent
+    or is being sent.
+    """
+    now = time.time()
+
+    if redis_client.set(
+        key,
+        "pending",
+        nx=True,
+        ex=period_seconds + JOURNAL_TTL_MARGIN_SECONDS,
+    ):
+        redis_client.zadd(JOURNAL_PENDING_KEY, {key: now})
+        SEND_JOURNAL_LOOKUPS.labels("reserved").inc()
+        return True
+
+    state = redis_client.get(key)
+    SEND_JOURNAL_LOOKUPS.labels(
+        "duplicate" if state == b"sent" else "in_progress"
+    ).inc()
+    logger.debug("Send journal hit for {} ({})", key, state)
+    return False
+
+
+def confirm(key: str):
+    pipe = redis_client.pipeline()
+    pipe.set(key, "sent", xx=True, keepttl=True)
+    pipe.zrem(JOURNAL_PENDING_KEY, key)
+    pipe.execute()
+
+
+def release(key: str):
+    pipe = redis_client.pipeline()
+    pipe.delete(key)
+    pipe.zrem(JOURNAL_PENDING_KEY, key)
+    pipe.execute()
+
+
+# --------------------------------------------------
+# Reconciliation against message_logs
+# --------------------------------------------------
+
+def _parse(key: str) -> Optional[Tuple[str, str]]:
+    parts = key.split(":")
+    if len(parts) != 4:
+        return None
+    return parts[1], parts[2]
+
+
+def reconcile() -> Dict[str, int]:
+    """
+    Settles pending keys older than JOURNAL_RECONCILE_AFTER_SECONDS:
+    a sent log confirms, a failed log releases, no log or only a failed
+    log with an unknown outcome leaves the key to expire with its window.
+    """
+    from app.core.db import SessionLocal
+    from app.models.models import MessageLog
+
+    stale: List[Tuple[bytes, float]] = redis_client.zrangebyscore(
+        JOURNAL_PENDING_KEY,
+        "-inf",
+        time.time() - JOURNAL_RECONCILE_AFTER_SECONDS,
+        start=0,
+        num=JOURNAL_RECONCILE_BATCH,
+        withscores=True,
+    )
+    stats = {"confirmed": 0, "released": 0, "expired": 0, "unknown": 0}
+    if not stale:
+        return stats
+
+    entries = []
+    for raw_key, reserved_at in stale:
+        key = raw_key.decode()
+        parsed = _parse(key)
+        if parsed is None or not redis_client.exists(key):
+            redis_client.zrem(JOURNAL_PENDING_KEY, key)
+            stats["expired"] += 1
+            continue
+        entries.append((key, parsed, reserved_at))
+
+    if not entries:
+        return stats
+
+    db = SessionLocal()
+    try:
+        logs = (
+            db.query(
+                MessageLog.campaign_id,
+                MessageLog.group_id,
+                MessageLog.status,
+                MessageLog.error_code,
+                MessageLog.sent_at,
+            )
+            .filter(
+                MessageLog.campaign_id.in_({c for _, (c, _), _ in entries}),
+                MessageLog.group_id.in_({g for _, (_, g), _ in entries}),
+                MessageLog.sent_at >= datetime.fromtimestamp(
+                    min(reserved_at for _, _, reserved_at in entries),
+                    tz=timezone.utc,
+                ),
+            )
+            .all()
+        )
+    finally:
+        db.close()
+
+    outcomes: Dict[Tuple[str, str], List[Tuple[str, float]]] = {}
+    for log in logs:
+        status = log.status
+        if status == "failed" and log.error_code == UNKNOWN_OUTCOME:
+            # The post may be up; releasing would allow a duplicate
+            status = "unknown"
+        outcomes.setdefault(
+            (str(log.campaign_id), str(log.group_id)), []
+        ).append((status, log.sent_at.timestamp()))
+
+    for key, pair, reserved_at in entries:
+        statuses = {
+            status for status, sent_at in outcomes.get(pair, [])
+            if sent_at >= reserved_at
+        }
+        if "sent" in statuses:
+            confirm(key)
+            stats["confirmed"] += 1
+        elif "failed" in statuses:
+            release(key)
+            stats["released"] += 1
+        else:
+            # Crashed between send and log: unknown, keep blocking
+            redis_client.zrem(JOURNAL_PENDING_KEY, key)
+            stats["unknown"] += 1
+
+    logger.info("Send journal reconciled: {}", stats)
+    return stats
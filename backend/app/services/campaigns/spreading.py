@@ -0,0 +1,70 @@
+import hashlib
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+
+# --------------------------------------------------
+# Deterministic per-campaign phase
+# --------------------------------------------------
+
+def phase_offset(campaign_id: str, period_seconds: int) -> float:
+    """
+    Stable offset in [0, period) derived from the campaign id.
+
+    Campaigns sharing an interval land on different slots of the period
+    instead of all becoming due in the same scheduler pass.
+    """
+    digest = hashlib.blake2b(str(campaign_id).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2**64 * period_seconds
+
+
+def aligned_run_after(
+    campaign_id: str,
+    period_seconds: int,
+    after: datetime,
+) -> datetime:
+    """
+    First slot of the campaign's phase at or after ``after``.
+    """
+    phase = phase_offset(campaign_id, period_seconds)
+    # Tolerance keeps a slot that is exactly ``after`` from rounding up
+    cycles = math.ceil((after.timestamp() - phase) / period_seconds - 1e-9)
+    return datetime.fromtimestamp(phase + cycles * period_seconds, tz=timezone.utc)
+
+
+def advance_next_run(
+    campaign_id: str,
+    period_seconds: int,
+    *,
+    scheduled: Optional[datetime],
+    now: datetime,
+) -> datetime:
+    """
+    Next run for a campaign dispatched now for the ``scheduled`` slot.
+
+    Counted from the actual dispatch, not the slot: a tick that went out
+    late (backlog, in-flight caps) still gets a full period before the
+    next one, which then lands back on the campaign's phase.
+    """
+    dispatched = max(scheduled or now, now)
+
+    return aligned_run_after(
+        campaign_id,
+        period_seconds,
+        dispatched + timedelta(seconds=period_seconds),
+    )
+
+
+def resume_next_run(next_run_at: Optional[datetime], now: datetime) -> datetime:
+    """
+    Next run for a campaign being (re)started: now, unless its previous
+    run was recent enough that the interval has not passed yet.
+    """
+    if next_run_at is None or next_run_at < now:
+        return now
+    return next_run_at
+
+
+def run_period_seconds(interval_minutes: int, min_interval_minutes: int) -> int:
+    return max(interval_minutes, min_interval_minutes) * 60
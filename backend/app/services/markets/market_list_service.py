@@ -18,13 +18,21 @@ def create_market_list(
     return market_list
 
 
+def _contains(market_list: MarketList, group: TelegramGroup) -> bool:
+    return (
+        market_list.groups
+        .filter(TelegramGroup.id == group.id)
+        .first()
+    ) is not None
+
+
 def add_group_to_market_list(
     *,
     db: Session,
     market_list: MarketList,
     group: TelegramGroup,
 ):
-    if group not in market_list.groups:
+    if not _contains(market_list, group):
         market_list.groups.append(group)
         db.commit()
 
@@ -35,6 +43,6 @@ def remove_group_from_market_list(
     market_list: MarketList,
     group: TelegramGroup,
 ):
-    if group in market_list.groups:
+    if _contains(market_list, group):
         market_list.groups.remove(group)
         db.commit()
@@ -1,7 +1,22 @@
 # app/services/pricing/plans.py
 
+import os
+import threading
+import time
 from dataclasses import dataclass
-from typing import Dict
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional
+
+from loguru import logger
+
+from app.core.redis import redis_client
+
+
+# Bumped and announced whenever subscription_plans changes
+PLANS_VERSION_KEY = "plans:version"
+PLANS_CHANNEL = "plans:changed"
+# Version check when no announcement arrived (a lost message)
+PLAN_REFRESH_SECONDS = int(os.getenv("PLAN_REFRESH_SECONDS", "60"))
 
 
 @dataclass(frozen=True)
@@ -10,38 +25,170 @@ class PricingPlan:
     accounts: int
     min_interval_minutes: int
     daily_messages_per_account: int
+    # Scheduler share relative to other customers
+    scheduling_weight: int
+    # Campaign ticks allowed to run at once per customer
+    max_in_flight: int
 
 
+# Built-in plans; subscription_plans rows override them by name
 PLANS: Dict[str, PricingPlan] = {
     "solo": PricingPlan(
         name="solo",
         accounts=1,
         min_interval_minutes=30,
         daily_messages_per_account=40,
+        scheduling_weight=1,
+        max_in_flight=1,
     ),
     "starter": PricingPlan(
         name="starter",
         accounts=2,
         min_interval_minutes=15,
         daily_messages_per_account=80,
+        scheduling_weight=2,
+        max_in_flight=2,
     ),
     "growth": PricingPlan(
         name="growth",
         accounts=5,
         min_interval_minutes=10,
         daily_messages_per_account=150,
+        scheduling_weight=4,
+        max_in_flight=3,
     ),
     "pro": PricingPlan(
         name="pro",
         accounts=10,
         min_interval_minutes=5,
         daily_messages_per_account=300,
+        scheduling_weight=8,
+        max_in_flight=5,
     ),
 }
 
 
+# Swapped wholesale on refresh, so lookups need no lock
+_plans: Mapping[str, PricingPlan] = MappingProxyType(dict(PLANS))
+_version: Optional[bytes] = None
+_listener: Optional[threading.Thread] = None
+
+
 def get_plan(plan_name: str) -> PricingPlan:
     try:
-        return PLANS[plan_name]
+        return _plans[plan_name]
     except KeyError:
         raise ValueError(f"Unknown pricing plan: {plan_name}")
+
+
+def current_plans() -> Mapping[str, PricingPlan]:
+    return _plans
+
+
+# --------------------------------------------------
+# Registry (subscription_plans)
+# --------------------------------------------------
+
+def _from_row(row, default: PricingPlan) -> PricingPlan:
+    def pick(value, fallback):
+        return fallback if value is None else value
+
+    return PricingPlan(
+        name=row.name,
+        accounts=pick(row.max_accounts, default.accounts),
+        min_interval_minutes=(
+            default.min_interval_minutes if row.min_interval_seconds is None
+            else -(-row.min_interval_seconds // 60)
+        ),
+        daily_messages_per_account=pick(
+            row.daily_account_limit, default.daily_messages_per_account
+        ),
+        scheduling_weight=pick(row.scheduling_weight, default.scheduling_weight),
+        max_in_flight=pick(row.max_in_flight, default.max_in_flight),
+    )
+
+
+def load_plans() -> Mapping[str, PricingPlan]:
+    """
+    Rebuilds the snapshot from subscription_plans; missing columns fall
+    back to the built-in plan of the same name (or solo).
+    """
+    global _plans, _version
+
+    from app.core.db import SessionLocal
+    from app.models.models import SubscriptionPlan
+
+    # Read first: a bump during the load triggers another one
+    version = redis_client.get(PLANS_VERSION_KEY)
+
+    db = SessionLocal()
+    try:
+        rows = db.query(SubscriptionPlan).all()
+    finally:
+        db.close()
+
+    plans = dict(PLANS)
+    for row in rows:
+        if row.name:
+            plans[row.name] = _from_row(row, PLANS.get(row.name, PLANS["solo"]))
+
+    _plans = MappingProxyType(plans)
+    _version = version
+
+    logger.info(
+        "Loaded {} pricing plans ({} from subscription_plans)", len(plans), len(rows)
+    )
+    return _plans
+
+
+def publish_plans_changed():
+    """
+    Tells every process to reload its plans.
+    """
+    version = redis_client.incr(PLANS_VERSION_KEY)
+    redis_client.publish(PLANS_CHANNEL, version)
+
+
+def _listen():
+    while True:
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+
+        try:
+            pubsub.subscribe(PLANS_CHANNEL)
+
+            while True:
+                message = pubsub.get_message(timeout=PLAN_REFRESH_SECONDS)
+                if (
+                    message is not None
+                    or redis_client.get(PLANS_VERSION_KEY) != _version
+                ):
+                    load_plans()
+
+        except Exception:
+            logger.exception("Plan registry listener error")
+            time.sleep(1)
+
+        finally:
+            pubsub.close()
+
+
+def start_plan_registry():
+    """
+    Loads the plans and follows changes in a background thread. Until
+    then, or while the DB is unreachable, the built-in PLANS apply.
+    """
+    global _listener
+
+    try:
+        load_plans()
+    except Exception:
+        logger.exception("Could not load plans, using built-in defaults")
+
+    # Threads do not survive a fork; pool children start their own
+    if _listener is None or not _listener.is_alive():
+        _listener = threading.Thread(
+            target=_listen,
+            name="plan-registry",
+            daemon=True,
+        )
+        _listener.start()
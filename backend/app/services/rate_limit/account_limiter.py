@@ -1,10 +1,25 @@
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
+from typing import Optional
+
 from app.core.redis import redis_client
 
 
-def _daily_key(account_id: str) -> str:
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    return f"acct:{account_id}:sent:{today}"
+# Daily counters and pacing share one hash per account. The hash lives
+# two days so yesterday's count can still be synced; older sent:{date}
+# fields are removed by app.scripts.prune_keys
+LIMITS_TTL_SECONDS = 60 * 60 * 48
+
+# Accounts whose counters changed since app.workers.usage_sync last ran
+USAGE_DIRTY_KEY = "usage:dirty"
+
+
+def limits_key(account_id: str) -> str:
+    return f"acct:{account_id}:limits"
+
+
+def daily_field(day: Optional[date] = None) -> str:
+    day = day or datetime.now(timezone.utc).date()
+    return f"sent:{day.isoformat()}"
 
 
 def can_send_message(
@@ -12,8 +27,7 @@ def can_send_message(
     account_id: str,
     daily_limit: int,
 ) -> bool:
-    key = _daily_key(account_id)
-    sent = redis_client.get(key)
+    sent = redis_client.hget(limits_key(account_id), daily_field())
     return sent is None or int(sent) < daily_limit
 
 
@@ -21,9 +35,10 @@ def record_message_sent(
     *,
     account_id: str,
 ):
-    key = _daily_key(account_id)
+    key = limits_key(account_id)
 
     pipe = redis_client.pipeline()
-    pipe.incr(key, 1)
-    pipe.expire(key, 60 * 60 * 24)
+    pipe.hincrby(key, daily_field(), 1)
+    pipe.expire(key, LIMITS_TTL_SECONDS)
+    pipe.sadd(USAGE_DIRTY_KEY, account_id)
     pipe.execute()
@@ -0,0 +1,66 @@
+import random
+import time
+from typing import Optional
+
+from app.core.redis import redis_client
+from app.services.rate_limit.account_limiter import LIMITS_TTL_SECONDS, limits_key
+
+
+# KEYS: limits   ARGV: now, gap_seconds, ttl
+_RESERVE = redis_client.register_script("""
+local next_at = tonumber(redis.call('hget', KEYS[1], 'next_send_at') or '0')
+local slot = math.max(tonumber(ARGV[1]), next_at)
+local following = slot + tonumber(ARGV[2])
+redis.call('hset', KEYS[1], 'next_send_at', tostring(following))
+redis.call('expire', KEYS[1], ARGV[3])
+return tostring(slot)
+""")
+
+
+def next_send_at(account_id: str) -> Optional[float]:
+    """
+    Epoch seconds at which the account may send next, or None if now.
+    """
+    value = redis_client.hget(limits_key(account_id), "next_send_at")
+    if value is None or float(value) <= time.time():
+        return None
+    return float(value)
+
+
+def reserve_send_slot(
+    account_id: str,
+    *,
+    min_gap: int,
+    max_gap: int,
+) -> float:
+    """
+    Reserves the account's next send slot and returns it (epoch seconds).
+
+    The slot is now or the account's next eligible time, whichever is
+    later; the following slot is pushed out by a random gap.
+    """
+    slot = _RESERVE(
+        keys=[limits_key(account_id)],
+        args=[time.time(), random.randint(min_gap, max_gap), LIMITS_TTL_SECONDS],
+    )
+    return float(slot)
+
+
+def paced_wait(account_id: str, min_gap: int) -> float:
+    """
+    Seconds until ``min_gap`` has passed since the account's last actual
+    send. Planned slots are only Celery etas; this is checked at send time.
+    """
+    last = redis_client.hget(limits_key(account_id), "last_sent_at")
+    if last is None:
+        return 0.0
+    return max(float(last) + min_gap - time.time(), 0.0)
+
+
+def record_send_time(account_id: str):
+    key = limits_key(account_id)
+
+    pipe = redis_client.pipeline()
+    pipe.hset(key, "last_sent_at", time.time())
+    pipe.expire(key, LIMITS_TTL_SECONDS)
+    pipe.execute()
@@ -1,7 +1,13 @@
 from datetime import datetime, timezone
+from typing import Optional
+
 from app.core.redis import redis_client
 
 
+# Without a known interval the marker still expires eventually
+DEFAULT_LAST_SENT_TTL_SECONDS = 60 * 60 * 24 * 7
+
+
 def _campaign_key(campaign_id: str) -> str:
     return f"campaign:{campaign_id}:last_sent"
 
@@ -15,13 +21,23 @@ def campaign_interval_passed(
     if not last:
         return True
 
-    last_dt = datetime.fromisoformat(last)
+    last_dt = datetime.fromisoformat(last.decode())
     delta = datetime.now(timezone.utc) - last_dt
     return delta.total_seconds() >= interval_minutes * 60
 
 
-def record_campaign_send(campaign_id: str):
+def record_campaign_send(campaign_id: str, interval_minutes: Optional[int] = None):
+    # Once the interval has passed the marker has no effect, so it can go
     redis_client.set(
         _campaign_key(campaign_id),
         datetime.now(timezone.utc).isoformat(),
+        ex=(
+            interval_minutes * 60 if interval_minutes
+            else DEFAULT_LAST_SENT_TTL_SECONDS
+        ),
     )
+
+
+def last_campaign_send(campaign_id: str) -> Optional[datetime]:
+    last = redis_client.get(_campaign_key(campaign_id))
+    return datetime.fromisoformat(last.decode()) if last else None
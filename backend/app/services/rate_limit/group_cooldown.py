@@ -0,0 +1,48 @@
+import time
+from typing import Set
+
+from app.core.redis import redis_client
+
+
+# One sorted set per account: member = group id, score = epoch at which
+# the cooldown ends. Expired members are trimmed on write and by
+# app.scripts.prune_keys
+
+def group_posts_key(account_id: str) -> str:
+    return f"acct:{account_id}:group_posts"
+
+
+def cooling_groups(account_id: str, client=redis_client) -> Set[str]:
+    """
+    Ids of the groups this account may not post to yet.
+    """
+    return {
+        member.decode()
+        for member in client.zrangebyscore(
+            group_posts_key(account_id), time.time(), "+inf"
+        )
+    }
+
+
+def group_cooldown_remaining(account_id: str, group_id: str, client=redis_client) -> int:
+    until = client.zscore(group_posts_key(account_id), group_id)
+    if until is None:
+        return 0
+    return max(int(until - time.time()), 0)
+
+
+def mark_group_posted(
+    account_id: str,
+    group_id: str,
+    cooldown_seconds: int,
+    client=redis_client,
+):
+    key = group_posts_key(account_id)
+    now = time.time()
+
+    pipe = client.pipeline()
+    pipe.zremrangebyscore(key, "-inf", now)
+    pipe.zadd(key, {group_id: now + cooldown_seconds})
+    # The newest post has the latest expiry, so the set goes with it
+    pipe.expire(key, cooldown_seconds + 60)
+    pipe.execute()
@@ -0,0 +1,224 @@
+import asyncio
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Dict
+
+from loguru import logger
+
+from app.core.redis import redis_client
+from app.core.tracing import span
+
+
+# Holder lease; renewed while the lane is held, expires if the worker dies
+LANE_LEASE_MS = 60 * 1000
+# Waiters that stop polling for this long are dropped from the queue
+LANE_WAITER_TTL_MS = 15 * 1000
+LANE_STATS_KEY = "lanes:stats"
+LANE_KEY_TTL_SECONDS = 60 * 60 * 24
+
+
+class AccountLaneTimeout(Exception):
+    pass
+
+
+# --------------------------------------------------
+# Lua scripts (atomic lane transitions)
+# --------------------------------------------------
+
+# KEYS: queue, holder, alive   ARGV: token, lease_ms, now_ms
+_TRY_ACQUIRE = redis_client.register_script("""
+if redis.call('exists', KEYS[2]) == 1 then
+    return 0
+end
+while true do
+    local head = redis.call('zrange', KEYS[1], 0, 0)[1]
+    if not head then
+        return -1
+    end
+    if head == ARGV[1] then
+        redis.call('zrem', KEYS[1], head)
+        redis.call('zrem', KEYS[3], head)
+        redis.call('set', KEYS[2], ARGV[1], 'PX', ARGV[2])
+        return 1
+    end
+    local alive = redis.call('zscore', KEYS[3], head)
+    if alive and tonumber(alive) > tonumber(ARGV[3]) then
+        return 0
+    end
+    redis.call('zrem', KEYS[1], head)
+    redis.call('zrem', KEYS[3], head)
+end
+""")
+
+# KEYS: holder   ARGV: token, lease_ms
+_RENEW = redis_client.register_script("""
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+""")
+
+# KEYS: holder   ARGV: token
+_RELEASE = redis_client.register_script("""
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+""")
+
+
+# --------------------------------------------------
+# Redis key helpers
+# --------------------------------------------------
+
+def _queue_key(account_id: str) -> str:
+    return f"acct:{account_id}:lane:queue"
+
+
+def _holder_key(account_id: str) -> str:
+    return f"acct:{account_id}:lane:holder"
+
+
+def _alive_key(account_id: str) -> str:
+    return f"acct:{account_id}:lane:alive"
+
+
+def _seq_key(account_id: str) -> str:
+    return f"acct:{account_id}:lane:seq"
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+# --------------------------------------------------
+# Lane
+# --------------------------------------------------
+
+def _enqueue(account_id: str, token: str):
+    ticket = redis_client.incr(_seq_key(account_id))
+
+    pipe = redis_client.pipeline()
+    pipe.zadd(_queue_key(account_id), {token: ticket})
+    pipe.zadd(_alive_key(account_id), {token: _now_ms() + LANE_WAITER_TTL_MS})
+    for key in (_queue_key(account_id), _alive_key(account_id), _seq_key(account_id)):
+        pipe.expire(key, LANE_KEY_TTL_SECONDS)
+    pipe.execute()
+
+
+def _leave(account_id: str, token: str):
+    pipe = redis_client.pipeline()
+    pipe.zrem(_queue_key(account_id), token)
+    pipe.zrem(_alive_key(account_id), token)
+    pipe.execute()
+
+
+async def _keep_lease(account_id: str, token: str):
+    while True:
+        await asyncio.sleep(LANE_LEASE_MS / 3000)
+        renewed = await asyncio.to_thread(
+            _RENEW, keys=[_holder_key(account_id)], args=[token, LANE_LEASE_MS]
+        )
+        if not renewed:
+            logger.error(f"Account [{account_id}] lost its lane lease")
+            return
+
+
+@asynccontextmanager
+async def account_lane(account_id: str, *, timeout: float = 600):
+    """
+    Serializes all work for one Telegram account across every worker.
+
+    Callers queue in FIFO order; the holder's lease is renewed while the
+    block runs and expires on its own if the worker dies. Redis calls run
+    in the loop's executor, so waiting lanes never block the loop.
+    """
+    account_id = str(account_id)
+    token = uuid.uuid4().hex
+    keys = [_queue_key(account_id), _holder_key(account_id), _alive_key(account_id)]
+
+    enqueued_at = time.monotonic()
+    deadline = enqueued_at + timeout
+    delay = 0.05
+
+    with span("account_lane.wait", account_id=account_id):
+        await asyncio.to_thread(_enqueue, account_id, token)
+
+        try:
+            while True:
+                acquired = await asyncio.to_thread(
+                    _TRY_ACQUIRE, keys=keys, args=[token, LANE_LEASE_MS, _now_ms()]
+                )
+                if acquired == 1:
+                    break
+
+                # Dropped as a stale waiter: take a new place in line
+                if acquired == -1:
+                    await asyncio.to_thread(_enqueue, account_id, token)
+
+                if time.monotonic() >= deadline:
+                    raise AccountLaneTimeout(
+                        f"Timed out after {timeout}s waiting for account {account_id}"
+                    )
+
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 0.5)
+                await asyncio.to_thread(
+                    redis_client.zadd,
+                    _alive_key(account_id),
+                    {token: _now_ms() + LANE_WAITER_TTL_MS},
+                    xx=True,
+                )
+
+        except BaseException:
+            await asyncio.to_thread(_leave, account_id, token)
+            raise
+
+    waited = time.monotonic() - enqueued_at
+    await asyncio.to_thread(_record_wait, waited)
+    if waited > 1:
+        logger.info("Account [{}] lane wait {:.1f}s", account_id, waited)
+
+    lease = asyncio.create_task(_keep_lease(account_id, token))
+
+    try:
+        yield
+    finally:
+        lease.cancel()
+        await asyncio.to_thread(
+            _RELEASE, keys=[_holder_key(account_id)], args=[token]
+        )
+
+
+# --------------------------------------------------
+# Metrics
+# --------------------------------------------------
+
+def _record_wait(seconds: float):
+    pipe = redis_client.pipeline()
+    pipe.hincrby(LANE_STATS_KEY, "acquired", 1)
+    pipe.hincrbyfloat(LANE_STATS_KEY, "wait_seconds_total", seconds)
+    pipe.execute()
+
+
+def lane_depth(account_id: str) -> int:
+    """
+    Number of callers waiting for the account, plus the holder if any.
+    """
+    pipe = redis_client.pipeline()
+    pipe.zcard(_queue_key(str(account_id)))
+    pipe.exists(_holder_key(str(account_id)))
+    waiting, held = pipe.execute()
+    return waiting + held
+
+
+def lane_stats() -> Dict:
+    raw = redis_client.hgetall(LANE_STATS_KEY)
+    acquired = int(raw.get(b"acquired", 0))
+    total = float(raw.get(b"wait_seconds_total", 0))
+
+    return {
+        "acquired": acquired,
+        "avg_wait_seconds": round(total / acquired, 3) if acquired else None,
+    }
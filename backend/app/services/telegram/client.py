@@ -1,4 +1,5 @@
 import asyncio
+import os
 from pathlib import Path
 from typing import Optional
 
@@ -11,6 +12,12 @@ from telethon.errors import (
 # stringsession import
 from loguru import logger
 
+from app.core.tracing import span
+
+
+# "telethon" (default) or "fake" for the in-process stand-in
+TELEGRAM_BACKEND = os.getenv("TELEGRAM_BACKEND", "telethon")
+
 
 class TelegramClientWrapper:
     """
@@ -40,7 +47,11 @@ class TelegramClientWrapper:
     def _build_client(self) -> TelegramClient:
         session_file = self.session_path / self.session_name
 
-        logger.info(f"Initializing Telegram client [{self.session_name}]")
+        logger.debug("Initializing Telegram client [{}]", self.session_name)
+
+        if TELEGRAM_BACKEND == "fake":
+            from app.services.telegram.fake import FakeTelegramClient
+            return FakeTelegramClient(self.session_name)
 
         return TelegramClient(
             session=str(session_file),
@@ -58,19 +69,20 @@ class TelegramClientWrapper:
             self.client = self._build_client()
 
         if not self.client.is_connected():
-            await self.client.connect()
+            with span("telegram.connect", session=self.session_name):
+                await self.client.connect()
 
         if not await self.client.is_user_authorized():
-            logger.warning(f"Account [{self.session_name}] is NOT authorized")
+            logger.warning("Account [{}] is NOT authorized", self.session_name)
             raise RuntimeError("Telegram account not authorized")
 
-        logger.success(f"Connected Telegram client [{self.session_name}]")
+        logger.debug("Connected Telegram client [{}]", self.session_name)
         return self.client
 
     async def disconnect(self):
         if self.client and self.client.is_connected():
             await self.client.disconnect()
-            logger.info(f"Disconnected Telegram client [{self.session_name}]") 
+            logger.debug("Disconnected Telegram client [{}]", self.session_name)
 
             #we intentionally use connect() not start() here to avoid re-authorization
 
@@ -0,0 +1,83 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+from loguru import logger
+from telethon import TelegramClient
+
+from app.services.telegram.client import TelegramClientWrapper
+
+
+class TelegramClientPool:
+    """
+    Keeps Telegram clients connected between sends in one worker process.
+
+    Only safe on a long-lived event loop (see app.workers.runtime): a
+    Telethon client is bound to the loop it connected on. Disabled until
+    a sending shard turns it on.
+    """
+
+    def __init__(self, *, max_size: int = 200, idle_seconds: int = 600):
+        self.enabled = False
+        self.max_size = max_size
+        self.idle_seconds = idle_seconds
+
+        self._clients: "OrderedDict[str, TelegramClientWrapper]" = OrderedDict()
+        self._last_used = {}
+
+    async def get(
+        self,
+        *,
+        account_id: str,
+        session_name: str,
+        api_id: int,
+        api_hash: str,
+    ) -> TelegramClient:
+        wrapper = self._clients.get(account_id)
+
+        if wrapper is None:
+            wrapper = TelegramClientWrapper(
+                session_name=session_name,
+                api_id=api_id,
+                api_hash=api_hash,
+            )
+            self._clients[account_id] = wrapper
+            await self._trim()
+
+        self._clients.move_to_end(account_id)
+        self._last_used[account_id] = time.monotonic()
+        return await wrapper.ensure_connection()
+
+    async def evict(self, account_id: str):
+        wrapper = self._clients.pop(account_id, None)
+        self._last_used.pop(account_id, None)
+
+        if wrapper:
+            try:
+                await wrapper.disconnect()
+            except Exception:
+                logger.exception(f"Failed to disconnect pooled client [{account_id}]")
+
+    async def _trim(self):
+        while len(self._clients) > self.max_size:
+            oldest = next(iter(self._clients))
+            await self.evict(oldest)
+
+    async def reap_idle(self):
+        """
+        Periodically disconnects clients nobody used for idle_seconds.
+        """
+        while True:
+            await asyncio.sleep(60)
+            cutoff = time.monotonic() - self.idle_seconds
+            for account_id in [
+                a for a, used in self._last_used.items() if used < cutoff
+            ]:
+                await self.evict(account_id)
+
+    async def close(self):
+        for account_id in list(self._clients):
+            await self.evict(account_id)
+
+
+client_pool = TelegramClientPool()
@@ -0,0 +1,181 @@
+"""
+In-process stand-in for Telegram, for end-to-end runs and benchmarks.
+
+Enabled with TELEGRAM_BACKEND=fake; TelegramClientWrapper then builds a
+FakeTelegramClient instead of a Telethon client. Nothing leaves the
+process: sends sleep for a sampled latency, fail at configured rates with
+the same Telethon errors the real client raises, and are recorded.
+
+    TELEGRAM_FAKE_LATENCY        fixed | uniform | lognormal   (lognormal)
+    TELEGRAM_FAKE_LATENCY_MS     median latency                (150)
+    TELEGRAM_FAKE_FLOOD_RATE     share of sends raising FloodWaitError
+    TELEGRAM_FAKE_FLOOD_SECONDS  FloodWait length               (30)
+    TELEGRAM_FAKE_FORBIDDEN_RATE share raising ChatWriteForbiddenError
+    TELEGRAM_FAKE_BANNED_RATE    share raising UserBannedInChannelError
+    TELEGRAM_FAKE_DISCONNECT_RATE share dropping the connection
+    TELEGRAM_FAKE_SEED           seed for reproducible runs
+    TELEGRAM_FAKE_RECORD_KEY     also RPUSH every send to this Redis list
+"""
+import asyncio
+import json
+import os
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Union
+
+from telethon.errors import (
+    ChatWriteForbiddenError,
+    FloodWaitError,
+    UserBannedInChannelError,
+)
+
+
+@dataclass
+class FakeTelegramConfig:
+    latency: str = "lognormal"
+    latency_ms: float = 150
+    flood_rate: float = 0.0
+    flood_seconds: int = 30
+    forbidden_rate: float = 0.0
+    banned_rate: float = 0.0
+    disconnect_rate: float = 0.0
+    seed: Optional[int] = None
+    record_key: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> "FakeTelegramConfig":
+        seed = os.getenv("TELEGRAM_FAKE_SEED")
+        return cls(
+            latency=os.getenv("TELEGRAM_FAKE_LATENCY", "lognormal"),
+            latency_ms=float(os.getenv("TELEGRAM_FAKE_LATENCY_MS", 150)),
+            flood_rate=float(os.getenv("TELEGRAM_FAKE_FLOOD_RATE", 0)),
+            flood_seconds=int(os.getenv("TELEGRAM_FAKE_FLOOD_SECONDS", 30)),
+            forbidden_rate=float(os.getenv("TELEGRAM_FAKE_FORBIDDEN_RATE", 0)),
+            banned_rate=float(os.getenv("TELEGRAM_FAKE_BANNED_RATE", 0)),
+            disconnect_rate=float(os.getenv("TELEGRAM_FAKE_DISCONNECT_RATE", 0)),
+            seed=int(seed) if seed else None,
+            record_key=os.getenv("TELEGRAM_FAKE_RECORD_KEY"),
+        )
+
+
+class FakeTelegram:
+    """
+    The fake "server": shared config, randomness and the record of sends.
+    """
+
+    def __init__(self, config: Optional[FakeTelegramConfig] = None):
+        self.configure(config or FakeTelegramConfig.from_env())
+
+    def configure(self, config: FakeTelegramConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.reset()
+
+    def reset(self):
+        self.sent: List[Dict] = []
+        self.outcomes: Counter = Counter()
+
+    def latency(self) -> float:
+        median = self.config.latency_ms / 1000
+
+        if self.config.latency == "fixed":
+            return median
+        if self.config.latency == "uniform":
+            return self.rng.uniform(0, 2 * median)
+        # Long right tail, like real round trips
+        return self.rng.lognormvariate(0, 0.5) * median
+
+    def outcome(self) -> str:
+        roll = self.rng.random()
+        for name, rate in (
+            ("flood_wait", self.config.flood_rate),
+            ("write_forbidden", self.config.forbidden_rate),
+            ("banned", self.config.banned_rate),
+            ("disconnect", self.config.disconnect_rate),
+        ):
+            if roll < rate:
+                return name
+            roll -= rate
+        return "sent"
+
+    def record(self, session_name: str, entity, message: str, outcome: str):
+        self.outcomes[outcome] += 1
+        if outcome != "sent":
+            return
+
+        entry = {
+            "session": session_name,
+            "entity": entity,
+            "message": message,
+            "at": time.time(),
+        }
+        self.sent.append(entry)
+
+        if self.config.record_key:
+            from app.core.redis import redis_client
+            redis_client.rpush(self.config.record_key, json.dumps(entry))
+
+    def stats(self) -> Dict:
+        return {"sent": len(self.sent), "outcomes": dict(self.outcomes)}
+
+
+fake_telegram = FakeTelegram()
+
+
+class FakeTelegramClient:
+    """
+    Implements the part of TelegramClient the wrapper and senders use.
+    """
+
+    def __init__(self, session_name: str, server: FakeTelegram = fake_telegram):
+        self.session_name = session_name
+        self.server = server
+        self._connected = False
+        self._entities = set()
+
+    def is_connected(self) -> bool:
+        return self._connected
+
+    async def connect(self):
+        await asyncio.sleep(self.server.latency())
+        self._connected = True
+
+    async def is_user_authorized(self) -> bool:
+        return True
+
+    async def disconnect(self):
+        self._connected = False
+
+    async def get_input_entity(self, entity: Union[str, int]):
+        # Resolved once per client, then served from the entity cache
+        if entity not in self._entities:
+            await asyncio.sleep(self.server.latency())
+            self._entities.add(entity)
+        return entity
+
+    async def send_message(
+        self,
+        entity: Union[str, int],
+        message: str,
+        parse_mode: Optional[str] = None,
+        link_preview: bool = False,
+    ):
+        if not self._connected:
+            raise ConnectionError("Cannot send requests while disconnected")
+
+        await asyncio.sleep(self.server.latency())
+
+        outcome = self.server.outcome()
+        self.server.record(self.session_name, entity, message, outcome)
+
+        if outcome == "flood_wait":
+            raise FloodWaitError(request=None, capture=self.server.config.flood_seconds)
+        if outcome == "write_forbidden":
+            raise ChatWriteForbiddenError(request=None)
+        if outcome == "banned":
+            raise UserBannedInChannelError(request=None)
+        if outcome == "disconnect":
+            self._connected = False
+            raise ConnectionError("Connection to Telegram failed")
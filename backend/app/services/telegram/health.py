@@ -1,9 +1,64 @@
-from datetime import datetime, timedelta
-from typing import Optional
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
 
 import redis
 from loguru import logger
 
+from app.core.metrics import FLOODWAIT_EVENTS, FLOODWAIT_SECONDS, account_bucket
+
+
+# Fields of the acct:{id}:health hash; times are epoch seconds
+_FIELDS = ("banned", "parked_until", "paused_until", "flood", "flood_until")
+
+# Health events for app.workers.health_events; trimmed approximately
+HEALTH_STREAM = "health:events"
+HEALTH_STREAM_MAXLEN = 100_000
+
+
+# KEYS: health, stream
+# ARGV: now, seconds, window, threshold, pause_seconds, maxlen, account_id
+# Returns {flood_count, paused_until or 0}
+_RECORD_FLOODWAIT = """
+local now = tonumber(ARGV[1])
+local state = redis.call('hmget', KEYS[1], 'flood_until', 'parked_until', 'paused_until')
+local flood_until = tonumber(state[1] or '0')
+local parked_until = math.max(tonumber(state[2] or '0'), now + tonumber(ARGV[2]))
+local paused_until = tonumber(state[3] or '0')
+
+if flood_until <= now then
+    redis.call('hset', KEYS[1], 'flood', 0)
+end
+local flood = redis.call('hincrby', KEYS[1], 'flood', 1)
+flood_until = now + tonumber(ARGV[3])
+
+local paused = 0
+if flood >= tonumber(ARGV[4]) then
+    paused = now + tonumber(ARGV[5])
+    paused_until = math.max(paused_until, paused)
+end
+
+redis.call('xadd', KEYS[2], 'MAXLEN', '~', ARGV[6], '*',
+    'account_id', ARGV[7], 'event_type', 'floodwait',
+    'details', ARGV[2], 'at', ARGV[1])
+if paused > 0 then
+    redis.call('xadd', KEYS[2], 'MAXLEN', '~', ARGV[6], '*',
+        'account_id', ARGV[7], 'event_type', 'paused',
+        'details', tostring(paused), 'at', ARGV[1])
+end
+
+redis.call('hset', KEYS[1],
+    'flood_until', tostring(flood_until),
+    'parked_until', tostring(parked_until),
+    'paused_until', tostring(paused_until))
+
+if redis.call('hexists', KEYS[1], 'banned') == 0 then
+    local expires = math.max(flood_until, parked_until, paused_until)
+    redis.call('expireat', KEYS[1], math.ceil(expires) + 60)
+end
+return {flood, tostring(paused)}
+"""
+
 
 class AccountHealthStatus:
     HEALTHY = "healthy"
@@ -27,6 +82,9 @@ class AccountHealthReport:
 class AccountHealthMonitor:
     """
     Tracks Telegram account health using Redis signals.
+
+    All of an account's state lives in one hash, so one HMGET answers a
+    health check and a pipeline of them answers it for a whole fleet.
     """
 
     def __init__(
@@ -41,19 +99,27 @@ class AccountHealthMonitor:
         self.flood_threshold = flood_threshold
         self.flood_window_minutes = flood_window_minutes
         self.pause_minutes = pause_minutes
+        self._record_floodwait = redis_client.register_script(_RECORD_FLOODWAIT)
 
     # --------------------
     # Redis keys
     # --------------------
 
-    def _flood_key(self, account_id: str) -> str:
-        return f"acct:{account_id}:flood"
+    def _health_key(self, account_id: str) -> str:
+        return f"acct:{account_id}:health"
 
-    def _pause_key(self, account_id: str) -> str:
-        return f"acct:{account_id}:paused_until"
-
-    def _ban_key(self, account_id: str) -> str:
-        return f"acct:{account_id}:banned"
+    def _publish(self, pipe, account_id: str, event_type: str, details: str = ""):
+        pipe.xadd(
+            HEALTH_STREAM,
+            {
+                "account_id": account_id,
+                "event_type": event_type,
+                "details": details,
+                "at": str(time.time()),
+            },
+            maxlen=HEALTH_STREAM_MAXLEN,
+            approximate=True,
+        )
 
     # --------------------
     # Recording events
@@ -61,84 +127,142 @@ class AccountHealthMonitor:
 
     def record_floodwait(self, account_id: str, seconds: int):
         """
-        Record a FloodWait event.
+        Record a FloodWait event and park the account until it is over.
         """
-        key = self._flood_key(account_id)
+        flood_count, paused_until = self._record_floodwait(
+            keys=[self._health_key(account_id), HEALTH_STREAM],
+            args=[
+                time.time(),
+                max(int(seconds), 1),
+                self.flood_window_minutes * 60,
+                self.flood_threshold,
+                self.pause_minutes * 60,
+                HEALTH_STREAM_MAXLEN,
+                account_id,
+            ],
+        )
 
-        pipe = self.redis.pipeline()
-        pipe.incr(key, 1)
-        pipe.expire(key, self.flood_window_minutes * 60)
-        pipe.execute()
+        FLOODWAIT_SECONDS.labels(account_bucket(account_id)).inc(seconds)
+        FLOODWAIT_EVENTS.observe(seconds)
 
         logger.warning(
-            f"FloodWait recorded for [{account_id}] ({seconds}s)"
+            "FloodWait recorded for [{}] ({}s, {} in window)",
+            account_id,
+            seconds,
+            flood_count,
         )
 
-        if self.redis.get(key) and int(self.redis.get(key)) >= self.flood_threshold:
-            self._pause_account(account_id)
+        if float(paused_until):
+            logger.warning(
+                "Account [{}] paused until {}",
+                account_id,
+                datetime.utcfromtimestamp(float(paused_until)),
+            )
 
-    def record_write_forbidden(self, account_id: str):
+    def record_write_forbidden(self, account_id: str, group_id: str = ""):
         """
         Group ban or write restriction.
         """
+        self._publish(self.redis, account_id, "write_forbidden", group_id)
         logger.warning(f"Write forbidden for [{account_id}]")
 
     def record_ban(self, account_id: str):
         """
         Account appears banned or deactivated.
         """
-        self.redis.set(self._ban_key(account_id), "1")
-        logger.critical(f"Account [{account_id}] marked as BANNED")
-
-    # --------------------
-    # State transitions
-    # --------------------
+        key = self._health_key(account_id)
 
-    def _pause_account(self, account_id: str):
-        paused_until = datetime.utcnow() + timedelta(minutes=self.pause_minutes)
-        self.redis.set(
-            self._pause_key(account_id),
-            paused_until.isoformat(),
-        )
+        pipe = self.redis.pipeline()
+        pipe.hset(key, "banned", "1")
+        pipe.persist(key)
+        self._publish(pipe, account_id, "banned")
+        pipe.execute()
 
-        logger.warning(
-            f"Account [{account_id}] paused until {paused_until}"
-        )
+        logger.critical(f"Account [{account_id}] marked as BANNED")
 
     # --------------------
     # Health checks
     # --------------------
 
-    def check_health(self, account_id: str) -> AccountHealthReport:
-        """
-        Returns current health status for account.
-        """
-        if self.redis.exists(self._ban_key(account_id)):
+    @staticmethod
+    def _evaluate(values: List[Optional[bytes]], now: float) -> AccountHealthReport:
+        banned, parked_until, paused_until, flood, flood_until = (
+            value.decode() if value is not None else None for value in values
+        )
+
+        if banned:
             return AccountHealthReport(
                 status=AccountHealthStatus.BANNED,
                 reason="ACCOUNT_BANNED",
             )
 
-        paused_until = self.redis.get(self._pause_key(account_id))
-        if paused_until:
-            paused_until_dt = datetime.fromisoformat(paused_until.decode())
-            if datetime.utcnow() < paused_until_dt:
-                retry_after = int(
-                    (paused_until_dt - datetime.utcnow()).total_seconds()
-                )
-                return AccountHealthReport(
-                    status=AccountHealthStatus.PAUSED,
-                    reason="TEMPORARY_PAUSE",
-                    retry_after=retry_after,
-                )
-            else:
-                self.redis.delete(self._pause_key(account_id))
-
-        flood_count = self.redis.get(self._flood_key(account_id))
-        if flood_count and int(flood_count) > 0:
+        if parked_until and float(parked_until) > now:
+            return AccountHealthReport(
+                status=AccountHealthStatus.PAUSED,
+                reason="FLOOD_WAIT",
+                retry_after=int(float(parked_until) - now),
+            )
+
+        if paused_until and float(paused_until) > now:
+            return AccountHealthReport(
+                status=AccountHealthStatus.PAUSED,
+                reason="TEMPORARY_PAUSE",
+                retry_after=int(float(paused_until) - now),
+            )
+
+        if flood and int(flood) > 0 and flood_until and float(flood_until) > now:
             return AccountHealthReport(
                 status=AccountHealthStatus.WARNING,
                 reason="RECENT_FLOODWAIT",
             )
 
         return AccountHealthReport(status=AccountHealthStatus.HEALTHY)
+
+    def bulk_check(self, account_ids: Iterable[str]) -> Dict[str, AccountHealthReport]:
+        """
+        Health of many accounts in a single round trip.
+        """
+        account_ids = [str(account_id) for account_id in account_ids]
+        if not account_ids:
+            return {}
+
+        pipe = self.redis.pipeline(transaction=False)
+        for account_id in account_ids:
+            pipe.hmget(self._health_key(account_id), _FIELDS)
+        rows = pipe.execute()
+
+        now = time.time()
+        return {
+            account_id: self._evaluate(values, now)
+            for account_id, values in zip(account_ids, rows)
+        }
+
+    def check_health(self, account_id: str) -> AccountHealthReport:
+        """
+        Returns current health status for account.
+        """
+        values = self.redis.hmget(self._health_key(account_id), _FIELDS)
+        return self._evaluate(values, time.time())
+
+    @staticmethod
+    def _usable(report: AccountHealthReport) -> bool:
+        return report.status not in (
+            AccountHealthStatus.PAUSED,
+            AccountHealthStatus.BANNED,
+        )
+
+    def is_available(self, account_id: str) -> bool:
+        """
+        True unless the account is banned, paused or parked.
+        """
+        return self._usable(self.check_health(account_id))
+
+    def available(self, account_ids: Iterable[str]) -> List[str]:
+        """
+        The subset of account_ids that may send, in the given order.
+        """
+        return [
+            account_id
+            for account_id, report in self.bulk_check(account_ids).items()
+            if self._usable(report)
+        ]
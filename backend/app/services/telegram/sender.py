@@ -1,5 +1,4 @@
-import asyncio
-import random
+import time
 from datetime import datetime
 from typing import Optional, Union
 
@@ -13,6 +12,12 @@ from telethon.tl.types import InputPeerChannel, InputPeerChat
 
 from loguru import logger
 
+from app.core.metrics import LIMITER_DENIALS, SEND_SECONDS
+from app.services.rate_limit.account_pacing import (
+    paced_wait,
+    record_send_time,
+    reserve_send_slot,
+)
 from app.services.telegram.client import TelegramClientWrapper
 
 
@@ -26,11 +31,13 @@ class TelegramSendResult:
         success: bool,
         error: Optional[str] = None,
         flood_wait: Optional[int] = None,
+        retry_after: Optional[float] = None,
         timestamp: Optional[datetime] = None,
     ):
         self.success = success
         self.error = error
         self.flood_wait = flood_wait
+        self.retry_after = retry_after
         self.timestamp = timestamp or datetime.utcnow()
 
 
@@ -43,17 +50,25 @@ class TelegramSender:
         self,
         *,
         client_wrapper: TelegramClientWrapper,
+        account_id: Optional[str] = None,
         min_delay: int = 30,
         max_delay: int = 90,
     ):
         self.client_wrapper = client_wrapper
+        self.account_id = account_id
         self.min_delay = min_delay
         self.max_delay = max_delay
 
-    async def _random_delay(self):
-        delay = random.randint(self.min_delay, self.max_delay)
-        logger.debug(f"Sleeping {delay}s before sending message")
-        await asyncio.sleep(delay)
+    def _reserve_slot(self) -> float:
+        """
+        Reserves the account's next send slot; returns seconds until it.
+        """
+        slot = reserve_send_slot(
+            self.account_id,
+            min_gap=self.min_delay,
+            max_gap=self.max_delay,
+        )
+        return max(slot - time.time(), 0.0)
 
     async def send_message(
         self,
@@ -62,6 +77,7 @@ class TelegramSender:
         message: str,
         parse_mode: Optional[str] = None,
         link_preview: bool = False,
+        paced: bool = True,
     ) -> TelegramSendResult:
         """
         Sends a message to a group/channel/user.
@@ -69,15 +85,36 @@ class TelegramSender:
         entity:
           - @username
           - group/channel ID
+
+        With an account_id, a send that is not yet due returns a PACED
+        result with retry_after; the caller resumes it with paced=False
+        once that slot comes up.
         """
 
-        await self._random_delay()
+        if self.account_id:
+            # A reserved slot is only an eta; the gap is enforced here
+            wait = self._reserve_slot() if paced else 0.0
+            wait = max(wait, paced_wait(self.account_id, self.min_delay))
+            if wait > 1:
+                logger.debug("[{}] next slot in {:.0f}s", self.account_id, wait)
+                LIMITER_DENIALS.labels("account_paced").inc()
+                return TelegramSendResult(
+                    success=False,
+                    error="PACED",
+                    retry_after=wait,
+                )
+
+        started = time.perf_counter()
+
+        def observe(outcome: str):
+            SEND_SECONDS.labels(outcome).observe(time.perf_counter() - started)
 
         try:
             async with self.client_wrapper as client:
-                logger.info(
-                    f"Sending message using [{self.client_wrapper.session_name}] "
-                    f"to [{entity}]"
+                logger.debug(
+                    "Sending message using [{}] to [{}]",
+                    self.client_wrapper.session_name,
+                    entity,
                 )
 
                 await client.send_message(
@@ -87,12 +124,14 @@ class TelegramSender:
                     link_preview=link_preview,
                 )
 
-                logger.success("Message sent successfully")
+                logger.debug("Message sent successfully")
+                observe("sent")
 
                 return TelegramSendResult(success=True)
 
         except FloodWaitError as e:
-            logger.error(f"FloodWait {e.seconds}s while sending message")
+            logger.error("FloodWait {}s while sending message", e.seconds)
+            observe("flood_wait")
             return TelegramSendResult(
                 success=False,
                 error="FLOOD_WAIT",
@@ -101,6 +140,7 @@ class TelegramSender:
 
         except (ChatWriteForbiddenError, UserBannedInChannelError):
             logger.error("Write forbidden / banned in target")
+            observe("write_forbidden")
             return TelegramSendResult(
                 success=False,
                 error="WRITE_FORBIDDEN",
@@ -108,6 +148,7 @@ class TelegramSender:
 
         except RPCError as e:
             logger.exception("Telegram RPC error while sending message")
+            observe("rpc_error")
             return TelegramSendResult(
                 success=False,
                 error=str(e),
@@ -115,7 +156,12 @@ class TelegramSender:
 
         except Exception:
             logger.exception("Unexpected error while sending message")
+            observe("error")
             return TelegramSendResult(
                 success=False,
                 error="UNKNOWN_ERROR",
             )
+
+        finally:
+            if self.account_id:
+                record_send_time(self.account_id)
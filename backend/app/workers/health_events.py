@@ -0,0 +1,240 @@
+"""
+Persists account health events from the Redis stream.
+
+    python -m app.workers.health_events
+
+AccountHealthMonitor publishes floodwait, paused, write_forbidden and
+banned events to `health:events`. This process reads them through a
+consumer group, writes them to account_health_events in batches and
+folds them into telegram_accounts.status:
+
+    banned   status banned (never lifted here)
+    paused   status restricted until the pause ends, then back to the
+             status it had before (a warming account keeps warming)
+
+Account selection filters on the indexed status column, so unhealthy
+accounts are skipped without asking Redis about each one. Several
+replicas may run; entries left pending by a dead consumer are claimed
+after HEALTH_CLAIM_IDLE_MS.
+"""
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+
+import redis
+from loguru import logger
+from sqlalchemy import case, func, update
+
+from app.core.db import SessionLocal
+from app.core.logging import setup_logging
+from app.core.redis import redis_client
+from app.models.models import AccountHealthEvent, TelegramAccount
+from app.services.telegram.health import HEALTH_STREAM
+
+
+HEALTH_GROUP = "health-persist"
+HEALTH_BATCH_SIZE = int(os.getenv("HEALTH_BATCH_SIZE", "500"))
+HEALTH_BLOCK_MS = int(os.getenv("HEALTH_BLOCK_MS", "2000"))
+HEALTH_CLAIM_IDLE_MS = int(os.getenv("HEALTH_CLAIM_IDLE_MS", "60000"))
+
+CONSUMER_NAME = f"{socket.gethostname()}-{os.getpid()}"
+
+# Statuses a health event may move an account out of
+_TRANSITION_FROM = ("warming", "active", "restricted")
+
+_accounts = TelegramAccount.__table__
+
+
+def ensure_group():
+    try:
+        redis_client.xgroup_create(HEALTH_STREAM, HEALTH_GROUP, id="0", mkstream=True)
+    except redis.ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+def _parse(entries) -> Tuple[List[bytes], List[Dict]]:
+    ids, events = [], []
+
+    for entry_id, fields in entries:
+        ids.append(entry_id)
+        if not fields:
+            continue
+        fields = {key.decode(): value.decode() for key, value in fields.items()}
+        try:
+            fields["account_id"] = uuid.UUID(fields["account_id"])
+        except (KeyError, ValueError):
+            # Benchmarks and fake accounts have no row to attach to
+            continue
+        events.append(fields)
+
+    return ids, events
+
+
+def _utc(epoch: str) -> datetime:
+    return datetime.fromtimestamp(float(epoch), tz=timezone.utc)
+
+
+def persist_batch(db, events: List[Dict]):
+    """
+    One INSERT for the events and a few bulk UPDATEs for the statuses.
+    """
+    known = {
+        row.id
+        for row in db.query(TelegramAccount.id).filter(
+            TelegramAccount.id.in_({event["account_id"] for event in events})
+        )
+    }
+    events = [event for event in events if event["account_id"] in known]
+    if not events:
+        return
+
+    db.bulk_insert_mappings(AccountHealthEvent, [
+        {
+            "account_id": event["account_id"],
+            "event_type": event["event_type"],
+            "details": event.get("details") or None,
+            "created_at": _utc(event["at"]),
+        }
+        for event in events
+    ])
+
+    banned = {e["account_id"] for e in events if e["event_type"] == "banned"}
+
+    # Latest pause per account wins
+    restricted: Dict[uuid.UUID, datetime] = {}
+    for event in events:
+        if event["event_type"] == "paused" and event["account_id"] not in banned:
+            until = _utc(event["details"])
+            restricted[event["account_id"]] = max(
+                until, restricted.get(event["account_id"], until)
+            )
+
+    if banned:
+        db.execute(
+            update(_accounts)
+            .where(_accounts.c.id.in_(banned))
+            .values(
+                status="banned",
+                restricted_until=None,
+                pre_restriction_status=None,
+            )
+        )
+
+    # Grouped by end time so a burst of pauses stays a handful of UPDATEs
+    by_until: Dict[datetime, List[uuid.UUID]] = {}
+    for account_id, until in restricted.items():
+        by_until.setdefault(until, []).append(account_id)
+
+    for until, account_ids in by_until.items():
+        restrict_accounts(db, account_ids, until)
+
+    db.commit()
+
+    logger.debug(
+        "Persisted {} health events ({} banned, {} restricted)",
+        len(events),
+        len(banned),
+        len(restricted),
+    )
+
+
+def restrict_accounts(db, account_ids: List[uuid.UUID], until: datetime):
+    """
+    Restricts the accounts until ``until`` and remembers the status each
+    one had; an account restricted again keeps its original one.
+    """
+    db.execute(
+        update(_accounts)
+        .where(
+            _accounts.c.id.in_(account_ids),
+            _accounts.c.status.in_(_TRANSITION_FROM),
+        )
+        .values(
+            status="restricted",
+            restricted_until=until,
+            pre_restriction_status=case(
+                (
+                    _accounts.c.status == "restricted",
+                    _accounts.c.pre_restriction_status,
+                ),
+                else_=_accounts.c.status,
+            ),
+        )
+    )
+
+
+def lift_expired_restrictions(db) -> int:
+    lifted = db.execute(
+        update(_accounts)
+        .where(
+            _accounts.c.status == "restricted",
+            _accounts.c.restricted_until <= datetime.now(timezone.utc),
+        )
+        .values(
+            # Restrictions from before the column existed lift as before
+            status=func.coalesce(_accounts.c.pre_restriction_status, "active"),
+            restricted_until=None,
+            pre_restriction_status=None,
+        )
+    ).rowcount
+    db.commit()
+
+    if lifted:
+        logger.info("Lifted restriction on {} accounts", lifted)
+    return lifted
+
+
+def _read():
+    # Entries a dead consumer took but never acknowledged come first
+    _, claimed, *_ = redis_client.xautoclaim(
+        HEALTH_STREAM,
+        HEALTH_GROUP,
+        CONSUMER_NAME,
+        min_idle_time=HEALTH_CLAIM_IDLE_MS,
+        count=HEALTH_BATCH_SIZE,
+    )
+    if claimed:
+        return claimed
+
+    response = redis_client.xreadgroup(
+        HEALTH_GROUP,
+        CONSUMER_NAME,
+        {HEALTH_STREAM: ">"},
+        count=HEALTH_BATCH_SIZE,
+        block=HEALTH_BLOCK_MS,
+    )
+    return response[0][1] if response else []
+
+
+def run():
+    setup_logging("health-events")
+    ensure_group()
+    logger.info("Health event consumer {} started", CONSUMER_NAME)
+
+    while True:
+        try:
+            entries = _read()
+            ids, events = _parse(entries)
+
+            db = SessionLocal()
+            try:
+                if events:
+                    persist_batch(db, events)
+                lift_expired_restrictions(db)
+            finally:
+                db.close()
+
+            if ids:
+                redis_client.xack(HEALTH_STREAM, HEALTH_GROUP, *ids)
+
+        except Exception:
+            logger.exception("Health event consumer error")
+            time.sleep(1)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,74 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import os
+import threading
+from typing import Any, Coroutine, Optional
+
+
+# Threads for the blocking Redis and database calls the loop's coroutines
+# hand off with asyncio.to_thread; at least the shard's send concurrency
+BLOCKING_THREADS = int(os.getenv("WORKER_BLOCKING_THREADS", 32))
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def start_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Starts a process-wide event loop in a background thread.
+
+    Tasks submitted through run_async share it, so connections opened by
+    one task (pooled Telegram clients) stay usable by the next. Only
+    network I/O should run on it; blocking calls go to its executor.
+    """
+    global _loop
+
+    if _loop is None:
+        loop = asyncio.new_event_loop()
+        loop.set_default_executor(concurrent.futures.ThreadPoolExecutor(
+            max_workers=BLOCKING_THREADS,
+            thread_name_prefix="worker-blocking",
+        ))
+        threading.Thread(
+            target=loop.run_forever,
+            name="worker-event-loop",
+            daemon=True,
+        ).start()
+        _loop = loop
+
+    return _loop
+
+
+def run_async(coro: Coroutine) -> Any:
+    """
+    Runs a coroutine to completion from synchronous (Celery task) code.
+
+    The coroutine sees the caller's context variables (current trace
+    span), even on the shared loop's thread.
+    """
+    if _loop is None:
+        return asyncio.run(coro)
+
+    future = concurrent.futures.Future()
+
+    def copy_outcome(task: asyncio.Task):
+        if task.cancelled():
+            future.cancel()
+        elif task.exception() is not None:
+            future.set_exception(task.exception())
+        else:
+            future.set_result(task.result())
+
+    def start():
+        # Created inside the copied context, so the task inherits it
+        _loop.create_task(coro).add_done_callback(copy_outcome)
+
+    _loop.call_soon_threadsafe(start, context=contextvars.copy_context())
+    return future.result()
+
+
+def spawn(coro: Coroutine):
+    """
+    Schedules a background coroutine on the process-wide loop.
+    """
+    asyncio.run_coroutine_threadsafe(coro, start_event_loop())
@@ -0,0 +1,161 @@
+import asyncio
+import bisect
+import hashlib
+import time
+from typing import Dict, Iterable, List, Optional
+
+from loguru import logger
+
+from app.core.celery_app import SENDING_QUEUE
+from app.core.redis import redis_client
+
+
+SHARDS_KEY = "workers:shards"
+LOOP_LAG_KEY = "workers:loop_lag"
+
+# A shard without a heartbeat for this long leaves the ring
+SHARD_TTL_SECONDS = 15
+HEARTBEAT_SECONDS = 1.0
+VIRTUAL_NODES = 160
+# How long publishers reuse their view of the ring
+RING_CACHE_SECONDS = 5
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(key.encode(), digest_size=8).digest(),
+        "big",
+    )
+
+
+class ConsistentHashRing:
+    """
+    Maps account ids to shards; adding or removing one shard only moves
+    the accounts that hashed to it.
+    """
+
+    def __init__(self, shards: Iterable[str] = ()):
+        self._points: List[int] = []
+        self._owners: Dict[int, str] = {}
+        for shard in shards:
+            self.add(shard)
+
+    def __len__(self) -> int:
+        return len(set(self._owners.values()))
+
+    def add(self, shard: str):
+        for i in range(VIRTUAL_NODES):
+            point = _hash(f"{shard}#{i}")
+            if point not in self._owners:
+                bisect.insort(self._points, point)
+            self._owners[point] = shard
+
+    def remove(self, shard: str):
+        points = [p for p, owner in self._owners.items() if owner == shard]
+        for point in points:
+            del self._owners[point]
+        self._points = [p for p in self._points if p in self._owners]
+
+    def lookup(self, key: str) -> Optional[str]:
+        if not self._points:
+            return None
+
+        idx = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[self._points[idx]]
+
+
+# --------------------------------------------------
+# Ring membership (REDIS)
+# --------------------------------------------------
+
+def live_shards() -> List[str]:
+    cutoff = time.time() - SHARD_TTL_SECONDS
+    return sorted(
+        shard.decode()
+        for shard, seen in redis_client.hgetall(SHARDS_KEY).items()
+        if float(seen) >= cutoff
+    )
+
+
+def leave_ring(shard: str):
+    pipe = redis_client.pipeline()
+    pipe.hdel(SHARDS_KEY, shard)
+    pipe.hdel(LOOP_LAG_KEY, shard)
+    pipe.execute()
+
+
+def shard_queue(shard: str) -> str:
+    return f"{SENDING_QUEUE}.{shard}"
+
+
+class NoLiveShards(Exception):
+    """
+    No sending shard has a recent heartbeat; nothing would consume a send.
+    """
+
+
+_ring_cache = {"at": 0.0, "ring": ConsistentHashRing()}
+
+
+def send_queue_for(account_id: str) -> str:
+    """
+    Queue of the shard that owns the account.
+
+    Raises NoLiveShards while the ring is empty (before the first
+    heartbeat, or with every shard down).
+    """
+    now = time.monotonic()
+    # An empty view is re-read right away instead of being trusted
+    if now - _ring_cache["at"] > RING_CACHE_SECONDS or not len(_ring_cache["ring"]):
+        _ring_cache["ring"] = ConsistentHashRing(live_shards())
+        _ring_cache["at"] = now
+
+    shard = _ring_cache["ring"].lookup(str(account_id))
+    if shard is None:
+        raise NoLiveShards()
+    return shard_queue(shard)
+
+
+def _beat(shard: str, lag_ms: float):
+    pipe = redis_client.pipeline()
+    pipe.hset(SHARDS_KEY, shard, time.time())
+    pipe.hset(LOOP_LAG_KEY, shard, round(lag_ms, 2))
+    pipe.execute()
+
+
+async def heartbeat_loop(shard: str):
+    """
+    Keeps the shard in the ring and reports event-loop lag.
+
+    Lag is how late a fixed sleep wakes up: time the loop spent busy
+    with other work (CPU-bound variation, encoding, ORM hydration).
+    """
+    loop = asyncio.get_running_loop()
+
+    while True:
+        started = loop.time()
+        await asyncio.sleep(HEARTBEAT_SECONDS)
+        lag_ms = max((loop.time() - started - HEARTBEAT_SECONDS) * 1000, 0.0)
+
+        try:
+            # Off the loop, so a slow Redis does not stall the sends
+            await asyncio.to_thread(_beat, shard, lag_ms)
+        except Exception:
+            logger.exception(f"Shard {shard} heartbeat failed")
+
+
+def shard_stats() -> Dict[str, Dict]:
+    pipe = redis_client.pipeline()
+    pipe.hgetall(SHARDS_KEY)
+    pipe.hgetall(LOOP_LAG_KEY)
+    seen, lag = pipe.execute()
+
+    now = time.time()
+    return {
+        shard.decode(): {
+            "alive": now - float(ts) < SHARD_TTL_SECONDS,
+            "last_heartbeat_seconds_ago": round(now - float(ts), 2),
+            "loop_lag_ms": float(lag[shard]) if shard in lag else None,
+        }
+        for shard, ts in seen.items()
+    }
@@ -0,0 +1,165 @@
+"""
+Runs one sending shard per core.
+
+    python -m app.workers.supervisor --processes 4
+
+Each shard is a separate process with its own Celery worker consuming
+`sending.<shard>`, one long-lived event loop and a pool of connected
+Telegram clients. Send tasks are routed to the shard that owns their
+account on a consistent-hash ring (app.workers.sharding), so an account's
+client stays warm in one process. Per-account and per-customer limits
+stay global in Redis; the lane still guarantees exclusivity while the
+ring changes.
+
+A dead shard leaves the ring right away (its accounts move to the
+neighbours) and is restarted under the same name, so tasks already on
+its queue are picked up again.
+
+Each shard exports its metrics on its own port next to
+WORKER_METRICS_PORT. With PROMETHEUS_MULTIPROC_DIR set the supervisor
+serves all shards on WORKER_METRICS_PORT instead.
+"""
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict
+
+from loguru import logger
+
+
+SHARD_PREFIX = os.getenv("SHARD_PREFIX", socket.gethostname())
+SHARD_THREADS = int(os.getenv("SHARD_THREADS", 16))
+MAX_RESTART_BACKOFF = 30
+
+
+# --------------------------------------------------
+# Shard process
+# --------------------------------------------------
+
+def run_shard(shard: str):
+    from app.core.celery_app import celery_app
+    from app.services.telegram.client_pool import client_pool
+    from app.workers.runtime import spawn, start_event_loop
+    from app.workers.sharding import heartbeat_loop, shard_queue
+
+    start_event_loop()
+    client_pool.enabled = True
+    spawn(heartbeat_loop(shard))
+    spawn(client_pool.reap_idle())
+
+    logger.info(f"Shard {shard} consuming {shard_queue(shard)}")
+
+    # Threads only wait on the shared loop, so one core serves them all
+    celery_app.worker_main([
+        "worker",
+        "-Q", shard_queue(shard),
+        "-n", f"{shard}@%h",
+        "--pool", "threads",
+        "--concurrency", str(SHARD_THREADS),
+        "--prefetch-multiplier", "1",
+        "-l", "info",
+    ])
+
+
+# --------------------------------------------------
+# Supervisor
+# --------------------------------------------------
+
+class Supervisor:
+    def __init__(self, processes: int):
+        self.shards = [f"{SHARD_PREFIX}-{i}" for i in range(processes)]
+        self.children: Dict[str, subprocess.Popen] = {}
+        self.restarts: Dict[str, int] = {shard: 0 for shard in self.shards}
+        self.running = True
+
+    def _start(self, shard: str):
+        from app.core.celery_app import WORKER_METRICS_PORT
+        from app.core.metrics import PROMETHEUS_MULTIPROC_DIR
+
+        env = dict(os.environ)
+        if PROMETHEUS_MULTIPROC_DIR:
+            # Shards write to the shared dir; the supervisor exports them
+            env["WORKER_METRICS_PORT"] = "0"
+        elif WORKER_METRICS_PORT:
+            # One exporter port per shard, next to the base port
+            env["WORKER_METRICS_PORT"] = str(
+                WORKER_METRICS_PORT + self.shards.index(shard)
+            )
+
+        self.children[shard] = subprocess.Popen(
+            [sys.executable, "-m", "app.workers.supervisor", "--shard", shard],
+            env=env,
+        )
+        logger.info(f"Started shard {shard} (pid {self.children[shard].pid})")
+
+    def _stop(self, *_):
+        self.running = False
+
+    def run(self):
+        from app.core.celery_app import WORKER_METRICS_PORT
+        from app.core.metrics import (
+            PROMETHEUS_MULTIPROC_DIR,
+            release_process_metrics,
+            start_exporter,
+        )
+        from app.workers.sharding import leave_ring
+
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        if PROMETHEUS_MULTIPROC_DIR:
+            start_exporter(WORKER_METRICS_PORT)
+
+        for shard in self.shards:
+            self._start(shard)
+
+        restart_at: Dict[str, float] = {}
+
+        while self.running:
+            time.sleep(1)
+
+            for shard, child in list(self.children.items()):
+                if child.poll() is None:
+                    continue
+
+                logger.error(f"Shard {shard} exited with {child.returncode}")
+                del self.children[shard]
+                leave_ring(shard)
+                release_process_metrics(child.pid)
+
+                self.restarts[shard] += 1
+                backoff = min(2 ** self.restarts[shard], MAX_RESTART_BACKOFF)
+                restart_at[shard] = time.monotonic() + backoff
+
+            for shard, at in list(restart_at.items()):
+                if time.monotonic() >= at:
+                    del restart_at[shard]
+                    self._start(shard)
+
+        for child in self.children.values():
+            child.terminate()
+        for shard, child in self.children.items():
+            try:
+                child.wait(timeout=60)
+            except subprocess.TimeoutExpired:
+                child.kill()
+            leave_ring(shard)
+
+
+if __name__ == "__main__":
+    from app.core.logging import setup_logging
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--shard")
+    args = parser.parse_args()
+
+    if args.shard:
+        run_shard(args.shard)
+    else:
+        setup_logging("supervisor")
+        Supervisor(args.processes).run()
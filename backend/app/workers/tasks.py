@@ -0,0 +1,379 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from app.core.celery_app import celery_app
+from app.core.db import SessionLocal
+from app.core.profiling import profile_coroutine, take_campaign_profile
+from app.core.query_stats import track_queries
+from app.core.redis import redis_client
+from app.core.tracing import span
+from app.models.models import MessageLog
+from app.services.campaigns.campaign_lock import (
+    CAMPAIGN_LOCK_TTL_SECONDS,
+    release_campaign_lock,
+)
+from app.services.campaigns.fair_queue import release_in_flight
+from app.workers.runtime import run_async
+from app.workers.sharding import NoLiveShards, send_queue_for
+
+
+# Upper bound on how long a tick can keep its campaign lock and slot
+TICK_TTL_SECONDS = CAMPAIGN_LOCK_TTL_SECONDS
+
+# Retry delay for sends published while no sending shard is alive
+SHARD_RETRY_SECONDS = 5
+
+
+# --------------------------------------------------
+# Tick bookkeeping (lock + in-flight slot)
+# --------------------------------------------------
+
+def _tick_key(campaign_id: str, lock_token: Optional[str]) -> str:
+    # Sends still open for the tick holding ``lock_token``
+    return f"campaign:{campaign_id}:tick:{lock_token or 'pending'}"
+
+
+def _run_key(campaign_id: str, tick_id: str) -> str:
+    return f"campaign:{campaign_id}:run:{tick_id}"
+
+
+def _begin_tick(campaign_id: str, tick_id: Optional[str]) -> Optional[str]:
+    """
+    None for a first delivery; for a redelivery, the state the earlier
+    one left: "planning" if it died before finishing its fan-out.
+    """
+    if tick_id is None:
+        return None
+
+    key = _run_key(campaign_id, tick_id)
+    if redis_client.set(key, "planning", nx=True, ex=TICK_TTL_SECONDS):
+        return None
+
+    previous = redis_client.set(key, "done", xx=True, get=True, keepttl=True)
+    return previous.decode() if previous else "done"
+
+
+def _end_tick(campaign_id: str, tick_id: Optional[str]):
+    if tick_id is not None:
+        redis_client.set(
+            _run_key(campaign_id, tick_id), "done", xx=True, keepttl=True
+        )
+
+
+def _tick_add(campaign_id: str, lock_token: Optional[str]):
+    key = _tick_key(campaign_id, lock_token)
+
+    pipe = redis_client.pipeline()
+    pipe.incr(key, 1)
+    pipe.expire(key, TICK_TTL_SECONDS)
+    pipe.execute()
+
+
+def _release_tick(
+    campaign_id: str,
+    customer_id: Optional[str],
+    lock_token: Optional[str],
+):
+    # Only the lock this tick took; a newer tick may own it by now
+    if lock_token:
+        release_campaign_lock(campaign_id, lock_token)
+    if customer_id:
+        release_in_flight(customer_id)
+
+
+def _send_finished(
+    campaign_id: str,
+    customer_id: Optional[str],
+    lock_token: Optional[str],
+):
+    """
+    Releases the tick once its last send job is done.
+    """
+    key = _tick_key(campaign_id, lock_token)
+    if redis_client.decr(key, 1) <= 0:
+        redis_client.delete(key)
+        _release_tick(campaign_id, customer_id, lock_token)
+
+
+# --------------------------------------------------
+# Send routing (sending.<shard>)
+# --------------------------------------------------
+
+def dispatch_send(
+    task,
+    args: List,
+    kwargs: Dict[str, Any],
+    account_id: str,
+    *,
+    eta: Optional[str] = None,
+    countdown: Optional[float] = None,
+):
+    """
+    Publishes a send task to the shard owning the account.
+
+    With no shard alive the send is parked on the scheduling queue and
+    routed again after SHARD_RETRY_SECONDS, never left on a queue that
+    nobody consumes.
+    """
+    try:
+        queue = send_queue_for(account_id)
+    except NoLiveShards:
+        logger.warning(
+            "No live sending shard for account {}, retrying in {}s",
+            account_id,
+            SHARD_RETRY_SECONDS,
+        )
+        route_send.apply_async(
+            args=[task.name, args, kwargs, account_id],
+            kwargs={"eta": eta},
+            countdown=max(countdown or 0, SHARD_RETRY_SECONDS),
+        )
+        return
+
+    task.apply_async(
+        args=args,
+        kwargs=kwargs,
+        eta=datetime.fromisoformat(eta) if eta else None,
+        countdown=countdown,
+        queue=queue,
+    )
+
+
+@celery_app.task(name="app.workers.tasks.route_send")
+def route_send(
+    task_name: str,
+    args: List,
+    kwargs: Dict[str, Any],
+    account_id: str,
+    eta: Optional[str] = None,
+):
+    dispatch_send(celery_app.tasks[task_name], args, kwargs, account_id, eta=eta)
+
+
+# --------------------------------------------------
+# Scheduling queue
+# --------------------------------------------------
+
+@celery_app.task(name="app.workers.tasks.run_campaign_tick")
+def run_campaign_tick(
+    campaign_id: str,
+    customer_id: Optional[str] = None,
+    scheduled_for: Optional[str] = None,
+    lock_token: Optional[str] = None,
+):
+    """
+    Plans one campaign tick and fans its sends out to the sending shard
+    that owns each account.
+
+    The campaign lock (``lock_token``) and the customer's in-flight slot
+    are held until the tick's last send job finishes. The tick counts
+    itself as one open send while it fans out, so sends that finish
+    early cannot release it, and a fan-out that fails part way releases
+    once the sends it did dispatch are done.
+
+    A redelivered tick (acks_late) for the same ``scheduled_for`` is not
+    planned again.
+    """
+    from app.workers.telegram_worker import run_campaign_once
+
+    tick_id = scheduled_for or lock_token
+    previous = _begin_tick(campaign_id, tick_id)
+    if previous is not None:
+        logger.warning(
+            "Campaign {} tick {} already ran ({})", campaign_id, tick_id, previous
+        )
+        if previous == "planning":
+            # The first delivery died during its fan-out; drop its share
+            _send_finished(campaign_id, customer_id, lock_token)
+        return
+
+    _tick_add(campaign_id, lock_token)
+    jobs = []
+    try:
+        planning = run_campaign_once(
+            campaign_id,
+            scheduled_for=datetime.fromisoformat(scheduled_for)
+            if scheduled_for else None,
+        )
+        # Armed from /admin/profiles/campaigns/{id}: profile this tick once
+        if take_campaign_profile(campaign_id):
+            planning = profile_coroutine(planning, "tick", campaign_id)
+
+        with span("campaign.plan", campaign_id=campaign_id), \
+                track_queries(f"tick {campaign_id}") as stats:
+            jobs = run_async(planning)
+
+        logger.debug(
+            "Campaign {} tick ran {} queries in {:.1f} ms",
+            campaign_id,
+            stats.count,
+            stats.seconds * 1000,
+        )
+
+        for job in jobs:
+            # Counted first: the send may finish before dispatch returns
+            _tick_add(campaign_id, lock_token)
+            try:
+                dispatch_send(
+                    send_to_group,
+                    [job["campaign_id"], job["account_id"], job["group_id"]],
+                    {
+                        "customer_id": customer_id,
+                        "lock_token": lock_token,
+                        "window": job["window"],
+                        "period": job["period"],
+                    },
+                    job["account_id"],
+                    eta=job["eta"],
+                )
+            except Exception:
+                redis_client.decr(_tick_key(campaign_id, lock_token), 1)
+                raise
+
+        logger.info("Campaign {} tick planned {} sends", campaign_id, len(jobs))
+
+    finally:
+        _end_tick(campaign_id, tick_id)
+        # The tick's own share; releases now if no send is open
+        _send_finished(campaign_id, customer_id, lock_token)
+
+
+# --------------------------------------------------
+# Sending queue
+# --------------------------------------------------
+
+@celery_app.task(name="app.workers.tasks.send_to_group")
+def send_to_group(
+    campaign_id: str,
+    account_id: str,
+    group_id: str,
+    customer_id: Optional[str] = None,
+    window: Optional[int] = None,
+    period: Optional[int] = None,
+    lock_token: Optional[str] = None,
+):
+    from app.workers.telegram_worker import send_campaign_message
+
+    requeued = False
+    try:
+        with span(
+            "campaign.send",
+            campaign_id=campaign_id,
+            account_id=account_id,
+            group_id=group_id,
+        ), track_queries(f"send {campaign_id}"):
+            payload = run_async(
+                send_campaign_message(
+                    campaign_id,
+                    account_id,
+                    group_id,
+                    window=window,
+                    period=period,
+                )
+            )
+        if payload and payload["status"] == "paced":
+            # Still part of the tick: the counter is not decremented
+            dispatch_send(
+                send_to_group,
+                [campaign_id, account_id, group_id],
+                {
+                    "customer_id": customer_id,
+                    "lock_token": lock_token,
+                    "window": window,
+                    "period": period,
+                },
+                account_id,
+                countdown=payload["retry_after"],
+            )
+            requeued = True
+        elif payload:
+            persist_message_log.delay(payload)
+
+    finally:
+        if not requeued:
+            _send_finished(campaign_id, customer_id, lock_token)
+
+
+@celery_app.task(name="app.workers.tasks.send_job")
+def send_job(job: Dict[str, Any], paced: bool = True):
+    """
+    Sends a prebuilt job from CampaignScheduler (raw session + target).
+
+    If the account's next slot is in the future, the job re-queues itself
+    for that slot instead of waiting.
+    """
+    from app.services.telegram.account_lane import account_lane
+    from app.services.telegram.client import TelegramClientWrapper
+    from app.services.telegram.sender import TelegramSender
+
+    sender = TelegramSender(
+        client_wrapper=TelegramClientWrapper(
+            session_name=job["session_name"],
+            api_id=job["api_id"],
+            api_hash=job["api_hash"],
+        ),
+        account_id=str(job["account_id"]),
+    )
+
+    async def _send():
+        async with account_lane(str(job["account_id"])):
+            return await sender.send_message(
+                entity=job["target"],
+                message=job["message"],
+                paced=paced,
+            )
+
+    result = run_async(_send())
+
+    if result.error == "PACED":
+        dispatch_send(
+            send_job,
+            [job],
+            {"paced": False},
+            str(job["account_id"]),
+            countdown=result.retry_after,
+        )
+        return
+
+    if result.flood_wait:
+        from app.workers.telegram_worker import health_monitor
+        health_monitor.record_floodwait(str(job["account_id"]), result.flood_wait)
+
+    persist_message_log.delay({
+        "account_id": job["account_id"],
+        "target": job["target"],
+        "message_text": job["message"],
+        "status": "sent" if result.success else "failed",
+        "error_code": result.error,
+        "flood_wait_seconds": result.flood_wait,
+        "sent_at": result.timestamp.replace(tzinfo=timezone.utc).isoformat(),
+    })
+
+
+# --------------------------------------------------
+# Logs queue
+# --------------------------------------------------
+
+@celery_app.task(name="app.workers.tasks.persist_message_log")
+def persist_message_log(payload: Dict[str, Any]):
+    db = SessionLocal()
+
+    try:
+        db.add(MessageLog(
+            campaign_id=payload.get("campaign_id"),
+            account_id=payload.get("account_id"),
+            group_id=payload.get("group_id"),
+            target=payload["target"],
+            message_text=payload.get("message_text"),
+            status=payload["status"],
+            error_code=payload.get("error_code"),
+            flood_wait_seconds=payload.get("flood_wait_seconds"),
+            sent_at=datetime.fromisoformat(payload["sent_at"]),
+        ))
+        with span("db.commit", table="message_logs"):
+            db.commit()
+
+    finally:
+        db.close()
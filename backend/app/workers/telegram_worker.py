@@ -1,27 +1,51 @@
 import asyncio
-import random
+import time
 from datetime import datetime, timezone
+from typing import List, Optional
 
 from loguru import logger
-from sqlalchemy.orm import Session
-from telethon.errors import FloodWaitError, RPCError
+from sqlalchemy.orm import Session, joinedload
+from telethon.errors import (
+    AuthKeyUnregisteredError,
+    ChatWriteForbiddenError,
+    FloodWaitError,
+    RPCError,
+    UserBannedInChannelError,
+    UserDeactivatedBanError,
+    UserDeactivatedError,
+)
 
 from app.core.db import SessionLocal
+from app.core.logging import sampled, throttled
+from app.core.metrics import LIMITER_DENIALS, SEND_SECONDS
+from app.core.tracing import span
+from app.core.redis import redis_client
 from app.models.models import (
     Campaign,
     TelegramAccount,
     TelegramGroup,
-    MessageLog,
-    MarketList,
     CampaignGroup,
 )
+from app.services.telegram.account_lane import account_lane
 from app.services.telegram.client import TelegramClientWrapper
+from app.services.telegram.client_pool import client_pool
+from app.services.telegram.health import AccountHealthMonitor
+from app.services.telegram.sender import TelegramSendResult
+from app.services.campaigns import send_journal
 from app.services.campaigns.message_variator import MessageVariator
+from app.services.campaigns.group_rotation import next_groups
+from app.services.campaigns.spreading import run_period_seconds
 from app.services.pricing.enforcement import (
     validate_campaign_against_plan,
 )
 from app.workers.warmup import apply_warmup
 from app.services.pricing.plans import get_plan
+from app.services.rate_limit.account_pacing import (
+    next_send_at,
+    paced_wait,
+    record_send_time,
+    reserve_send_slot,
+)
 from app.services.rate_limit.account_limiter import (
     can_send_message,
     record_message_sent,
@@ -32,88 +56,286 @@ from app.services.rate_limit.campaign_limiter import (
 )
 
 
+# Spacing between two sends of the same account
 MIN_DELAY = 45
 MAX_DELAY = 120
+# Sends are planned at most this far ahead of now
+MAX_DEFER_SECONDS = 15 * 60
+
+health_monitor = AccountHealthMonitor(redis_client)
 
 
 # --------------------------------------------------
 # Single-account send
 # --------------------------------------------------
 
+async def _send(client, entity, message: str):
+    with span("telegram.resolve_entity", entity=entity):
+        peer = await client.get_input_entity(entity)
+    with span("telegram.send_message", entity=entity):
+        await client.send_message(entity=peer, message=message)
+
+
 async def send_with_account(
     *,
     account: TelegramAccount,
-    campaign: Campaign,
     group: TelegramGroup,
-    db: Session,
-):
-    wrapper = TelegramClientWrapper(
-        session_name=account.session_name,
-        api_id=account.api_id,
-        api_hash=account.api_hash,
-    )
-
-    variator = MessageVariator()
+    message: str,
+) -> TelegramSendResult:
+    entity = group.username or group.telegram_id
+    started = time.perf_counter()
 
-    async with wrapper as client:
-        try:
-            final_message = variator.vary(campaign.message)
+    def observe(outcome: str):
+        SEND_SECONDS.labels(outcome).observe(time.perf_counter() - started)
 
-            await client.send_message(
-                entity=group.username or group.invite_link,
-                message=final_message,
+    try:
+        if client_pool.enabled:
+            client = await client_pool.get(
+                account_id=str(account.id),
+                session_name=account.session_name,
+                api_id=account.api_id,
+                api_hash=account.api_hash,
+            )
+            await _send(client, entity, message)
+        else:
+            wrapper = TelegramClientWrapper(
+                session_name=account.session_name,
+                api_id=account.api_id,
+                api_hash=account.api_hash,
             )
+            async with wrapper as client:
+                await _send(client, entity, message)
+
+        observe("sent")
+        logger.debug("[{}] → {}", account.phone_number, group.title)
+        return TelegramSendResult(success=True)
+
+    except FloodWaitError as e:
+        # Park the account instead of sleeping on the open client
+        observe("flood_wait")
+        logger.warning("[{}] FloodWait {}s", account.phone_number, e.seconds)
+        await asyncio.to_thread(
+            health_monitor.record_floodwait, str(account.id), e.seconds
+        )
+        return TelegramSendResult(
+            success=False,
+            error="FLOOD_WAIT",
+            flood_wait=e.seconds,
+        )
+
+    except (ChatWriteForbiddenError, UserBannedInChannelError):
+        observe("write_forbidden")
+        logger.warning(
+            "[{}] Write forbidden in {}", account.phone_number, group.title
+        )
+        await asyncio.to_thread(
+            health_monitor.record_write_forbidden, str(account.id), str(group.id)
+        )
+        return TelegramSendResult(success=False, error="WRITE_FORBIDDEN")
+
+    except (
+        UserDeactivatedBanError,
+        UserDeactivatedError,
+        AuthKeyUnregisteredError,
+    ):
+        observe("banned")
+        await asyncio.to_thread(health_monitor.record_ban, str(account.id))
+        await client_pool.evict(str(account.id))
+        return TelegramSendResult(success=False, error="ACCOUNT_BANNED")
+
+    except RPCError as e:
+        observe("rpc_error")
+        logger.exception("[{}] Telegram RPC error", account.phone_number)
+        await client_pool.evict(str(account.id))
+        return TelegramSendResult(success=False, error=type(e).__name__)
+
+    except Exception:
+        observe("error")
+        logger.exception("[{}] Unexpected error", account.phone_number)
+        await client_pool.evict(str(account.id))
+        return TelegramSendResult(success=False, error="UNKNOWN_ERROR")
+
+
+# --------------------------------------------------
+# One send job (sending queue)
+# --------------------------------------------------
+
+def _load_send(db: Session, campaign_id, account_id, group_id):
+    return (
+        db.get(Campaign, campaign_id),
+        db.get(TelegramAccount, account_id),
+        db.get(TelegramGroup, group_id),
+    )
+
 
-            account.last_used_at = datetime.now(timezone.utc)
+def _lane_checks(account_id: str):
+    # The planned eta is not a guarantee: a backed-up queue, a restarted
+    # shard or a redelivery can bring jobs together
+    return paced_wait(account_id, MIN_DELAY), health_monitor.is_available(account_id)
+
+
+def _settle_journal(account_id: str, journal_key: Optional[str], result):
+    record_send_time(account_id)
+
+    if journal_key:
+        if result.success:
+            send_journal.confirm(journal_key)
+        elif result.error != send_journal.UNKNOWN_OUTCOME:
+            # Telegram refused it, nothing was posted
+            send_journal.release(journal_key)
+
+
+def _finish_send(db: Session, campaign, account, group, message: str, result) -> dict:
+    payload = {
+        "campaign_id": str(campaign.id),
+        "account_id": str(account.id),
+        "group_id": str(group.id),
+        "target": str(group.username or group.telegram_id),
+        "message_text": message,
+        "status": (
+            "sent" if result.success
+            else "skipped" if result.error in ("ACCOUNT_UNAVAILABLE", "DUPLICATE")
+            else "failed"
+        ),
+        "error_code": result.error,
+        "flood_wait_seconds": result.flood_wait,
+        "sent_at": result.timestamp.replace(tzinfo=timezone.utc).isoformat(),
+    }
+
+    if result.success:
+        # --------------------------------------
+        # RECORD SUCCESS (REDIS)
+        # --------------------------------------
+        record_message_sent(
+            account_id=str(account.id)
+        )
+        record_campaign_send(
+            str(campaign.id),
+            interval_minutes=campaign.interval_minutes,
+        )
 
-            log = MessageLog(
-                campaign_id=campaign.id,
-                telegram_account_id=account.id,
-                telegram_group_id=group.id,
-                sent_at=datetime.now(timezone.utc),
+        # One line per send does not scale; keep a sample
+        if sampled():
+            logger.info(
+                "Campaign {} → {} via {} (sampled)",
+                campaign.id,
+                group.username,
+                account.phone_number,
             )
 
-            db.add(log)
+        account.last_used_at = datetime.now(timezone.utc)
+        with span("db.commit"):
             db.commit()
 
-            logger.success(
-                f"[{account.phone_number}] → {group.title}"
-            )
+    return payload
 
-        except FloodWaitError as e:
-            logger.warning(
-                f"[{account.phone_number}] FloodWait {e.seconds}s"
-            )
-            await asyncio.sleep(e.seconds + 10)
 
-        except RPCError:
-            logger.exception(
-                f"[{account.phone_number}] Telegram RPC error"
-            )
+async def send_campaign_message(
+    campaign_id,
+    account_id,
+    group_id,
+    *,
+    window: Optional[int] = None,
+    period: Optional[int] = None,
+) -> Optional[dict]:
+    """
+    Sends one campaign message and returns the MessageLog payload.
+
+    With a schedule window the send is journaled, so a retried or
+    redelivered job for the same window does not post again.
+
+    A job that reaches the account less than MIN_DELAY after its last
+    send returns {"status": "paced", "retry_after": seconds} instead; the
+    caller re-queues it.
+
+    Database and Redis work runs in the loop's executor; only the
+    Telegram I/O runs on the shared loop.
+    """
+    db: Session = SessionLocal()
 
-        except Exception:
-            logger.exception(
-                f"[{account.phone_number}] Unexpected error"
+    try:
+        campaign, account, group = await asyncio.to_thread(
+            _load_send, db, campaign_id, account_id, group_id
+        )
+
+        if not campaign or not account or not group:
+            logger.error(
+                f"Send job references missing rows "
+                f"campaign={campaign_id} account={account_id} group={group_id}"
             )
+            return None
+
+        message = MessageVariator().vary(campaign.message_template)
+        journal_key = (
+            send_journal.journal_key(str(campaign.id), str(group.id), window)
+            if window is not None else None
+        )
+
+        # One Telethon client per account at a time, cluster-wide
+        async with account_lane(str(account.id)):
+            wait, available = await asyncio.to_thread(_lane_checks, str(account.id))
+
+            # Parked (FloodWait) or paused since the tick was planned
+            if not available:
+                LIMITER_DENIALS.labels("account_unavailable").inc()
+                result = TelegramSendResult(
+                    success=False,
+                    error="ACCOUNT_UNAVAILABLE",
+                )
+            elif wait > 1:
+                LIMITER_DENIALS.labels("account_paced").inc()
+                return {"status": "paced", "retry_after": wait}
+            elif journal_key and not await asyncio.to_thread(
+                send_journal.reserve, journal_key, period or 0
+            ):
+                result = TelegramSendResult(success=False, error="DUPLICATE")
+            else:
+                result = await send_with_account(
+                    account=account,
+                    group=group,
+                    message=message,
+                )
+                await asyncio.to_thread(
+                    _settle_journal, str(account.id), journal_key, result
+                )
+
+        return await asyncio.to_thread(
+            _finish_send, db, campaign, account, group, message, result
+        )
+
+    finally:
+        await asyncio.to_thread(db.close)
 
 
 # --------------------------------------------------
 # Campaign execution (single safe tick)
 # --------------------------------------------------
 
-async def run_campaign_once(campaign_id):
+async def run_campaign_once(campaign_id, *, scheduled_for=None) -> List[dict]:
+    """
+    Plans one campaign tick and returns its send jobs.
+
+    The sends themselves run as separate jobs on the sending queue.
+    Planning is database and Redis work only, so it runs in the loop's
+    executor instead of on the shared loop.
+    """
+    return await asyncio.to_thread(_plan_tick, campaign_id, scheduled_for)
+
+
+def _plan_tick(campaign_id, scheduled_for) -> List[dict]:
     db: Session = SessionLocal()
 
     try:
         campaign = (
             db.query(Campaign)
+            .options(joinedload(Campaign.customer))
             .filter(Campaign.id == campaign_id)
             .first()
         )
 
         if not campaign:
             logger.error("Campaign not found")
-            return
+            return []
 
         customer = campaign.customer
 
@@ -129,15 +351,15 @@ async def run_campaign_once(campaign_id):
 
         # --------------------------------------------------
         # Campaign interval check (REDIS)
+        # Scheduled ticks are already spaced by next_run_at
         # --------------------------------------------------
-        if not campaign_interval_passed(
+        if scheduled_for is None and not campaign_interval_passed(
             campaign_id=str(campaign.id),
             interval_minutes=campaign.interval_minutes,
         ):
-            logger.debug(
-                f"Campaign {campaign.id} still in cooldown"
-            )
-            return
+            LIMITER_DENIALS.labels("campaign_interval").inc()
+            logger.debug("Campaign {} still in cooldown", campaign.id)
+            return []
 
         # --------------------------------------------------
         # Load dedicated Telegram accounts
@@ -157,80 +379,110 @@ async def run_campaign_once(campaign_id):
 
         if not accounts:
             logger.warning("No usable Telegram accounts")
-            return
+            return []
 
         # --------------------------------------------------
-        # Load campaign groups (markets)
+        # ACCOUNT HEALTH + PACING + DAILY ACCOUNT LIMIT (REDIS)
         # --------------------------------------------------
-        groups = (
-            db.query(TelegramGroup)
-            .join(CampaignGroup)
-            .filter(CampaignGroup.campaign_id == campaign.id)
-            .all()
+        # Parked after FloodWait, paused or banned: one round trip for all
+        available = set(
+            health_monitor.available(str(account.id) for account in accounts)
         )
 
-        if not groups:
-            logger.warning("Campaign has no target groups")
-            return
+        usable = []
+        for account in accounts:
+            if str(account.id) not in available:
+                LIMITER_DENIALS.labels("account_unavailable").inc()
+                continue
 
-        random.shuffle(groups)
+            # Paced too far out: leave it to a later tick
+            eligible_at = next_send_at(str(account.id))
+            if eligible_at and eligible_at - time.time() > MAX_DEFER_SECONDS:
+                LIMITER_DENIALS.labels("account_paced").inc()
+                continue
 
-        # --------------------------------------------------
-        # Dispatch sends (SEQUENTIAL PER TICK — SAFE)
-        # --------------------------------------------------
-        for account in accounts:
-            # DAILY ACCOUNT LIMIT (REDIS)
             if not can_send_message(
                 account_id=str(account.id),
                 daily_limit=plan.daily_messages_per_account,
             ):
-                logger.info(
-                    f"Account {account.phone_number} exhausted for today"
-                )
+                LIMITER_DENIALS.labels("account_daily_limit").inc()
+                if throttled(f"exhausted:{account.id}", 3600) is not None:
+                    logger.info(
+                        "Account {} exhausted for today", account.phone_number
+                    )
                 continue
+            usable.append(account)
 
-            group = groups.pop(0) if groups else None
-            if not group:
-                break
+        if not usable:
+            return []
 
-            apply_warmup(account)
-            db.commit()
-
-            try:
-                await send_with_account(
-                    account=account,
-                    campaign=campaign,
-                    group=group,
-                    db=db,
-                )
+        # --------------------------------------------------
+        # Next groups of the coverage cycle (markets)
+        # --------------------------------------------------
+        group_ids = next_groups(
+            str(campaign.id),
+            len(usable),
+            lambda: [
+                row.group_id
+                for row in db.query(CampaignGroup.group_id)
+                .filter(CampaignGroup.campaign_id == campaign.id)
+            ],
+        )
 
-                # --------------------------------------
-                # RECORD SUCCESS (REDIS)
-                # --------------------------------------
-                record_message_sent(
-                    account_id=str(account.id)
-                )
-                record_campaign_send(
-                    str(campaign.id)
+        if not group_ids:
+            logger.warning("Campaign has no target groups")
+            return []
+
+        # Groups detached since the cycle started are dropped here
+        groups_by_id = {
+            str(group.id): group
+            for group in (
+                db.query(TelegramGroup)
+                .join(CampaignGroup)
+                .filter(
+                    CampaignGroup.campaign_id == campaign.id,
+                    TelegramGroup.id.in_(group_ids),
                 )
+                .all()
+            )
+        }
+        groups = [groups_by_id[gid] for gid in group_ids if gid in groups_by_id]
 
-                account.last_used_at = datetime.now(timezone.utc)
-                db.commit()
+        # --------------------------------------------------
+        # Plan sends (one job per account, at its next slot)
+        # --------------------------------------------------
+        jobs = []
 
-                logger.success(
-                    f"Campaign {campaign.id} → "
-                    f"{group.username} via {account.phone_number}"
-                )
+        # Identifies this tick in the send journal
+        period = run_period_seconds(
+            campaign.interval_minutes,
+            plan.min_interval_minutes,
+        )
+        window = send_journal.schedule_window(
+            (scheduled_for or datetime.now(timezone.utc)).timestamp(),
+            period,
+        )
 
-            except Exception:
-                logger.exception(
-                    f"Send failed for account {account.phone_number}"
-                )
+        for account, group in zip(usable, groups):
+            apply_warmup(account)
 
-            # Randomized delay between sends
-            await asyncio.sleep(
-                random.randint(MIN_DELAY, MAX_DELAY)
+            slot = reserve_send_slot(
+                str(account.id),
+                min_gap=MIN_DELAY,
+                max_gap=MAX_DELAY,
             )
 
+            jobs.append({
+                "campaign_id": str(campaign.id),
+                "account_id": str(account.id),
+                "group_id": str(group.id),
+                "eta": datetime.fromtimestamp(slot, tz=timezone.utc).isoformat(),
+                "window": window,
+                "period": period,
+            })
+
+        db.commit()
+        return jobs
+
     finally:
         db.close()
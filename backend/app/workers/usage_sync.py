@@ -0,0 +1,221 @@
+"""
+Write-behind of per-account daily counters into
+telegram_account_daily_usage.
+
+    python -m app.workers.usage_sync
+    python -m app.workers.usage_sync --rehydrate-only
+
+Sends bump sent:{date} in acct:{id}:limits and mark the account in
+`usage:dirty`. Every USAGE_SYNC_SECONDS the dirty set is swapped out and
+today's and yesterday's counts of those accounts are upserted in one
+INSERT ... ON CONFLICT. Counts never go down in the table, so a flushed
+Redis cannot erase history.
+
+On start the counters are rehydrated from the table, so a Redis restart
+does not reset the daily limits.
+
+The same loop settles stale send journal entries against message_logs
+every JOURNAL_RECONCILE_SECONDS (app.services.campaigns.send_journal).
+"""
+import argparse
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List, Tuple
+
+import redis
+from loguru import logger
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.db import SessionLocal
+from app.core.logging import setup_logging
+from app.core.redis import redis_client
+from app.models.models import TelegramAccount, TelegramAccountDailyUsage
+from app.services.campaigns import send_journal
+from app.services.rate_limit.account_limiter import (
+    LIMITS_TTL_SECONDS,
+    USAGE_DIRTY_KEY,
+    daily_field,
+    limits_key,
+)
+
+
+USAGE_SYNC_SECONDS = float(os.getenv("USAGE_SYNC_SECONDS", "5"))
+JOURNAL_RECONCILE_SECONDS = float(os.getenv("JOURNAL_RECONCILE_SECONDS", "60"))
+
+# Taken from usage:dirty for the pass in progress; a pass that dies
+# leaves it behind and the next one finishes it
+USAGE_SYNCING_KEY = "usage:syncing"
+
+
+# KEYS: limits   ARGV: field, value, ttl
+_RAISE_TO = redis_client.register_script("""
+local current = tonumber(redis.call('hget', KEYS[1], ARGV[1]) or '0')
+if tonumber(ARGV[2]) > current then
+    redis.call('hset', KEYS[1], ARGV[1], ARGV[2])
+    redis.call('expire', KEYS[1], ARGV[3])
+end
+return current
+""")
+
+
+def _days():
+    today = datetime.now(timezone.utc).date()
+    # Yesterday too, for sends just before midnight
+    return [today, today - timedelta(days=1)]
+
+
+def _take_dirty() -> List[str]:
+    if not redis_client.exists(USAGE_SYNCING_KEY):
+        try:
+            redis_client.rename(USAGE_DIRTY_KEY, USAGE_SYNCING_KEY)
+        except redis.ResponseError:
+            # No account sent anything since the last pass
+            return []
+
+    return [member.decode() for member in redis_client.smembers(USAGE_SYNCING_KEY)]
+
+
+def _read_counts(account_ids: List[str]) -> List[Tuple[uuid.UUID, object, int]]:
+    days = _days()
+
+    pipe = redis_client.pipeline(transaction=False)
+    for account_id in account_ids:
+        pipe.hmget(limits_key(account_id), [daily_field(day) for day in days])
+
+    rows = []
+    for account_id, values in zip(account_ids, pipe.execute()):
+        try:
+            account_uuid = uuid.UUID(account_id)
+        except ValueError:
+            # Benchmark accounts have no row
+            continue
+        for day, value in zip(days, values):
+            if value is not None:
+                rows.append((account_uuid, day, int(value)))
+
+    return rows
+
+
+def sync_once() -> int:
+    account_ids = _take_dirty()
+    if not account_ids:
+        return 0
+
+    rows = _read_counts(account_ids)
+    db = SessionLocal()
+
+    try:
+        if rows:
+            known = {
+                row.id
+                for row in db.query(TelegramAccount.id).filter(
+                    TelegramAccount.id.in_({account_id for account_id, _, _ in rows})
+                )
+            }
+            rows = [row for row in rows if row[0] in known]
+
+        if rows:
+            now = datetime.now(timezone.utc)
+            statement = insert(TelegramAccountDailyUsage).values([
+                {
+                    "id": uuid.uuid4(),
+                    "telegram_account_id": account_id,
+                    "usage_date": day,
+                    "messages_sent": sent,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for account_id, day, sent in rows
+            ])
+            table = TelegramAccountDailyUsage.__table__
+            db.execute(statement.on_conflict_do_update(
+                index_elements=[table.c.telegram_account_id, table.c.usage_date],
+                set_={
+                    "messages_sent": func.greatest(
+                        table.c.messages_sent,
+                        statement.excluded.messages_sent,
+                    ),
+                    "updated_at": statement.excluded.updated_at,
+                },
+            ))
+            db.commit()
+
+    finally:
+        db.close()
+
+    redis_client.delete(USAGE_SYNCING_KEY)
+
+    logger.debug(
+        "Synced {} usage rows for {} accounts", len(rows), len(account_ids)
+    )
+    return len(rows)
+
+
+def rehydrate() -> int:
+    """
+    Raises Redis counters to the persisted values; never lowers them.
+    """
+    db = SessionLocal()
+
+    try:
+        rows = (
+            db.query(TelegramAccountDailyUsage)
+            .filter(TelegramAccountDailyUsage.usage_date.in_(_days()))
+            .all()
+        )
+    finally:
+        db.close()
+
+    pipe = redis_client.pipeline(transaction=False)
+    for row in rows:
+        _RAISE_TO(
+            keys=[limits_key(str(row.telegram_account_id))],
+            args=[daily_field(row.usage_date), row.messages_sent or 0, LIMITS_TTL_SECONDS],
+            client=pipe,
+        )
+    restored = pipe.execute()
+
+    logger.info("Rehydrated {} daily usage counters", len(restored))
+    return len(restored)
+
+
+def run(rehydrate_only: bool = False):
+    setup_logging("usage-sync")
+    rehydrate()
+
+    if rehydrate_only:
+        return
+
+    logger.info("Usage write-behind every {}s", USAGE_SYNC_SECONDS)
+    last_reconcile = 0.0
+
+    while True:
+        started = time.monotonic()
+        try:
+            sync_once()
+        except Exception:
+            logger.exception("Usage sync error")
+
+        if started - last_reconcile >= JOURNAL_RECONCILE_SECONDS:
+            last_reconcile = started
+            try:
+                send_journal.reconcile()
+            except Exception:
+                logger.exception("Send journal reconcile error")
+
+        time.sleep(max(USAGE_SYNC_SECONDS - (time.monotonic() - started), 0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Daily usage write-behind")
+    parser.add_argument("--rehydrate-only", action="store_true")
+    args = parser.parse_args()
+
+    run(rehydrate_only=args.rehydrate_only)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+import fakeredis
+import pytest
+
+
+@pytest.fixture
+def fake_redis():
+    client = fakeredis.FakeRedis()
+    yield client
+    client.flushall()
@@ -0,0 +1,34 @@
+import time
+
+import pytest
+
+from app.services.rate_limit import account_pacing
+from app.services.rate_limit.account_limiter import limits_key
+from app.services.rate_limit.account_pacing import paced_wait, record_send_time
+
+
+@pytest.fixture
+def pacing(fake_redis, monkeypatch):
+    monkeypatch.setattr(account_pacing, "redis_client", fake_redis)
+    return fake_redis
+
+
+def test_an_account_that_never_sent_is_not_paced(pacing):
+    assert paced_wait("acct", 45) == 0.0
+
+
+def test_a_send_paces_the_next_one(pacing):
+    record_send_time("acct")
+
+    assert 44 < paced_wait("acct", 45) <= 45
+    assert paced_wait("other", 45) == 0.0
+
+
+def test_the_gap_counts_from_the_actual_send(pacing):
+    pacing.hset(limits_key("acct"), "last_sent_at", time.time() - 30)
+
+    assert 14 < paced_wait("acct", 45) <= 15
+
+    pacing.hset(limits_key("acct"), "last_sent_at", time.time() - 60)
+
+    assert paced_wait("acct", 45) == 0.0
@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+
+from app.workers import tasks, telegram_worker
+from app.workers.tasks import run_campaign_tick, send_to_group
+
+
+SCHEDULED_FOR = "2026-03-01T12:00:00+00:00"
+
+
+def job(i: int) -> dict:
+    return {
+        "campaign_id": "c",
+        "account_id": f"a{i}",
+        "group_id": f"g{i}",
+        "eta": SCHEDULED_FOR,
+        "window": 1,
+        "period": 900,
+    }
+
+
+@pytest.fixture
+def tick(fake_redis, monkeypatch):
+    released = []
+    dispatched = []
+    state = {"jobs": [], "fail_at": None}
+
+    async def plan(campaign_id, *, scheduled_for=None):
+        return state["jobs"]
+
+    def dispatch(task, args, kwargs, account_id, **_):
+        if len(dispatched) == state["fail_at"]:
+            raise RuntimeError("broker down")
+        dispatched.append((args, kwargs))
+
+    monkeypatch.setattr(tasks, "redis_client", fake_redis)
+    monkeypatch.setattr(tasks, "run_async", asyncio.run)
+    monkeypatch.setattr(tasks, "take_campaign_profile", lambda campaign_id: False)
+    monkeypatch.setattr(tasks, "dispatch_send", dispatch)
+    monkeypatch.setattr(tasks, "release_campaign_lock", lambda c, t: released.append(t))
+    monkeypatch.setattr(tasks, "release_in_flight", lambda customer_id: None)
+    monkeypatch.setattr(telegram_worker, "run_campaign_once", plan)
+
+    state.update(released=released, dispatched=dispatched)
+    return state
+
+
+def run(lock_token="token"):
+    run_campaign_tick("c", customer_id="cust", scheduled_for=SCHEDULED_FOR,
+                      lock_token=lock_token)
+
+
+def finish_send(args, kwargs):
+    tasks._send_finished(args[0], kwargs["customer_id"], kwargs["lock_token"])
+
+
+def test_tick_without_sends_releases_at_once(tick):
+    run()
+
+    assert tick["released"] == ["token"]
+
+
+def test_tick_releases_after_its_last_send(tick):
+    tick["jobs"] = [job(0), job(1)]
+    run()
+
+    assert tick["released"] == []
+    finish_send(*tick["dispatched"][0])
+    assert tick["released"] == []
+    finish_send(*tick["dispatched"][1])
+    assert tick["released"] == ["token"]
+
+
+def test_failed_fan_out_releases_once_dispatched_sends_finish(tick):
+    tick["jobs"] = [job(0), job(1), job(2)]
+    tick["fail_at"] = 1
+
+    with pytest.raises(RuntimeError):
+        run()
+
+    assert len(tick["dispatched"]) == 1
+    assert tick["released"] == []
+    finish_send(*tick["dispatched"][0])
+    assert tick["released"] == ["token"]
+
+
+def test_failed_fan_out_without_dispatched_sends_releases_at_once(tick):
+    tick["jobs"] = [job(0)]
+    tick["fail_at"] = 0
+
+    with pytest.raises(RuntimeError):
+        run()
+
+    assert tick["released"] == ["token"]
+
+
+def test_redelivered_tick_is_not_planned_again(tick):
+    tick["jobs"] = [job(0)]
+    run()
+    run()
+
+    assert len(tick["dispatched"]) == 1
+    assert tick["released"] == []
+    finish_send(*tick["dispatched"][0])
+    assert tick["released"] == ["token"]
+
+
+def test_redelivery_of_a_tick_that_died_mid_fan_out_drops_its_share(tick, fake_redis):
+    # What a delivery that died after one dispatch leaves behind
+    fake_redis.set(tasks._run_key("c", SCHEDULED_FOR), "planning")
+    fake_redis.set(tasks._tick_key("c", "token"), 2)
+
+    run()
+
+    assert tick["dispatched"] == []
+    assert tick["released"] == []
+    tasks._send_finished("c", "cust", "token")
+    assert tick["released"] == ["token"]
+
+
+def test_send_to_group_counts_as_finished(tick, monkeypatch):
+    async def send(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(telegram_worker, "send_campaign_message", send)
+    tick["jobs"] = [job(0)]
+    run()
+
+    args, kwargs = tick["dispatched"][0]
+    send_to_group(*args, **kwargs)
+
+    assert tick["released"] == ["token"]
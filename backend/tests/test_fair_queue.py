@@ -0,0 +1,57 @@
+from collections import Counter
+
+from app.services.campaigns.fair_queue import WeightedFairQueue
+
+
+def drain(queue, n):
+    return [queue.pop() for _ in range(n)]
+
+
+def test_serves_keys_in_proportion_to_their_weight():
+    queue = WeightedFairQueue()
+    for i in range(30):
+        queue.push("agency", f"a{i}", 2)
+        queue.push("solo", f"s{i}", 1)
+
+    served = Counter(key for key, _ in drain(queue, 30))
+
+    assert served == {"agency": 20, "solo": 10}
+
+
+def test_items_of_one_key_stay_in_order():
+    queue = WeightedFairQueue()
+    for i in range(5):
+        queue.push("customer", i, 1)
+
+    assert [item for _, item in drain(queue, 5)] == [0, 1, 2, 3, 4]
+
+
+def test_pop_skips_ineligible_keys():
+    queue = WeightedFairQueue()
+    queue.push("capped", "c1", 10)
+    queue.push("free", "f1", 1)
+
+    assert queue.pop(lambda key: key != "capped") == ("free", "f1")
+    assert queue.pop(lambda key: key != "capped") is None
+    assert len(queue) == 1
+
+
+def test_pop_on_empty_queue():
+    assert WeightedFairQueue().pop() is None
+
+
+def test_clear_drops_items_but_keeps_fairness_history():
+    queue = WeightedFairQueue()
+    queue.push("busy", "b1", 1)
+    queue.push("busy", "b2", 1)
+    queue.push("idle", "i1", 1)
+    assert queue.pop() == ("busy", "b1")
+
+    queue.clear()
+    assert len(queue) == 0
+
+    # Next pass: the customer served last time waits its turn
+    queue.push("busy", "b3", 1)
+    queue.push("idle", "i2", 1)
+    assert queue.pop() == ("idle", "i2")
+    assert queue.pop() == ("busy", "b3")
@@ -0,0 +1,91 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.models import TelegramAccount
+from app.workers.health_events import lift_expired_restrictions, restrict_accounts
+
+
+accounts = TelegramAccount.__table__
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    accounts.create(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def add_account(db, status: str) -> uuid.UUID:
+    account_id = uuid.uuid4()
+    db.execute(insert(accounts).values(
+        id=account_id,
+        phone_number=f"+1{account_id.int % 10**10}",
+        session_name=str(account_id),
+        api_id=1,
+        api_hash="hash",
+        account_type="shared",
+        status=status,
+    ))
+    return account_id
+
+
+def row(db, account_id: uuid.UUID):
+    return db.execute(
+        select(accounts).where(accounts.c.id == account_id)
+    ).one()
+
+
+def test_restricted_warming_account_goes_back_to_warming(db):
+    account_id = add_account(db, "warming")
+    restrict_accounts(db, [account_id], datetime.now(timezone.utc) - timedelta(seconds=1))
+
+    restricted = row(db, account_id)
+    assert restricted.status == "restricted"
+    assert restricted.pre_restriction_status == "warming"
+
+    assert lift_expired_restrictions(db) == 1
+
+    lifted = row(db, account_id)
+    assert lifted.status == "warming"
+    assert lifted.restricted_until is None
+    assert lifted.pre_restriction_status is None
+
+
+def test_a_second_restriction_keeps_the_original_status(db):
+    account_id = add_account(db, "warming")
+    now = datetime.now(timezone.utc)
+
+    restrict_accounts(db, [account_id], now + timedelta(minutes=5))
+    restrict_accounts(db, [account_id], now - timedelta(seconds=1))
+    lift_expired_restrictions(db)
+
+    assert row(db, account_id).status == "warming"
+
+
+def test_active_account_goes_back_to_active(db):
+    account_id = add_account(db, "active")
+    restrict_accounts(db, [account_id], datetime.now(timezone.utc) - timedelta(seconds=1))
+
+    lift_expired_restrictions(db)
+
+    assert row(db, account_id).status == "active"
+
+
+def test_restriction_still_running_is_kept(db):
+    account_id = add_account(db, "warming")
+    restrict_accounts(db, [account_id], datetime.now(timezone.utc) + timedelta(minutes=5))
+
+    assert lift_expired_restrictions(db) == 0
+    assert row(db, account_id).status == "restricted"
+
+
+def test_banned_account_is_not_restricted(db):
+    account_id = add_account(db, "banned")
+    restrict_accounts(db, [account_id], datetime.now(timezone.utc) + timedelta(minutes=5))
+
+    assert row(db, account_id).status == "banned"
@@ -0,0 +1,24 @@
+from app.core import logging as app_logging
+
+
+def test_throttle_table_stays_bounded(monkeypatch):
+    monkeypatch.setattr(app_logging, "THROTTLE_MAX_KEYS", 100)
+    monkeypatch.setattr(app_logging, "_throttle", {})
+
+    for n in range(1000):
+        assert app_logging.throttled(f"account:{n}", 3600) == 0
+
+    assert len(app_logging._throttle) <= 100
+    # The newest keys survive and are still throttled
+    assert app_logging.throttled("account:999", 3600) is None
+
+
+def test_expired_windows_are_evicted_first(monkeypatch):
+    monkeypatch.setattr(app_logging, "THROTTLE_MAX_KEYS", 10)
+    monkeypatch.setattr(app_logging, "_throttle", {})
+
+    app_logging.throttled("long", 3600)
+    for n in range(20):
+        app_logging.throttled(f"short:{n}", 0)
+
+    assert "long" in app_logging._throttle
@@ -0,0 +1,35 @@
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+from app.core import metrics
+
+
+def _gauges():
+    return (
+        metrics.REGISTRY.get_sample_value("db_pool_checked_out"),
+        metrics.REGISTRY.get_sample_value("db_pool_overflow"),
+    )
+
+
+def test_pool_gauges_follow_checkouts(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=QueuePool,
+        pool_size=1,
+        max_overflow=2,
+    )
+    metrics.instrument_pool(engine)
+    checked_out, _ = _gauges()
+
+    first = engine.connect()
+    second = engine.connect()
+    assert _gauges() == (checked_out + 2, 1)
+
+    # Back into the free slot; both connections stay open
+    second.close()
+    assert _gauges() == (checked_out + 1, 1)
+
+    # No free slot left, so the pool closes this one
+    first.close()
+    assert _gauges() == (checked_out, 0)
+    engine.dispose()
@@ -0,0 +1,19 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.core import query_stats
+
+
+def test_failed_statement_does_not_leave_a_timer_behind():
+    engine = create_engine("sqlite://")
+
+    with engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM missing_table"))
+        assert conn.info["query_started"] == []
+
+        with query_stats.track_queries("test") as stats:
+            conn.execute(text("SELECT 1"))
+        assert conn.info["query_started"] == []
+        assert stats.count == 1
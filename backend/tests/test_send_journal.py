@@ -0,0 +1,133 @@
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+import app.core.db
+from app.services.campaigns import send_journal
+from app.services.campaigns.send_journal import (
+    JOURNAL_PENDING_KEY,
+    JOURNAL_RECONCILE_AFTER_SECONDS,
+    UNKNOWN_OUTCOME,
+    journal_key,
+)
+
+
+PERIOD = 15 * 60
+
+
+class FakeSession:
+    def __init__(self, logs):
+        self.logs = logs
+
+    def query(self, *columns):
+        return self
+
+    def filter(self, *criteria):
+        return self
+
+    def all(self):
+        return self.logs
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def journal(fake_redis, monkeypatch):
+    monkeypatch.setattr(send_journal, "redis_client", fake_redis)
+    return fake_redis
+
+
+def stale_key(journal, campaign: str, group: str) -> str:
+    key = journal_key(campaign, group, 1)
+    assert send_journal.reserve(key, PERIOD)
+    journal.zadd(
+        JOURNAL_PENDING_KEY,
+        {key: time.time() - JOURNAL_RECONCILE_AFTER_SECONDS - 60},
+    )
+    return key
+
+
+def log(campaign: str, group: str, status: str, error_code=None):
+    return SimpleNamespace(
+        campaign_id=campaign,
+        group_id=group,
+        status=status,
+        error_code=error_code,
+        sent_at=datetime.now(timezone.utc),
+    )
+
+
+def test_reserve_admits_one_sender_per_window(journal):
+    key = journal_key("c", "g", 7)
+
+    assert send_journal.reserve(key, PERIOD)
+    assert not send_journal.reserve(key, PERIOD)
+    assert journal.get(key) == b"pending"
+    assert journal.zscore(JOURNAL_PENDING_KEY, key) is not None
+    assert 0 < journal.ttl(key) <= PERIOD + send_journal.JOURNAL_TTL_MARGIN_SECONDS
+
+
+def test_windows_are_independent(journal):
+    assert send_journal.reserve(journal_key("c", "g", 7), PERIOD)
+    assert send_journal.reserve(journal_key("c", "g", 8), PERIOD)
+
+
+def test_confirm_keeps_blocking_the_window(journal):
+    key = journal_key("c", "g", 7)
+    send_journal.reserve(key, PERIOD)
+
+    send_journal.confirm(key)
+
+    assert journal.get(key) == b"sent"
+    assert journal.zscore(JOURNAL_PENDING_KEY, key) is None
+    assert not send_journal.reserve(key, PERIOD)
+
+
+def test_release_reopens_the_window(journal):
+    key = journal_key("c", "g", 7)
+    send_journal.reserve(key, PERIOD)
+
+    send_journal.release(key)
+
+    assert journal.get(key) is None
+    assert send_journal.reserve(key, PERIOD)
+
+
+def test_reconcile_settles_stale_keys_from_message_logs(journal, monkeypatch):
+    sent = stale_key(journal, "c1", "g1")
+    failed = stale_key(journal, "c2", "g2")
+    unknown = stale_key(journal, "c3", "g3")
+    unlogged = stale_key(journal, "c4", "g4")
+    expired = stale_key(journal, "c5", "g5")
+    journal.delete(expired)
+
+    logs = [
+        log("c1", "g1", "sent"),
+        log("c2", "g2", "failed", "FLOOD_WAIT"),
+        log("c3", "g3", "failed", UNKNOWN_OUTCOME),
+    ]
+    monkeypatch.setattr(app.core.db, "SessionLocal", lambda: FakeSession(logs))
+
+    stats = send_journal.reconcile()
+
+    assert stats == {"confirmed": 1, "released": 1, "expired": 1, "unknown": 2}
+    assert journal.get(sent) == b"sent"
+    assert journal.get(failed) is None
+    # Possibly posted: still blocks the window until it expires
+    assert journal.get(unknown) == b"pending"
+    assert journal.get(unlogged) == b"pending"
+    assert journal.zcard(JOURNAL_PENDING_KEY) == 0
+
+
+def test_reconcile_leaves_recent_keys_alone(journal, monkeypatch):
+    key = journal_key("c", "g", 7)
+    send_journal.reserve(key, PERIOD)
+    monkeypatch.setattr(app.core.db, "SessionLocal", lambda: FakeSession([]))
+
+    stats = send_journal.reconcile()
+
+    assert sum(stats.values()) == 0
+    assert journal.zscore(JOURNAL_PENDING_KEY, key) is not None
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+from collections import Counter
+
+from app.workers import sharding
+from app.workers.sharding import ConsistentHashRing
+
+
+ACCOUNTS = [f"account-{i}" for i in range(20_000)]
+
+
+def owners(ring):
+    return {account: ring.lookup(account) for account in ACCOUNTS}
+
+
+def test_empty_ring():
+    ring = ConsistentHashRing()
+
+    assert len(ring) == 0
+    assert ring.lookup("account") is None
+
+
+def test_lookup_is_deterministic():
+    first = ConsistentHashRing(["s-0", "s-1", "s-2"])
+    second = ConsistentHashRing(["s-2", "s-0", "s-1"])
+
+    assert len(first) == 3
+    assert owners(first) == owners(second)
+
+
+def test_accounts_are_spread_over_all_shards():
+    shards = [f"s-{i}" for i in range(4)]
+    load = Counter(owners(ConsistentHashRing(shards)).values())
+
+    assert set(load) == set(shards)
+    mean = len(ACCOUNTS) / len(shards)
+    assert all(0.7 * mean < n < 1.3 * mean for n in load.values())
+
+
+def test_removing_a_shard_only_moves_its_accounts():
+    ring = ConsistentHashRing(["s-0", "s-1", "s-2", "s-3"])
+    before = owners(ring)
+
+    ring.remove("s-1")
+    after = owners(ring)
+
+    assert len(ring) == 3
+    for account, owner in before.items():
+        if owner == "s-1":
+            assert after[account] != "s-1"
+        else:
+            assert after[account] == owner
+
+
+def test_adding_a_shard_only_takes_accounts():
+    ring = ConsistentHashRing(["s-0", "s-1", "s-2"])
+    before = owners(ring)
+
+    ring.add("s-3")
+    after = owners(ring)
+
+    moved = [a for a in ACCOUNTS if after[a] != before[a]]
+    assert moved
+    assert all(after[a] == "s-3" for a in moved)
+
+
+def test_adding_a_shard_twice_changes_nothing():
+    ring = ConsistentHashRing(["s-0", "s-1"])
+    before = owners(ring)
+
+    ring.add("s-1")
+
+    assert len(ring) == 2
+    assert owners(ring) == before
+
+
+def test_heartbeat_writes_off_the_loop_thread(monkeypatch, fake_redis):
+    monkeypatch.setattr(sharding, "redis_client", fake_redis)
+    monkeypatch.setattr(sharding, "HEARTBEAT_SECONDS", 0.01)
+
+    beat = sharding._beat
+    threads = []
+
+    def recording_beat(shard, lag_ms):
+        threads.append(threading.current_thread())
+        beat(shard, lag_ms)
+
+    monkeypatch.setattr(sharding, "_beat", recording_beat)
+
+    async def run():
+        task = asyncio.create_task(sharding.heartbeat_loop("s-0"))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(run())
+
+    assert threads and loop_thread not in threads
+    assert sharding.live_shards() == ["s-0"]
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services.campaigns.spreading import (
+    advance_next_run,
+    aligned_run_after,
+    phase_offset,
+    resume_next_run,
+    run_period_seconds,
+)
+
+
+CAMPAIGN = "5b0f6a52-6f0c-4c57-9a43-6d7b3f1d2e10"
+PERIOD = 15 * 60
+NOW = datetime(2026, 3, 1, 12, 0, 7, tzinfo=timezone.utc)
+
+
+def on_phase(when: datetime, campaign_id: str = CAMPAIGN, period: int = PERIOD) -> bool:
+    offset = (when.timestamp() - phase_offset(campaign_id, period)) % period
+    return min(offset, period - offset) < 1e-3
+
+
+def test_phase_offset_is_stable_and_inside_the_period():
+    offset = phase_offset(CAMPAIGN, PERIOD)
+
+    assert offset == phase_offset(CAMPAIGN, PERIOD)
+    assert 0 <= offset < PERIOD
+
+
+def test_phase_offset_spreads_campaigns():
+    offsets = {int(phase_offset(f"campaign-{i}", PERIOD)) for i in range(100)}
+
+    assert len(offsets) > 90
+
+
+def test_aligned_run_after_is_the_first_slot_at_or_after():
+    slot = aligned_run_after(CAMPAIGN, PERIOD, NOW)
+
+    assert NOW <= slot < NOW + timedelta(seconds=PERIOD)
+    assert on_phase(slot)
+
+
+def test_aligned_run_after_keeps_an_exact_slot():
+    slot = aligned_run_after(CAMPAIGN, PERIOD, NOW)
+
+    assert aligned_run_after(CAMPAIGN, PERIOD, slot) == slot
+
+
+def test_advance_next_run_on_time_moves_one_period():
+    scheduled = aligned_run_after(CAMPAIGN, PERIOD, NOW)
+
+    next_run = advance_next_run(CAMPAIGN, PERIOD, scheduled=scheduled, now=scheduled)
+
+    assert next_run == scheduled + timedelta(seconds=PERIOD)
+
+
+@pytest.mark.parametrize("late_by", [1, PERIOD // 2, PERIOD * 3 + 5])
+def test_advance_next_run_counts_from_a_late_dispatch(late_by):
+    scheduled = aligned_run_after(CAMPAIGN, PERIOD, NOW)
+    now = scheduled + timedelta(seconds=late_by)
+
+    next_run = advance_next_run(CAMPAIGN, PERIOD, scheduled=scheduled, now=now)
+
+    assert now + timedelta(seconds=PERIOD) <= next_run
+    assert next_run < now + timedelta(seconds=2 * PERIOD)
+    assert on_phase(next_run)
+
+
+def test_advance_next_run_without_a_slot():
+    next_run = advance_next_run(CAMPAIGN, PERIOD, scheduled=None, now=NOW)
+
+    assert next_run >= NOW + timedelta(seconds=PERIOD)
+    assert on_phase(next_run)
+
+
+def test_resume_next_run():
+    assert resume_next_run(None, NOW) == NOW
+    assert resume_next_run(NOW - timedelta(minutes=1), NOW) == NOW
+
+    later = NOW + timedelta(minutes=5)
+    assert resume_next_run(later, NOW) == later
+
+
+def test_run_period_respects_the_plan_minimum():
+    assert run_period_seconds(30, 15) == 30 * 60
+    assert run_period_seconds(5, 15) == 15 * 60